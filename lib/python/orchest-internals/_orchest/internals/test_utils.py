@@ -1,3 +1,4 @@
+import contextlib
 import uuid
 from typing import Any, Callable, Optional
 
@@ -64,6 +65,10 @@ class CeleryMock:
         )
         return self
 
+    @contextlib.contextmanager
+    def producer_or_acquire(self, producer=None):
+        yield producer
+
     def forget(self):
         pass
 
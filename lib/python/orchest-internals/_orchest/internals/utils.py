@@ -45,6 +45,20 @@ class GlobalOrchestConfig:
             "condition": lambda x: 0 < x <= 25,
             "condition-msg": "within the range [1, 25]",
         },
+        "MAX_BUILDS_PARALLELISM": {
+            "default": 1,
+            "type": int,
+            "requires-restart": True,
+            "condition": lambda x: 0 < x <= 25,
+            "condition-msg": "within the range [1, 25]",
+        },
+        "INTERACTIVE_SESSIONS_POOL_SIZE": {
+            "default": 0,
+            "type": int,
+            "requires-restart": True,
+            "condition": lambda x: 0 <= x <= 10,
+            "condition-msg": "within the range [0, 10]",
+        },
         "AUTH_ENABLED": {
             "default": False,
             "type": bool,
@@ -366,9 +380,13 @@ def run_orchest_ctl(client, command):
 
 def get_device_requests(environment_uuid, project_uuid, form="docker-sdk"):
 
-    device_requests = []
-
     capabilities = get_environment_capabilities(environment_uuid, project_uuid)
+    return get_device_requests_from_capabilities(capabilities, form)
+
+
+def get_device_requests_from_capabilities(capabilities, form="docker-sdk"):
+
+    device_requests = []
 
     # Do not request GPU capabilities if the instance can't support it,
     # it will result in an error.
@@ -389,15 +407,19 @@ def get_device_requests(environment_uuid, project_uuid, form="docker-sdk"):
     return device_requests
 
 
+def get_environment_url(environment_uuid, project_uuid):
+    return "http://orchest-webserver/store/environments/%s/%s" % (
+        project_uuid,
+        environment_uuid,
+    )
+
+
 def get_environment_capabilities(environment_uuid, project_uuid):
 
     capabilities = []
 
     try:
-        response = requests.get(
-            "http://orchest-webserver/store/environments/%s/%s"
-            % (project_uuid, environment_uuid)
-        )
+        response = requests.get(get_environment_url(environment_uuid, project_uuid))
         response.raise_for_status()
     except Exception as e:
         logging.error(
@@ -409,7 +431,12 @@ def get_environment_capabilities(environment_uuid, project_uuid):
         )
         return capabilities
 
-    environment = response.json()
+    return get_environment_capabilities_from_properties(response.json())
+
+
+def get_environment_capabilities_from_properties(environment):
+
+    capabilities = []
 
     if environment.get("gpu_support"):
         capabilities += ["gpu", "utility", "compute"]
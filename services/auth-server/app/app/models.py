@@ -19,6 +19,9 @@ class User(db.Model):
     username = db.Column(
         db.String(255),
         primary_key=True,
+        # The primary key index is led by the uuid, users are looked up
+        # by username when authenticating requests.
+        index=True,
     )
 
     password_hash = db.Column(db.String(255), nullable=False)
@@ -39,7 +42,7 @@ class Token(db.Model):
 
     __tablename__ = "tokens"
 
-    token = db.Column(db.String(255))
+    token = db.Column(db.String(255), index=True)
 
     user = db.Column(
         db.String(36), db.ForeignKey("users.uuid", ondelete="CASCADE"), primary_key=True
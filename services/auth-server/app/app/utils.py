@@ -1,5 +1,8 @@
 import datetime
 import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
 
 
 def get_hash(path):
@@ -14,29 +17,190 @@ def get_hash(path):
     return hasher.hexdigest()
 
 
-def set_auth_cache(
-    project_uuid_prefix, session_uuid_prefix, requires_authentication, auth_cache
-):
-    auth_cache["%s-%s" % (project_uuid_prefix, session_uuid_prefix)] = {
-        "date": datetime.datetime.now(),
-        "requires_authentication": requires_authentication,
-    }
+class _PendingFetch:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        # Set if the cache is invalidated while fetching, the result
+        # might then be stale and is not cached.
+        self.stale = False
 
 
-def get_auth_cache(
-    project_uuid_prefix, session_uuid_prefix, auth_cache, auth_cache_age
-):
-    key = "%s-%s" % (project_uuid_prefix, session_uuid_prefix)
+class ServiceAuthCache:
+    """Bounded LRU cache of the authentication requirements of services.
 
-    if key not in auth_cache:
-        return {"status": "missing"}
+    Keys are (project_uuid_prefix, session_uuid_prefix) tuples, as found
+    in the URLs of services, values tell whether requests to the service
+    require authentication. Results of failed lookups, e.g. because no
+    such service exists, are cached as well, for `negative_ttl` seconds,
+    and treated as requiring authentication.
 
-    if (
-        datetime.datetime.now() - auth_cache[key]["date"]
-    ).total_seconds() > auth_cache_age:
-        return {"status": "expired"}
+    Concurrent lookups of the same missing key are coalesced, only one
+    of them calls the orchest-api while the others wait for its result.
 
-    return {
-        "status": "available",
-        "requires_authentication": auth_cache[key]["requires_authentication"],
-    }
+    The orchest-api invalidates the entries of a session when the
+    session is started or stopped, see `invalidate`, `ttl` bounds how
+    long changes that are not notified, e.g. to the services of job
+    runs, take to be picked up.
+    """
+
+    def __init__(
+        self, max_size: int, ttl: float, negative_ttl: float, fetch_timeout: float
+    ):
+        self._max_size = max_size
+        self._ttl = datetime.timedelta(seconds=ttl)
+        self._negative_ttl = datetime.timedelta(seconds=negative_ttl)
+        self._fetch_timeout = fetch_timeout
+        # key -> (requires_authentication, expiration time).
+        self._entries = OrderedDict()
+        # key -> _PendingFetch.
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def requires_authentication(
+        self, key: Tuple[str, str], fetch: Callable[[], Optional[bool]]
+    ) -> bool:
+        """Returns whether requests to the service require auth.
+
+        Args:
+            key: (project_uuid_prefix, session_uuid_prefix) of the
+                service.
+            fetch: Called on a miss, returns the
+                `requires_authentication` value of the service, None if
+                the lookup failed. Should not take longer than the
+                `fetch_timeout` of the cache.
+
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > datetime.datetime.utcnow():
+                    self._entries.move_to_end(key)
+                    return entry[0]
+                del self._entries[key]
+
+            pending = self._pending.get(key)
+            is_fetching = pending is None
+            if is_fetching:
+                pending = _PendingFetch()
+                self._pending[key] = pending
+
+        if not is_fetching:
+            if not pending.done.wait(self._fetch_timeout):
+                return True
+            return pending.result is not False
+
+        try:
+            result = fetch()
+        except Exception:
+            result = None
+
+        with self._lock:
+            if self._pending.get(key) is pending:
+                del self._pending[key]
+            if not pending.stale:
+                ttl = self._negative_ttl if result is None else self._ttl
+                self._entries[key] = (result, datetime.datetime.utcnow() + ttl)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self._max_size:
+                    self._entries.popitem(last=False)
+
+        pending.result = result
+        pending.done.set()
+        return result is not False
+
+    def invalidate(
+        self, project_uuid: Optional[str] = None, session_uuid: Optional[str] = None
+    ) -> None:
+        """Removes the entries matching a project and session.
+
+        Args:
+            project_uuid: Full UUID of the project, entries of all
+                projects are removed if None.
+            session_uuid: Full UUID of the session, i.e. of the pipeline
+                for interactive sessions and of the pipeline run for
+                job runs. Entries of all sessions are removed if None.
+
+        """
+
+        def matches(key):
+            return (project_uuid is None or project_uuid.startswith(key[0])) and (
+                session_uuid is None or session_uuid.startswith(key[1])
+            )
+
+        with self._lock:
+            for key in [key for key in self._entries if matches(key)]:
+                del self._entries[key]
+            for key in [key for key in self._pending if matches(key)]:
+                self._pending.pop(key).stale = True
+
+
+class TokenCache:
+    """Bounded LRU cache of validated (username, token) pairs.
+
+    nginx asks the auth-server to authenticate nearly every proxied
+    request, caching the pairs that were found to be valid avoids
+    querying the database for every one of them. Entries expire after
+    `ttl` seconds, or earlier if the token expires before, so that
+    changes made to the database by other processes, e.g. the deletion
+    of a user through `add_user.py`, are picked up.
+
+    Only valid pairs are cached, a request with an invalid token always
+    hits the database.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self._max_size = max_size
+        self._ttl = datetime.timedelta(seconds=ttl)
+        # (username, token) -> expiration time of the entry.
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def is_valid(self, username: str, token: str) -> bool:
+        """Returns True if the pair is cached and not expired."""
+        key = (username, token)
+        with self._lock:
+            expiration = self._entries.get(key)
+            if expiration is None:
+                return False
+            if expiration <= datetime.datetime.utcnow():
+                del self._entries[key]
+                return False
+            self._entries.move_to_end(key)
+            return True
+
+    def add(
+        self,
+        username: str,
+        token: str,
+        token_expiration: Optional[datetime.datetime] = None,
+    ) -> None:
+        """Caches a validated pair.
+
+        Args:
+            username: Name of the user owning the token.
+            token: The validated token.
+            token_expiration: UTC time at which the token expires, the
+                entry will not outlive the token.
+
+        """
+        expiration = datetime.datetime.utcnow() + self._ttl
+        if token_expiration is not None:
+            expiration = min(expiration, token_expiration)
+
+        key = (username, token)
+        with self._lock:
+            self._entries[key] = expiration
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, username: str) -> None:
+        """Removes all cached tokens of a user.
+
+        To be called whenever tokens of the user are deleted, e.g. on
+        logout, login or deletion of the user.
+        """
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == username]:
+                del self._entries[key]
@@ -2,6 +2,7 @@ import datetime
 import os
 import secrets
 import uuid
+from typing import Optional
 
 import requests
 from flask import jsonify, redirect, request, send_from_directory
@@ -9,15 +10,21 @@ from werkzeug.security import check_password_hash, generate_password_hash
 
 from app.connections import db
 from app.models import Token, User
-from app.utils import get_auth_cache, set_auth_cache
-
-# This auth_cache is shared between requests
-# within the same Flask process
-_auth_cache = {}
-_auth_cache_age = 3  # in seconds
+from app.utils import ServiceAuthCache, TokenCache
 
 
 def register_views(app):
+    token_cache = TokenCache(
+        app.config["TOKEN_CACHE_MAX_SIZE"], app.config["TOKEN_CACHE_TTL"]
+    )
+    # Shared between requests within the same Flask process.
+    service_auth_cache = ServiceAuthCache(
+        max_size=app.config["SERVICE_AUTH_CACHE_MAX_SIZE"],
+        ttl=app.config["SERVICE_AUTH_CACHE_TTL"],
+        negative_ttl=app.config["SERVICE_AUTH_CACHE_NEGATIVE_TTL"],
+        fetch_timeout=app.config["SERVICE_AUTH_FETCH_TIMEOUT"],
+    )
+
     @app.after_request
     def add_header(r):
         """
@@ -52,29 +59,29 @@ def register_views(app):
         cookie_token = request.cookies.get("auth_token")
         username = request.cookies.get("auth_username")
 
-        user = User.query.filter(User.username == username).first()
-
-        if user is None:
+        if not cookie_token or not username:
             return False
 
-        token = (
-            Token.query.filter(Token.token == cookie_token)
-            .filter(Token.user == user.uuid)
-            .first()
+        if token_cache.is_valid(username, cookie_token):
+            return True
+
+        token_created = (
+            db.session.query(Token.created)
+            .join(User, User.uuid == Token.user)
+            .filter(User.username == username, Token.token == cookie_token)
+            .scalar()
         )
 
-        if token is None:
+        if token_created is None:
             return False
-        else:
 
-            token_creation_limit = datetime.datetime.utcnow() - datetime.timedelta(
-                days=app.config["TOKEN_DURATION_HOURS"]
-            )
+        token_duration = datetime.timedelta(days=app.config["TOKEN_DURATION_HOURS"])
+        token_expiration = token_created + token_duration
+        if token_expiration <= datetime.datetime.utcnow():
+            return False
 
-            if token.created > token_creation_limit:
-                return True
-            else:
-                return False
+        token_cache.add(username, cookie_token, token_expiration)
+        return True
 
     def serve_static_or_dev(path):
         file_path = os.path.join(app.config["STATIC_DIR"], path)
@@ -112,6 +119,19 @@ def register_views(app):
 
     @app.route("/login/clear", methods=["GET"])
     def logout():
+        # Revoke the token, clearing the cookies does not prevent the
+        # token from being used.
+        username = request.cookies.get("auth_username")
+        cookie_token = request.cookies.get("auth_token")
+        if username and cookie_token:
+            user = User.query.filter(User.username == username).first()
+            if user is not None:
+                Token.query.filter(
+                    Token.user == user.uuid, Token.token == cookie_token
+                ).delete()
+                db.session.commit()
+            token_cache.invalidate_user(username)
+
         resp = redirect_response("/")
         resp.set_cookie("auth_token", "")
         resp.set_cookie("auth_username", "")
@@ -173,6 +193,7 @@ def register_views(app):
 
                     db.session.add(token)
                     db.session.commit()
+                    token_cache.invalidate_user(username)
 
                     resp = redirect_response(redirect_url, redirect_type)
                     resp.set_cookie("auth_token", token.token)
@@ -198,6 +219,8 @@ def register_views(app):
                 else:
                     db.session.delete(user)
                     db.session.commit()
+                    # Its token has been deleted through cascading.
+                    token_cache.invalidate_user(username)
                     return ""
             else:
                 return jsonify({"error": "User does not exist."}), 500
@@ -249,10 +272,40 @@ def register_views(app):
 
         return jsonify(data_json), 200
 
+    def fetch_service_requires_authentication(
+        project_uuid_prefix: str, session_uuid_prefix: str
+    ) -> Optional[bool]:
+        base_url = "http://%s/api/services/" % (app.config["ORCHEST_API_ADDRESS"])
+        try:
+            r = requests.get(
+                base_url,
+                params={
+                    "project_uuid_prefix": project_uuid_prefix,
+                    "session_uuid_prefix": session_uuid_prefix,
+                },
+                timeout=app.config["SERVICE_AUTH_FETCH_TIMEOUT"],
+            )
+            services = r.json().get("services", [])
+
+            # No service is found for given filter
+            if len(services) == 0:
+                raise Exception("No services found")
+
+            if len(services) > 1:
+                raise Exception(
+                    "Filtered /api/services endpoint "
+                    "should always return a single service"
+                )
+
+            # Always check first service that is returned,
+            # should be unique
+            return services[0]["service"]["requires_authentication"] is not False
+        except Exception as e:
+            app.logger.error(e)
+            return None
+
     @app.route("/auth/service", methods=["GET"])
     def auth_service():
-        global _auth_cache, _auth_cache_age
-
         # Bypass definition based authentication if the request
         # is authenticated
         if is_authenticated(request):
@@ -275,50 +328,22 @@ def register_views(app):
             app.logger.error("Failed to parse X-Original-URI: %s" % original_uri)
             return "", 401
 
-        auth_check = get_auth_cache(
-            project_uuid_prefix, session_uuid_prefix, _auth_cache, _auth_cache_age
+        if service_auth_cache.requires_authentication(
+            (project_uuid_prefix, session_uuid_prefix),
+            lambda: fetch_service_requires_authentication(
+                project_uuid_prefix, session_uuid_prefix
+            ),
+        ):
+            return "", 401
+        return "", 200
+
+    # Called by the orchest-api when sessions are started or stopped,
+    # not reachable from outside given that nginx marks /auth as
+    # internal.
+    @app.route("/auth/service/cache", methods=["DELETE"])
+    def invalidate_auth_service_cache():
+        service_auth_cache.invalidate(
+            project_uuid=request.args.get("project_uuid"),
+            session_uuid=request.args.get("session_uuid"),
         )
-        if auth_check["status"] == "available":
-            if auth_check["requires_authentication"] is False:
-                return "", 200
-            else:
-                return "", 401
-        else:
-            # No cache available, fetch from orchest-api
-            base_url = "http://%s/api/services/" % (app.config["ORCHEST_API_ADDRESS"])
-            service_url = "%s?project_uuid_prefix=%s&session_uuid_prefix=%s" % (
-                base_url,
-                project_uuid_prefix,
-                session_uuid_prefix,
-            )
-
-            try:
-                r = requests.get(service_url)
-                services = r.json().get("services", [])
-
-                # No service is found for given filter
-                if len(services) == 0:
-                    raise Exception("No services found")
-
-                if len(services) > 1:
-                    raise Exception(
-                        "Filtered /api/services endpoint "
-                        "should always return a single service"
-                    )
-
-                # Always check first service that is returned,
-                # should be unique
-                if services[0]["service"]["requires_authentication"] is False:
-                    set_auth_cache(
-                        project_uuid_prefix, session_uuid_prefix, False, _auth_cache
-                    )
-                    return "", 200
-                else:
-                    set_auth_cache(
-                        project_uuid_prefix, session_uuid_prefix, True, _auth_cache
-                    )
-                    raise Exception("'requires_authentication' is not set to False")
-
-            except Exception as e:
-                app.logger.error(e)
-                return "", 401
+        return "", 200
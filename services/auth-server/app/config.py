@@ -9,6 +9,22 @@ class Config:
 
     TOKEN_DURATION_HOURS = 24
 
+    # Validated tokens are cached in memory to not query the database
+    # for every request that nginx authenticates. Max number of cached
+    # tokens and for how long they are cached, in seconds.
+    TOKEN_CACHE_MAX_SIZE = 1024
+    TOKEN_CACHE_TTL = 10
+
+    # Whether services of sessions require authentication is cached in
+    # memory as well, see app.utils.ServiceAuthCache. Failed lookups,
+    # e.g. of services that do not exist (yet), are cached for a shorter
+    # time. The orchest-api invalidates the cache when sessions start or
+    # stop. In seconds, except for the max size.
+    SERVICE_AUTH_CACHE_MAX_SIZE = 1024
+    SERVICE_AUTH_CACHE_TTL = 60
+    SERVICE_AUTH_CACHE_NEGATIVE_TTL = 3
+    SERVICE_AUTH_FETCH_TIMEOUT = 5
+
     dir_path = os.path.dirname(os.path.realpath(__file__))
 
     CLOUD = _config.CLOUD
@@ -0,0 +1,24 @@
+"""Add indexes to look up tokens by username and token
+
+Revision ID: b7f3c2d91e04
+Revises: 9918c83b98a0
+Create Date: 2022-01-25 09:47:12.083615
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b7f3c2d91e04"
+down_revision = "9918c83b98a0"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f("ix_users_username"), "users", ["username"], unique=False)
+    op.create_index(op.f("ix_tokens_token"), "tokens", ["token"], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f("ix_tokens_token"), table_name="tokens")
+    op.drop_index(op.f("ix_users_username"), table_name="users")
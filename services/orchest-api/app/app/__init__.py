@@ -7,6 +7,8 @@ Additinal note:
         https://docs.pytest.org/en/latest/goodpractices.html
 """
 import os
+import threading
+from datetime import datetime
 from logging.config import dictConfig
 from pprint import pformat
 
@@ -26,7 +28,11 @@ from app.apis.namespace_jobs import AbortJob
 from app.apis.namespace_jupyter_builds import AbortJupyterBuild, CreateJupyterBuild
 from app.apis.namespace_runs import AbortPipelineRun
 from app.connections import db
+from app.core.image_index import ImageIndexWatcher
+from app.core.image_warmup import BaseImageWarmer
+from app.core.retention import RetentionCompactor
 from app.core.scheduler import Scheduler
+from app.core.session_pool import SessionPoolReclaimer
 from app.models import (
     EnvironmentBuild,
     InteractivePipelineRun,
@@ -225,11 +231,48 @@ def create_app(config_class=None, use_db=True, be_scheduler=False, to_migrate_db
 
         app.config["SCHEDULER"] = scheduler
         scheduler.start()
+
+        # The job scheduler sleeps until the next job is due, thus it
+        # runs in its own daemon thread instead of periodically.
+        wake_up = threading.Event()
+        app.config["JOB_SCHEDULER_WAKE_UP"] = wake_up
+        threading.Thread(
+            # Locks rows it is processing.
+            target=Scheduler.run,
+            args=[app, wake_up],
+            daemon=True,
+        ).start()
+
         scheduler.add_job(
             # Locks rows it is processing.
-            Scheduler.check_for_jobs_to_be_scheduled,
+            RetentionCompactor.compact,
+            "interval",
+            seconds=app.config["PIPELINE_RUNS_RETENTION_INTERVAL"],
+            args=[app],
+        )
+
+        # Blocks on the events of the docker daemon.
+        threading.Thread(
+            target=ImageIndexWatcher.run,
+            args=[app],
+            daemon=True,
+        ).start()
+
+        scheduler.add_job(
+            BaseImageWarmer.warm_up,
+            "interval",
+            seconds=app.config["BASE_IMAGES_WARM_UP_INTERVAL"],
+            args=[app],
+            # Pulls can take a while, warm ups should not overlap.
+            max_instances=1,
+            next_run_time=datetime.now(),
+        )
+
+        scheduler.add_job(
+            # Locks the sessions it is stopping.
+            SessionPoolReclaimer.reclaim,
             "interval",
-            seconds=app.config["SCHEDULER_INTERVAL"],
+            seconds=app.config["INTERACTIVE_SESSIONS_POOL_RECLAIM_INTERVAL"],
             args=[app],
         )
 
@@ -1,11 +1,11 @@
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 
 from celery.contrib.abortable import AbortableAsyncResult
 from flask import abort, current_app, request
 from flask_restx import Namespace, Resource
-from sqlalchemy import desc, func, or_
+from sqlalchemy import asc, desc, func, or_
 
 import app.models as models
 from _orchest.internals.two_phase_executor import TwoPhaseExecutor, TwoPhaseFunction
@@ -19,6 +19,45 @@ api = Namespace("environment-builds", description="Managing environment builds")
 api = register_schema(api)
 
 
+def get_queue_positions() -> Dict[str, int]:
+    """Returns the queue position of every PENDING environment build.
+
+    The position is derived from the order in which the builds worker
+    picks up builds: by priority first, by request time second. It
+    does not account for Jupyter builds, which share the worker.
+
+    Returns:
+        A dictionary mapping the uuid of a PENDING build to its 1-based
+        position in the queue.
+
+    """
+    pending_builds = (
+        db.session.query(models.EnvironmentBuild.uuid)
+        .filter(models.EnvironmentBuild.status == "PENDING")
+        .order_by(
+            desc(models.EnvironmentBuild.priority),
+            asc(models.EnvironmentBuild.requested_time),
+        )
+        .all()
+    )
+    return {build.uuid: i + 1 for i, build in enumerate(pending_builds)}
+
+
+def _as_dicts_with_queue_position(
+    environment_builds: List[models.EnvironmentBuild],
+) -> List[dict]:
+    queue_positions = {}
+    if any(build.status == "PENDING" for build in environment_builds):
+        queue_positions = get_queue_positions()
+
+    result = []
+    for build in environment_builds:
+        build = build.as_dict()
+        build["queue_position"] = queue_positions.get(build["uuid"])
+        result.append(build)
+    return result
+
+
 @api.route("/")
 class EnvironmentBuildList(Resource):
     @api.doc("get_environment_builds")
@@ -27,7 +66,7 @@ class EnvironmentBuildList(Resource):
         """Fetches all environment builds (past and present).
 
         The environment builds are either PENDING, STARTED, SUCCESS,
-        FAILURE, ABORTED.
+        FAILURE, ABORTED. PENDING builds have a queue_position.
 
         """
         environment_builds = models.EnvironmentBuild.query.all()
@@ -35,7 +74,7 @@ class EnvironmentBuildList(Resource):
             environment_builds = []
 
         return (
-            {"environment_builds": [envb.as_dict() for envb in environment_builds]},
+            {"environment_builds": _as_dicts_with_queue_position(environment_builds)},
             200,
         )
 
@@ -59,24 +98,35 @@ class EnvironmentBuildList(Resource):
         for that environment.  This implies that only an environment
         build can be active (queued or actually started) for a given
         environment.
+
+        Builds are queued, they are started in order of priority and
+        request time, as many at a time as allowed by the
+        MAX_BUILDS_PARALLELISM setting.
         """
 
-        # keep only unique requests
+        # keep only unique requests, duplicates get the highest of the
+        # requested priorities
         post_data = request.get_json()
-        builds_requests = post_data["environment_build_requests"]
-        builds_requests = set(
-            [
-                (req["project_uuid"], req["environment_uuid"], req["project_path"])
-                for req in builds_requests
-            ]
-        )
+        default_priority = current_app.config["ENVIRONMENT_BUILDS_DEFAULT_PRIORITY"]
+        max_priority = current_app.config["ENVIRONMENT_BUILDS_MAX_PRIORITY"]
+        unique_requests = {}
+        for req in post_data["environment_build_requests"]:
+            priority = req.get("priority")
+            if priority is None:
+                priority = default_priority
+            if not 0 <= priority <= max_priority:
+                abort(400, f"Priority must be in the range [0, {max_priority}].")
+
+            key = (req["project_uuid"], req["environment_uuid"], req["project_path"])
+            unique_requests[key] = max(priority, unique_requests.get(key, priority))
         builds_requests = [
             {
                 "project_uuid": req[0],
                 "environment_uuid": req[1],
                 "project_path": req[2],
+                "priority": priority,
             }
-            for req in builds_requests
+            for req, priority in unique_requests.items()
         ]
 
         defined_builds = []
@@ -91,6 +141,11 @@ class EnvironmentBuildList(Resource):
             except Exception:
                 failed_requests.append(build_request)
 
+        if defined_builds:
+            queue_positions = get_queue_positions()
+            for build in defined_builds:
+                build["queue_position"] = queue_positions.get(build["uuid"])
+
         return_data = {"environment_builds": defined_builds}
         return_code = 200
 
@@ -115,7 +170,7 @@ class EnvironmentBuild(Resource):
             uuid=environment_build_uuid
         ).one_or_none()
         if env_build is not None:
-            return env_build.as_dict()
+            return _as_dicts_with_queue_position([env_build])[0]
         abort(404, "EnvironmentBuild not found.")
 
     @api.doc("set_environment_build_status")
@@ -200,7 +255,7 @@ class ProjectMostRecentBuildsList(Resource):
         query = query.with_entities(models.EnvironmentBuild)
         env_builds = query.all()
 
-        return {"environment_builds": [build.as_dict() for build in env_builds]}
+        return {"environment_builds": _as_dicts_with_queue_position(env_builds)}
 
 
 @api.route("/most-recent/<string:project_uuid>/<string:environment_uuid>")
@@ -225,9 +280,9 @@ class ProjectEnvironmentMostRecentBuild(Resource):
             .first()
         )
         if recent:
-            environment_builds.append(recent.as_dict())
+            environment_builds.append(recent)
 
-        return {"environment_builds": environment_builds}
+        return {"environment_builds": _as_dicts_with_queue_position(environment_builds)}
 
 
 class CreateEnvironmentBuild(TwoPhaseFunction):
@@ -269,6 +324,9 @@ class CreateEnvironmentBuild(TwoPhaseFunction):
             "project_path": build_request["project_path"],
             "requested_time": datetime.fromisoformat(datetime.utcnow().isoformat()),
             "status": "PENDING",
+            "priority": build_request.get(
+                "priority", current_app.config["ENVIRONMENT_BUILDS_DEFAULT_PRIORITY"]
+            ),
         }
         db.session.add(models.EnvironmentBuild(**environment_build))
 
@@ -276,10 +334,16 @@ class CreateEnvironmentBuild(TwoPhaseFunction):
         self.collateral_kwargs["project_uuid"] = build_request["project_uuid"]
         self.collateral_kwargs["environment_uuid"] = build_request["environment_uuid"]
         self.collateral_kwargs["project_path"] = build_request["project_path"]
+        self.collateral_kwargs["priority"] = environment_build["priority"]
         return environment_build
 
     def _collateral(
-        self, task_id: str, project_uuid: str, environment_uuid: str, project_path: str
+        self,
+        task_id: str,
+        project_uuid: str,
+        environment_uuid: str,
+        project_path: str,
+        priority: int,
     ):
         celery = make_celery(current_app)
         celery_job_kwargs = {
@@ -292,6 +356,7 @@ class CreateEnvironmentBuild(TwoPhaseFunction):
             "app.core.tasks.build_environment",
             kwargs=celery_job_kwargs,
             task_id=task_id,
+            priority=priority,
         )
 
     def _revert(self):
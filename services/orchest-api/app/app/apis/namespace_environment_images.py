@@ -4,6 +4,7 @@ from flask_restx import Namespace, Resource
 from _orchest.internals import config as _config
 from _orchest.internals.two_phase_executor import TwoPhaseExecutor, TwoPhaseFunction
 from _orchest.internals.utils import docker_images_list_safe, docker_images_rm_safe
+from app import schema
 from app.apis.namespace_environment_builds import (
     DeleteProjectBuilds,
     DeleteProjectEnvironmentBuilds,
@@ -12,7 +13,7 @@ from app.apis.namespace_jobs import AbortJob
 from app.apis.namespace_runs import AbortPipelineRun
 from app.apis.namespace_sessions import StopInteractiveSession
 from app.connections import db, docker_client
-from app.core import docker_utils
+from app.core import docker_utils, image_warmup
 from app.utils import (
     interactive_runs_using_environment,
     interactive_sessions_using_environment,
@@ -25,6 +26,39 @@ api = Namespace("environment-images", description="Managing environment images")
 api = register_schema(api)
 
 
+@api.route("/base-images")
+class BaseImageList(Resource):
+    @api.doc("get_base_images")
+    @api.marshal_with(schema.base_images)
+    def get(self):
+        """Returns the status of the base images of environments.
+
+        The base images used by the environments of all projects are
+        pulled in the background ahead of builds, see
+        app/core/image_warmup.py.
+        """
+        return {"base_images": image_warmup.get_status()}
+
+    @api.doc("warm_up_base_images")
+    def post(self):
+        """Pulls missing base images now instead of periodically.
+
+        E.g. to be called when the base image of an environment has
+        been changed.
+        """
+        scheduler = current_app.config.get("SCHEDULER")
+        if scheduler is None:
+            return {"message": "Base images are not being warmed up."}, 409
+
+        scheduler.add_job(
+            image_warmup.BaseImageWarmer.warm_up,
+            args=[current_app._get_current_object()],
+            id="base_images_warm_up_now",
+            replace_existing=True,
+        )
+        return {"message": "Base images warm up scheduled."}, 202
+
+
 @api.route(
     "/<string:project_uuid>/<string:environment_uuid>",
 )
@@ -26,7 +26,8 @@ class IdleCheck(Resource):
         - there are no ongoing job runs
         - there are no busy kernels among running sessions, said busy
             state is reported by JupyterLab, and reflects the fact that
-            a kernel is not actively doing some compute.
+            a kernel is not actively doing some compute. It is pushed
+            by the session-sidecar of every session.
         """
         idleness_data = utils.is_orchest_idle()
         return idleness_data, 200
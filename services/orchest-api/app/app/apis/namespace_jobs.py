@@ -1,16 +1,17 @@
 import copy
+import hashlib
+import json
 import uuid
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Set, Tuple
 
-import requests
 from celery.contrib.abortable import AbortableAsyncResult
 from croniter import croniter
 from docker import errors
-from flask import abort, current_app, request
-from flask_restx import Namespace, Resource, marshal, reqparse
+from flask import abort, current_app, make_response, request
+from flask_restx import Namespace, Resource, marshal
 from sqlalchemy import desc, func
-from sqlalchemy.orm import joinedload, load_only, noload, undefer
+from sqlalchemy.orm import joinedload, load_only, noload, undefer, with_expression
 
 import app.models as models
 from _orchest.internals import config as _config
@@ -20,12 +21,20 @@ from app import schema
 from app.apis.namespace_runs import AbortPipelineRun
 from app.celery_app import make_celery
 from app.connections import db
-from app.core.pipelines import Pipeline, construct_pipeline
+from app.core.pipelines import construct_pipeline
+from app.core.retention import get_retention_backlog
 from app.utils import (
     fuzzy_filter_non_interactive_pipeline_runs,
+    get_approximate_count,
     get_env_uuids_missing_image,
+    get_fuzzy_filter_rank,
+    get_keyset_pagination_parser,
+    get_listing_mask,
     get_proj_pip_env_variables,
+    get_projection,
+    keyset_paginate,
     lock_environment_images_for_job,
+    notify_job_scheduler,
     page_to_pagination_data,
     process_stale_environment_images,
     register_schema,
@@ -36,25 +45,119 @@ api = Namespace("jobs", description="Managing jobs")
 api = register_schema(api)
 
 
+def get_pipeline_run_status_counts(job_uuids: List[str]) -> Dict[str, Dict[str, int]]:
+    """Returns the number of pipeline runs of jobs by status.
+
+    The counts are maintained by the db, see
+    models.JobPipelineRunStatusCount, so this does not aggregate the
+    runs of the jobs.
+
+    Returns:
+        A dictionary mapping a job uuid to a dictionary mapping a status
+        to the number of runs of the job in that status. Jobs without
+        runs are not part of the dictionary.
+
+    """
+    counts = {}
+    if not job_uuids:
+        return counts
+
+    model = models.JobPipelineRunStatusCount
+    rows = db.session.query(model.job_uuid, model.status, model.count).filter(
+        model.job_uuid.in_(job_uuids), model.count > 0
+    )
+    for job_uuid, status, count in rows:
+        counts.setdefault(job_uuid, {})[status] = count
+    return counts
+
+
+def _with_pipeline_run_status_counts(jobs: List[dict]) -> List[dict]:
+    if "aggregate_run_statuses" in request.args:
+        counts = get_pipeline_run_status_counts([job["uuid"] for job in jobs])
+        for job in jobs:
+            job["pipeline_run_status_counts"] = counts.get(job["uuid"], {})
+    return jobs
+
+
 @api.route("/")
 class JobList(Resource):
-    @api.doc("get_jobs")
-    @api.marshal_with(schema.jobs)
+    @api.doc(
+        "get_jobs",
+        params={
+            "limit": {
+                "description": (
+                    "Max number of jobs to return, enables pagination, see "
+                    "pagination_data.next_cursor."
+                ),
+                "type": int,
+            },
+            "cursor": {
+                "description": "next_cursor of the previous page.",
+                "type": str,
+            },
+            "fields": {
+                "description": "Comma separated list of the fields to return.",
+                "type": str,
+            },
+            "approximate_total": {
+                "description": "Return an estimate of the total number of jobs.",
+                "type": bool,
+            },
+            "aggregate_run_statuses": {
+                "description": (
+                    "Populates the pipeline_run_status_counts property of every "
+                    "job. Value does not matter as long as it is set."
+                ),
+                "type": None,
+            },
+        },
+    )
+    @api.response(200, "Success", schema.jobs)
+    @api.response(200, "Success", schema.paginated_jobs)
     def get(self):
         """Fetches all jobs.
 
         The jobs are either in queue, running or already
-        completed.
+        completed. Jobs are ordered by created time descending.
 
+        The endpoint has optional keyset pagination, if `limit` is
+        passed the returned json also contains pagination data.
         """
-        jobs = models.Job.query
+        args = get_keyset_pagination_parser().parse_args()
+        keys = [models.Job.created_time, models.Job.uuid]
+        try:
+            options, fields = get_projection(models.Job, schema.job, args.fields, keys)
+        except ValueError as e:
+            return {"message": str(e)}, 400
+
+        jobs = models.Job.query.options(*options)
         if "project_uuid" in request.args:
             jobs = jobs.filter_by(project_uuid=request.args["project_uuid"])
 
-        jobs = jobs.order_by(desc(models.Job.created_time)).all()
-        jobs = [job.__dict__ for job in jobs]
+        mask = get_listing_mask("jobs", fields)
+        if args.limit is None:
+            jobs = jobs.order_by(desc(models.Job.created_time)).all()
+            jobs = _with_pipeline_run_status_counts([job.__dict__ for job in jobs])
+            return marshal({"jobs": jobs}, schema.jobs, mask=mask)
 
-        return {"jobs": jobs}
+        try:
+            page, next_cursor = keyset_paginate(jobs, keys, args.cursor, args.limit)
+        except ValueError as e:
+            return {"message": str(e)}, 400
+
+        pagination_data = {"next_cursor": next_cursor}
+        if args.approximate_total:
+            pagination_data["approximate_total"] = get_approximate_count(jobs)
+        return marshal(
+            {
+                "jobs": _with_pipeline_run_status_counts(
+                    [job.__dict__ for job in page]
+                ),
+                "pagination_data": pagination_data,
+            },
+            schema.paginated_jobs,
+            mask=mask,
+        )
 
     @api.doc("start_job")
     @api.expect(schema.job_spec)
@@ -84,6 +187,31 @@ class JobList(Resource):
         return marshal(job, schema.job), 201
 
 
+@api.route("/counts")
+class JobCounts(Resource):
+    @api.doc("get_job_counts")
+    @api.marshal_with(schema.project_counts)
+    def get(self):
+        """Returns the number of jobs of every project.
+
+        Projects without jobs are not part of the response.
+        """
+        counts = db.session.query(
+            models.Job.project_uuid, func.count(models.Job.uuid)
+        ).group_by(models.Job.project_uuid)
+        if "project_uuid" in request.args:
+            counts = counts.filter(
+                models.Job.project_uuid == request.args["project_uuid"]
+            )
+
+        return {
+            "counts": [
+                {"project_uuid": project_uuid, "count": count}
+                for project_uuid, count in counts.all()
+            ]
+        }
+
+
 @api.route("/next_scheduled_job")
 class NextScheduledJob(Resource):
     @api.doc("get_next_scheduled_job")
@@ -116,6 +244,20 @@ class NextScheduledJob(Resource):
         return data
 
 
+@api.route("/retention_backlog")
+class RetentionBacklog(Resource):
+    @api.doc("get_retention_backlog")
+    @api.marshal_with(schema.retention_backlog)
+    def get(self):
+        """Returns metrics about the runs waiting to be deleted.
+
+        Pipeline runs that are not to be retained, see
+        max_retained_pipeline_runs, are deleted in the background, this
+        endpoint allows to monitor how far behind such deletion is.
+        """
+        return get_retention_backlog()
+
+
 @api.route("/<string:job_uuid>")
 @api.param("job_uuid", "UUID of job")
 @api.response(404, "Job not found")
@@ -133,9 +275,13 @@ class Job(Resource):
             },
         },
     )
-    @api.marshal_with(schema.job, code=200)
+    @api.response(200, "Success", schema.job)
+    @api.response(304, "Not modified")
     def get(self, job_uuid):
-        """Fetches a job given its UUID."""
+        """Fetches a job given its UUID.
+
+        Supports conditional requests through the ETag of the response.
+        """
         job = (
             models.Job.query.options(undefer(models.Job.env_variables))
             .filter_by(uuid=job_uuid)
@@ -146,19 +292,21 @@ class Job(Resource):
             abort(404, "Job not found.")
 
         if "aggregate_run_statuses" in request.args:
-            status_agg = (
-                models.NonInteractivePipelineRun.query.filter_by(job_uuid=job_uuid)
-                .with_entities(
-                    models.NonInteractivePipelineRun.status,
-                    func.count(models.NonInteractivePipelineRun.status),
-                )
-                .group_by(models.NonInteractivePipelineRun.status)
-            )
-            status_agg = {k: v for k, v in status_agg}
             job = job.__dict__
-            job["pipeline_run_status_counts"] = status_agg
-
-        return job
+            job["pipeline_run_status_counts"] = get_pipeline_run_status_counts(
+                [job_uuid]
+            ).get(job_uuid, {})
+
+        # The UI polls jobs while they are running, unchanged jobs are
+        # not sent again.
+        data = marshal(job, schema.job)
+        response = make_response(data, 200)
+        response.set_etag(
+            hashlib.sha1(
+                json.dumps(data, sort_keys=True, default=str).encode()
+            ).hexdigest()
+        )
+        return response.make_conditional(request)
 
     @api.expect(schema.job_update)
     @api.doc("update_job")
@@ -253,29 +401,67 @@ class PipelineRunsList(Resource):
                 ),
                 "type": int,
             },
+            "limit": {
+                "description": (
+                    "Max number of runs to return, enables keyset pagination, see "
+                    "pagination_data.next_cursor. Can't be used with page."
+                ),
+                "type": int,
+            },
+            "cursor": {
+                "description": "next_cursor of the previous page.",
+                "type": str,
+            },
+            "fields": {
+                "description": "Comma separated list of the fields to return.",
+                "type": str,
+            },
+            "approximate_total": {
+                "description": "Return an estimate of the total number of runs.",
+                "type": bool,
+            },
             "fuzzy_filter": {
                 "description": (
                     "Fuzzy filtering across pipeline run index, status and parameters."
                 ),
                 "type": str,
             },
+            "sort": {
+                "description": (
+                    "Either 'newest' (default) or 'relevance', which sorts runs by "
+                    "how well they match fuzzy_filter, most relevant first."
+                ),
+                "type": str,
+            },
         },
     )
     @api.response(200, "Success", schema.paginated_job_pipeline_runs)
+    @api.response(200, "Success", schema.cursor_paginated_job_pipeline_runs)
     @api.response(200, "Success", schema.job_pipeline_runs)
     def get(self, job_uuid):
         """Fetch pipeline runs of a job, sorted newest first.
 
         Runs are ordered by job_run_index DESC,
-        job_run_pipeline_run_index DESC.
+        job_run_pipeline_run_index DESC. When sorting by relevance runs
+        are first ordered by their rank for the fuzzy filter, which is
+        returned as search_rank.
 
         The endpoint has optional pagination. If pagination is used the
-        returned json also contains pagination data.
+        returned json also contains pagination data. Prefer keyset
+        pagination, i.e. `limit` and `cursor`, over `page`, which needs
+        to count all runs and gets slower the further the page is.
         """
-        parser = reqparse.RequestParser()
+        parser = get_keyset_pagination_parser()
         parser.add_argument("page", type=int, location="args")
         parser.add_argument("page_size", type=int, location="args")
         parser.add_argument("fuzzy_filter", type=str, location="args")
+        parser.add_argument(
+            "sort",
+            type=str,
+            location="args",
+            choices=("newest", "relevance"),
+            default="newest",
+        )
         args = parser.parse_args()
         page = args.page
         page_size = args.page_size
@@ -289,6 +475,30 @@ class PipelineRunsList(Resource):
             return {"message": "page must be >= 1."}, 400
         if page_size is not None and page_size <= 0:
             return {"message": "page_size must be >= 1."}, 400
+        if page is not None and args.limit is not None:
+            return {"message": "page and limit can't be used together."}, 400
+        if args.sort == "relevance" and args.fuzzy_filter is None:
+            return {"message": "Sorting by relevance requires a fuzzy_filter."}, 400
+
+        keys = [
+            models.NonInteractivePipelineRun.job_run_index,
+            models.NonInteractivePipelineRun.job_run_pipeline_run_index,
+        ]
+        try:
+            options, fields = get_projection(
+                models.NonInteractivePipelineRun,
+                schema.non_interactive_run,
+                args.fields,
+                keys,
+            )
+        except ValueError as e:
+            return {"message": str(e)}, 400
+        if fields is None:
+            options = [
+                noload(models.NonInteractivePipelineRun.pipeline_steps),
+                noload(models.NonInteractivePipelineRun.image_mappings),
+                undefer(models.NonInteractivePipelineRun.env_variables),
+            ]
 
         if not db.session.query(
             db.session.query(models.Job).filter_by(uuid=job_uuid).exists()
@@ -296,11 +506,7 @@ class PipelineRunsList(Resource):
             return {"message": "Job not found"}, 404
 
         job_runs_query = (
-            models.NonInteractivePipelineRun.query.options(
-                noload(models.NonInteractivePipelineRun.pipeline_steps),
-                noload(models.NonInteractivePipelineRun.image_mappings),
-                undefer(models.NonInteractivePipelineRun.env_variables),
-            )
+            models.NonInteractivePipelineRun.query.options(*options)
             .filter_by(
                 job_uuid=job_uuid,
             )
@@ -315,7 +521,21 @@ class PipelineRunsList(Resource):
                 job_runs_query,
                 args.fuzzy_filter,
             )
+        if args.sort == "relevance":
+            # The rank has to be computed for every matching run before
+            # the first page can be returned, contrary to the default
+            # order which is served by the index on the keys.
+            rank = get_fuzzy_filter_rank(args.fuzzy_filter)
+            job_runs_query = (
+                job_runs_query.options(
+                    with_expression(models.NonInteractivePipelineRun.search_rank, rank)
+                )
+                .order_by(None)
+                .order_by(desc(rank), *[desc(key) for key in keys])
+            )
+            keys = [rank.label("search_rank")] + keys
 
+        mask = get_listing_mask("pipeline_runs", fields)
         if args.page is not None and args.page_size is not None:
             job_runs_pagination = job_runs_query.paginate(
                 args.page, args.page_size, False
@@ -326,12 +546,39 @@ class PipelineRunsList(Resource):
                 marshal(
                     {"pipeline_runs": job_runs, "pagination_data": pagination_data},
                     schema.paginated_job_pipeline_runs,
+                    mask=mask,
+                ),
+                200,
+            )
+        elif args.limit is not None:
+            try:
+                job_runs, next_cursor = keyset_paginate(
+                    job_runs_query, keys, args.cursor, args.limit
+                )
+            except ValueError as e:
+                return {"message": str(e)}, 400
+
+            pagination_data = {"next_cursor": next_cursor}
+            if args.approximate_total:
+                pagination_data["approximate_total"] = get_approximate_count(
+                    job_runs_query
+                )
+            return (
+                marshal(
+                    {"pipeline_runs": job_runs, "pagination_data": pagination_data},
+                    schema.cursor_paginated_job_pipeline_runs,
+                    mask=mask,
                 ),
                 200,
             )
         else:
             job_runs = job_runs_query.all()
-            return marshal({"pipeline_runs": job_runs}, schema.job_pipeline_runs), 200
+            return (
+                marshal(
+                    {"pipeline_runs": job_runs}, schema.job_pipeline_runs, mask=mask
+                ),
+                200,
+            )
 
 
 @api.route(
@@ -538,159 +785,6 @@ class CronJobResume(Resource):
             return {"message": "Could not resume cron job."}, 409
 
 
-class DeleteNonRetainedJobPipelineRuns(TwoPhaseFunction):
-    """See max_retained_pipeline_runs in models.py for docs."""
-
-    def _transaction(self, job_uuid: str):
-        job = (
-            db.session.query(
-                models.Job.project_uuid,
-                models.Job.pipeline_uuid,
-                models.Job.max_retained_pipeline_runs,
-                models.Job.total_scheduled_pipeline_runs,
-            )
-            .filter_by(uuid=job_uuid)
-            .one()
-        )
-        self.collateral_kwargs["project_uuid"] = job.project_uuid
-        self.collateral_kwargs["pipeline_uuid"] = job.pipeline_uuid
-        self.collateral_kwargs["job_uuid"] = job_uuid
-        self.collateral_kwargs["pipeline_run_uuids"] = []
-
-        max_retained_pipeline_runs = job.max_retained_pipeline_runs
-        current_app.logger.info(
-            f"Deleting non retained runs for job {job_uuid}, max retained pipeline "
-            f"runs: {max_retained_pipeline_runs}."
-        )
-        if max_retained_pipeline_runs == -1:
-            current_app.logger.info("Nothing to do.")
-            return
-
-        runs_to_be_deleted = (
-            db.session.query(models.NonInteractivePipelineRun.uuid)
-            .filter(
-                models.NonInteractivePipelineRun.job_uuid == job_uuid,
-                # Only consider runs in an end state.
-                models.NonInteractivePipelineRun.status.in_(
-                    ["SUCCESS", "FAILURE", "ABORTED"]
-                ),
-                # Only get the runs that would be out of the threshold.
-                # NOTE: this means that a run with a run_index which is
-                # greater than the one considered and is in an end state
-                # won't be deleted in favour of keeping this deletion in
-                # order. This also means that deletion can be out of
-                # order for runs which have an index lower or equal if
-                # some are already completed.
-                models.NonInteractivePipelineRun.pipeline_run_index
-                # -1 because the field is incremented by one for every
-                # scheduled pipeline run, so pipeline run 0 would make
-                # this go to 1.
-                <= (job.total_scheduled_pipeline_runs - 1) - max_retained_pipeline_runs,
-            )
-            .all()
-        )
-        for run in runs_to_be_deleted:
-            current_app.logger.info(f"Issuing deletion of run {run.uuid}.")
-            self.collateral_kwargs["pipeline_run_uuids"].append(run.uuid)
-
-        batch_size = 500
-        for i in range(0, len(runs_to_be_deleted), batch_size):
-            batch = runs_to_be_deleted[i : i + batch_size]
-            batch_uuids = [run.uuid for run in batch]
-            models.NonInteractivePipelineRun.query.filter(
-                models.NonInteractivePipelineRun.uuid.in_(batch_uuids)
-            ).delete()
-
-    def _collateral(
-        self,
-        project_uuid: str,
-        pipeline_uuid: str,
-        job_uuid: str,
-        pipeline_run_uuids: List[str],
-    ):
-        celery = make_celery(current_app)
-
-        # Delete in batches to have a balance between the number of
-        # created tasks and the size of the celery job args. Googling a
-        # bit returns some sparse results on possible issues, so an
-        # uncapped args size would be risky.
-        batch_size = 30
-        for i in range(0, len(pipeline_run_uuids), batch_size):
-            batch = pipeline_run_uuids[i : i + batch_size]
-
-            celery_job_kwargs = {
-                "project_uuid": project_uuid,
-                "pipeline_uuid": pipeline_uuid,
-                "job_uuid": job_uuid,
-                "pipeline_run_uuids": batch,
-            }
-            task_args = {
-                "name": "app.core.tasks.delete_job_pipeline_run_directories",
-                "kwargs": celery_job_kwargs,
-                "task_id": str(uuid.uuid4()),
-            }
-            res = celery.send_task(**task_args)
-            res.forget()
-
-
-def _delete_non_retained_pipeline_runs(job_uuid: str) -> None:
-
-    job = (
-        db.session.query(
-            models.Job.max_retained_pipeline_runs,
-            models.Job.total_scheduled_pipeline_runs,
-        )
-        .filter_by(uuid=job_uuid)
-        .one()
-    )
-    max_retained_pipeline_runs = job.max_retained_pipeline_runs
-    current_app.logger.info(
-        f"Deleting non retained runs for job {job_uuid}, max retained pipeline "
-        f"runs: {max_retained_pipeline_runs}."
-    )
-    if max_retained_pipeline_runs < 0:
-        current_app.logger.info("Nothing to do.")
-        return
-
-    runs_to_be_deleted = (
-        db.session.query(models.NonInteractivePipelineRun.uuid)
-        .filter(
-            models.NonInteractivePipelineRun.job_uuid == job_uuid,
-            # Only consider runs in an end state.
-            models.NonInteractivePipelineRun.status.in_(
-                ["SUCCESS", "FAILURE", "ABORTED"]
-            ),
-            # Only get the runs that would be out of the threshold.
-            # NOTE: this means that a run with a run_index which is
-            # greater than the one considered and is in an end state
-            # won't be deleted in favour of keeping this deletion in
-            # order. This also means that deletion can be out of order
-            # for runs which have an index lower or equal if some are
-            # already completed.
-            models.NonInteractivePipelineRun.pipeline_run_index
-            # -1 because the field is incremented by one for every
-            # scheduled pipeline run, so pipeline run 0 would make this
-            # go to 1.
-            <= (job.total_scheduled_pipeline_runs - 1) - max_retained_pipeline_runs,
-        )
-        .all()
-    )
-
-    for run in runs_to_be_deleted:
-        current_app.logger.info(f"Deleting run {run.uuid}.")
-        path = f"/catch/api-proxy/api/jobs/cleanup/{job_uuid}/{run.uuid}"
-        base_url = f'{current_app.config["ORCHEST_WEBSERVER_ADDRESS"]}{path}'
-        resp = requests.delete(base_url)
-        # 404 because there could be concurrent calls to this.
-        if resp.status_code not in [200, 404]:
-            current_app.logger.error(
-                f"Unexpected status code ({resp.status_code}) while deleting run "
-                f"{run.uuid}."
-            )
-        else:
-            current_app.logger.info(f"Successfully deleted run {run.uuid}.")
-
-
 class RunJob(TwoPhaseFunction):
     """Start the pipeline runs related to a job"""
 
@@ -728,75 +822,87 @@ class RunJob(TwoPhaseFunction):
         # To be later used by the collateral effect function.
         tasks_to_launch = []
 
+        # The pipeline, i.e. the steps to run, is the same for every run
+        # of the job, only the parameters differ. Construct it once and
+        # derive the definition of each run from it by shallow copying
+        # the steps whose parameters are set, instead of deep copying
+        # and constructing the entire pipeline for every run.
+        pipeline_run_spec = dict(job.pipeline_run_spec)
+        pipeline_run_spec["pipeline_definition"] = job.pipeline_definition
+        base_pipeline_def = construct_pipeline(**pipeline_run_spec).to_dict()
+        base_steps = base_pipeline_def["steps"]
+
+        # Rows are inserted through executemany statements, see below.
+        runs = []
+        pipeline_steps = []
+
         # run_index is the index of the run within the runs of this job
         # scheduling/execution.
         for run_index, run_parameters in enumerate(job.parameters):
-            pipeline_def = copy.deepcopy(job.pipeline_definition)
-
-            # Set the pipeline parameters:
-            pipeline_def["parameters"] = run_parameters.get(
-                _config.PIPELINE_PARAMETERS_RESERVED_KEY, {}
-            )
-
-            # Set the steps parameters in the pipeline definition.
+            steps = dict(base_steps)
             for step_uuid, step_parameters in run_parameters.items():
-                # One of the entries is not actually a step_uuid.
-                if step_uuid != _config.PIPELINE_PARAMETERS_RESERVED_KEY:
-                    pipeline_def["steps"][step_uuid]["parameters"] = step_parameters
-
-            # Instantiate a pipeline object given the specs, definition
-            # and parameters.
-            pipeline_run_spec = copy.deepcopy(job.pipeline_run_spec)
-            pipeline_run_spec["pipeline_definition"] = pipeline_def
-            pipeline = construct_pipeline(**pipeline_run_spec)
+                # One of the entries is not actually a step_uuid. Steps
+                # outside of the run selection are not part of the
+                # pipeline.
+                if step_uuid in steps:
+                    steps[step_uuid] = {
+                        **steps[step_uuid],
+                        "parameters": step_parameters,
+                    }
+
+            pipeline_def = {
+                **base_pipeline_def,
+                "steps": steps,
+                "parameters": run_parameters.get(
+                    _config.PIPELINE_PARAMETERS_RESERVED_KEY, {}
+                ),
+            }
 
             # Specify the task_id beforehand to avoid race conditions
             # between the task and its presence in the db.
             task_id = str(uuid.uuid4())
-            tasks_to_launch.append((task_id, pipeline))
-
-            non_interactive_run = {
-                "job_uuid": job.uuid,
-                "uuid": task_id,
-                "pipeline_uuid": job.pipeline_uuid,
-                "project_uuid": job.project_uuid,
-                "status": "PENDING",
-                "parameters": run_parameters,
-                "parameters_text_search_values": list(run_parameters.values()),
-                "job_run_index": job.total_scheduled_executions,
-                "job_run_pipeline_run_index": run_index,
-                "pipeline_run_index": job.total_scheduled_pipeline_runs,
-                "env_variables": job.env_variables,
-            }
+            tasks_to_launch.append((task_id, pipeline_def))
+
+            runs.append(
+                {
+                    # Bulk inserts bypass the ORM, thus the polymorphic
+                    # identity needs to be set explicitly.
+                    "type": "NonInteractivePipelineRun",
+                    "job_uuid": job.uuid,
+                    "uuid": task_id,
+                    "pipeline_uuid": job.pipeline_uuid,
+                    "project_uuid": job.project_uuid,
+                    "status": "PENDING",
+                    "parameters": run_parameters,
+                    "parameters_text_search_values": list(run_parameters.values()),
+                    "job_run_index": job.total_scheduled_executions,
+                    "job_run_pipeline_run_index": run_index,
+                    "pipeline_run_index": job.total_scheduled_pipeline_runs,
+                    "env_variables": job.env_variables,
+                }
+            )
             job.total_scheduled_pipeline_runs += 1
 
-            db.session.add(models.NonInteractivePipelineRun(**non_interactive_run))
-            # Need to flush because otherwise the bulk insertion of
-            # pipeline steps will lead to foreign key errors.
-            # https://docs.sqlalchemy.org/en/13/orm/persistence_techniques.html#bulk-operations-caveats
-            db.session.flush()
-
             # TODO: this code is also in `namespace_runs`. Could
             #       potentially be put in a function for modularity.
             # Set an initial value for the status of the pipeline
             # steps that will be run.
-            step_uuids = [s.properties["uuid"] for s in pipeline.steps]
-            pipeline_steps = []
-            for step_uuid in step_uuids:
+            for step_uuid in steps:
                 pipeline_steps.append(
-                    models.PipelineRunStep(
-                        **{
-                            "run_uuid": task_id,
-                            "step_uuid": step_uuid,
-                            "status": "PENDING",
-                        }
-                    )
+                    {"run_uuid": task_id, "step_uuid": step_uuid, "status": "PENDING"}
                 )
-            db.session.bulk_save_objects(pipeline_steps)
+
+        # A single executemany per table instead of an INSERT (and
+        # flush) per run, the runs are inserted first so that the
+        # foreign keys of the steps are satisfied.
+        if runs:
+            db.session.execute(models.PipelineRun.__table__.insert(), runs)
+        if pipeline_steps:
+            db.session.execute(
+                models.PipelineRunStep.__table__.insert(), pipeline_steps
+            )
 
         job.total_scheduled_executions += 1
-        # Must run after total_scheduled_executions has been updated.
-        DeleteNonRetainedJobPipelineRuns(self.tpe).transaction(job.uuid)
 
         # Prepare data for _collateral.
         self.collateral_kwargs["job"] = job.as_dict()
@@ -816,38 +922,41 @@ class RunJob(TwoPhaseFunction):
         self,
         job: Dict[str, Any],
         run_config: Dict[str, Any],
-        tasks_to_launch: Tuple[str, Pipeline],
+        tasks_to_launch: List[Tuple[str, Dict[str, Any]]],
     ):
         # Safety check in case the job has no runs.
         if not tasks_to_launch:
             return
 
-        # Launch each task through celery.
+        # Launch each task through celery. All the messages are
+        # published through a single producer instead of acquiring a
+        # connection from the pool for every run.
         celery = make_celery(current_app)
 
-        for task_id, pipeline in tasks_to_launch:
-            celery_job_kwargs = {
-                "job_uuid": job["uuid"],
-                "project_uuid": job["project_uuid"],
-                "pipeline_definition": pipeline.to_dict(),
-                "run_config": run_config,
-            }
-
-            # Due to circular imports we use the task name instead of
-            # importing the function directly.
-            task_args = {
-                "name": "app.core.tasks.start_non_interactive_pipeline_run",
-                "kwargs": celery_job_kwargs,
-                "task_id": task_id,
-            }
-            res = celery.send_task(**task_args)
-            # NOTE: this is only if a backend is configured. The task
-            # does not return anything. Therefore we can forget its
-            # result and make sure that the Celery backend releases
-            # recourses (for storing and transmitting results)
-            # associated to the task. Uncomment the line below if
-            # applicable.
-            res.forget()
+        with celery.producer_or_acquire() as producer:
+            for task_id, pipeline_definition in tasks_to_launch:
+                celery_job_kwargs = {
+                    "job_uuid": job["uuid"],
+                    "project_uuid": job["project_uuid"],
+                    "pipeline_definition": pipeline_definition,
+                    "run_config": run_config,
+                }
+
+                # Due to circular imports we use the task name instead
+                # of importing the function directly.
+                task_args = {
+                    "name": "app.core.tasks.start_non_interactive_pipeline_run",
+                    "kwargs": celery_job_kwargs,
+                    "task_id": task_id,
+                    "producer": producer,
+                }
+                res = celery.send_task(**task_args)
+                # NOTE: this is only if a backend is configured. The
+                # task does not return anything. Therefore we can forget
+                # its result and make sure that the Celery backend
+                # releases recourses (for storing and transmitting
+                # results) associated to the task.
+                res.forget()
 
     def _revert(self):
         job = self.collateral_kwargs["job"]
@@ -1026,6 +1135,7 @@ class CreateJob(TwoPhaseFunction):
         # images to use will be retrieved through the JobImageMapping
         # model.
         lock_environment_images_for_job(job_uuid, project_uuid, environment_uuids)
+        notify_job_scheduler()
 
     def _revert(self):
         models.Job.query.filter_by(
@@ -1207,7 +1317,9 @@ class UpdateJob(TwoPhaseFunction):
                 job.status = "STARTED"
 
     def _collateral(self):
-        pass
+        # The next_scheduled_time or the status of the job might have
+        # changed.
+        notify_job_scheduler()
 
 
 class DeleteJob(TwoPhaseFunction):
@@ -1333,7 +1445,6 @@ class UpdateJobPipelineRun(TwoPhaseFunction):
                 .one()
             )
             self.collateral_kwargs["project_uuid"] = job.project_uuid
-            DeleteNonRetainedJobPipelineRuns(self.tpe).transaction(job_uuid)
 
             # Only non recurring jobs terminate to SUCCESS.
             if job.schedule is None:
@@ -1441,4 +1552,4 @@ class ResumeCronJob(TwoPhaseFunction):
         return str(job.next_scheduled_time)
 
     def _collateral(self):
-        pass
+        notify_job_scheduler()
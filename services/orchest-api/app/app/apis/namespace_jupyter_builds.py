@@ -12,7 +12,6 @@ from _orchest.internals.two_phase_executor import TwoPhaseExecutor, TwoPhaseFunc
 from app import schema
 from app.celery_app import make_celery
 from app.connections import db
-from app.errors import SessionInProgressException
 from app.utils import register_schema, update_status_db
 
 api = Namespace("jupyter-builds", description="Build Jupyter server image")
@@ -47,8 +46,6 @@ class JupyterBuildList(Resource):
         try:
             with TwoPhaseExecutor(db.session) as tpe:
                 jupyter_build = CreateJupyterBuild(tpe).transaction()
-        except SessionInProgressException:
-            return {"message": "SessionInProgressException"}, 500
         except Exception:
             jupyter_build = None
 
@@ -145,17 +142,9 @@ class MostRecentJupyterBuild(Resource):
 
 class CreateJupyterBuild(TwoPhaseFunction):
     def _transaction(self):
-        # Check if there are any active sessions
-        active_session_count = models.InteractiveSession.query.filter(
-            or_(
-                models.InteractiveSession.status == "LAUNCHING",
-                models.InteractiveSession.status == "RUNNING",
-                models.InteractiveSession.status == "STOPPING",
-            )
-        ).count()
-
-        if active_session_count > 0:
-            raise SessionInProgressException()
+        # Active sessions do not block the build, they keep using the
+        # image they were started with, sessions started after the
+        # build use the new image.
 
         # Abort any Jupyter build that is
         # already running, given by the status of PENDING/STARTED.
@@ -5,6 +5,7 @@ project, a good amount of other models depend on such a concept.
 """
 from flask import abort, current_app, request
 from flask_restx import Namespace, Resource
+from sqlalchemy import func
 from sqlalchemy.orm import undefer
 
 import app.models as models
@@ -51,6 +52,56 @@ class ProjectList(Resource):
         return project, 201
 
 
+@api.route("/overview")
+class ProjectsOverview(Resource):
+    @api.doc("get_projects_overview")
+    @api.marshal_with(schema.projects_overview)
+    def get(self):
+        """Returns the entity counts of all projects in one go.
+
+        Counts are aggregated by the database, one GROUP BY per entity,
+        instead of fetching all jobs and sessions to count them.
+        Pre-warmed sessions are not counted.
+        """
+        job_counts = (
+            db.session.query(
+                models.Job.project_uuid.label("project_uuid"),
+                func.count(models.Job.uuid).label("count"),
+            )
+            .group_by(models.Job.project_uuid)
+            .subquery()
+        )
+        session_counts = (
+            db.session.query(
+                models.InteractiveSession.project_uuid.label("project_uuid"),
+                func.count(models.InteractiveSession.pipeline_uuid).label("count"),
+            )
+            .filter(models.InteractiveSession.prewarmed_time.is_(None))
+            .group_by(models.InteractiveSession.project_uuid)
+            .subquery()
+        )
+
+        overview = (
+            db.session.query(
+                models.Project.uuid,
+                func.coalesce(job_counts.c.count, 0),
+                func.coalesce(session_counts.c.count, 0),
+            )
+            .outerjoin(job_counts, job_counts.c.project_uuid == models.Project.uuid)
+            .outerjoin(
+                session_counts, session_counts.c.project_uuid == models.Project.uuid
+            )
+            .all()
+        )
+
+        return {
+            "projects": [
+                {"uuid": uuid, "job_count": job_count, "session_count": session_count}
+                for uuid, job_count, session_count in overview
+            ]
+        }
+
+
 @api.route("/<string:project_uuid>")
 @api.param("project_uuid", "uuid of the project")
 class Project(Resource):
@@ -19,7 +19,12 @@ from app.celery_app import make_celery
 from app.connections import db
 from app.core.pipelines import Pipeline, construct_pipeline
 from app.utils import (
+    get_approximate_count,
+    get_keyset_pagination_parser,
+    get_listing_mask,
     get_proj_pip_env_variables,
+    get_projection,
+    keyset_paginate,
     lock_environment_images_for_run,
     register_schema,
     update_status_db,
@@ -31,16 +36,54 @@ api = register_schema(api)
 
 @api.route("/")
 class RunList(Resource):
-    @api.doc("get_runs")
-    @api.marshal_with(schema.interactive_runs)
+    @api.doc(
+        "get_runs",
+        params={
+            "limit": {
+                "description": (
+                    "Max number of runs to return, enables pagination, see "
+                    "pagination_data.next_cursor."
+                ),
+                "type": int,
+            },
+            "cursor": {
+                "description": "next_cursor of the previous page.",
+                "type": str,
+            },
+            "fields": {
+                "description": "Comma separated list of the fields to return.",
+                "type": str,
+            },
+            "approximate_total": {
+                "description": "Return an estimate of the total number of runs.",
+                "type": bool,
+            },
+        },
+    )
+    @api.response(200, "Success", schema.interactive_runs)
+    @api.response(200, "Success", schema.paginated_interactive_runs)
     def get(self):
         """Fetches all (interactive) pipeline runs.
 
         These pipeline runs are either pending, running or have already
         completed. Runs are ordered by started time descending.
+
+        The endpoint has optional keyset pagination, if `limit` is
+        passed the returned json also contains pagination data.
         """
+        args = get_keyset_pagination_parser().parse_args()
+        keys = [models.PipelineRun.started_time, models.PipelineRun.uuid]
+        try:
+            options, fields = get_projection(
+                models.InteractivePipelineRun,
+                schema.interactive_run,
+                args.fields,
+                keys,
+            )
+        except ValueError as e:
+            return {"message": str(e)}, 400
 
-        query = models.InteractivePipelineRun.query
+        query = models.InteractivePipelineRun.query.options(*options)
 
         # Ability to query a specific runs given the `pipeline_uuid` or
         # `project_uuid` through the URL (using `request.args`).
@@ -51,8 +94,45 @@ class RunList(Resource):
         elif "project_uuid" in request.args:
             query = query.filter_by(project_uuid=request.args.get("project_uuid"))
 
-        runs = query.order_by(nullslast(models.PipelineRun.started_time.desc())).all()
-        return {"runs": [run.__dict__ for run in runs]}, 200
+        mask = get_listing_mask("runs", fields)
+        if args.limit is None:
+            runs = query.order_by(
+                nullslast(models.PipelineRun.started_time.desc())
+            ).all()
+            return (
+                marshal(
+                    {"runs": [run.__dict__ for run in runs]},
+                    schema.interactive_runs,
+                    mask=mask,
+                ),
+                200,
+            )
+
+        try:
+            runs, next_cursor = keyset_paginate(
+                query,
+                keys,
+                args.cursor,
+                args.limit,
+                nulls_last=[models.PipelineRun.started_time],
+            )
+        except ValueError as e:
+            return {"message": str(e)}, 400
+
+        pagination_data = {"next_cursor": next_cursor}
+        if args.approximate_total:
+            pagination_data["approximate_total"] = get_approximate_count(query)
+        return (
+            marshal(
+                {
+                    "runs": [run.__dict__ for run in runs],
+                    "pagination_data": pagination_data,
+                },
+                schema.paginated_interactive_runs,
+                mask=mask,
+            ),
+            200,
+        )
 
     @api.doc("start_run")
     @api.expect(schema.interactive_run_spec)
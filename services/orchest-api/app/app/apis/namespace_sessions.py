@@ -1,11 +1,12 @@
 import time
-from typing import Any, Dict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
 
 from docker import errors
 from flask import request
 from flask.globals import current_app
 from flask_restx import Namespace, Resource, marshal
-from sqlalchemy import desc
+from sqlalchemy import func
 from sqlalchemy.orm import lazyload
 
 import app.models as models
@@ -15,9 +16,9 @@ from app import schema
 from app.apis.namespace_runs import AbortPipelineRun
 from app.connections import db, docker_client
 from app.core.sessions import InteractiveSession
-from app.errors import JupyterBuildInProgressException
 from app.utils import (
     get_env_uuids_to_docker_id_mappings,
+    invalidate_service_auth_cache,
     lock_environment_images_for_session,
     register_schema,
 )
@@ -44,14 +45,25 @@ class SessionList(Resource):
         elif "project_uuid" in request.args:
             query = query.filter_by(project_uuid=request.args.get("project_uuid"))
 
+        # Pre-warmed sessions are not shown to users until claimed,
+        # opening their pipeline has to lead to a POST claiming them.
+        if request.args.get("include_prewarmed", "false").lower() != "true":
+            query = query.filter(models.InteractiveSession.prewarmed_time.is_(None))
+
         sessions = query.all()
 
         return {"sessions": [session.as_dict() for session in sessions]}, 200
 
     @api.doc("launch_session")
     @api.expect(schema.session_config)
+    @api.response(200, "Pre-warmed session claimed")
+    @api.response(201, "Session launching")
     def post(self):
-        """Launches an interactive session."""
+        """Launches an interactive session.
+
+        If the pipeline has a pre-warmed session, see the `prewarm`
+        option, it is claimed instead.
+        """
         session_config = request.get_json()
 
         isess = models.InteractiveSession.query.filter_by(
@@ -59,13 +71,17 @@ class SessionList(Resource):
             pipeline_uuid=session_config["pipeline_uuid"],
         ).one_or_none()
         if isess is not None:
+            if not session_config.get("prewarm", False):
+                isess = _claim_prewarmed_session(
+                    session_config["project_uuid"], session_config["pipeline_uuid"]
+                )
+                if isess is not None:
+                    return marshal(isess.as_dict(), schema.session), 200
             return {"message": "Session already exists."}, 409
 
         try:
             with TwoPhaseExecutor(db.session) as tpe:
                 CreateInteractiveSession(tpe).transaction(session_config)
-        except JupyterBuildInProgressException:
-            return {"message": "JupyterBuildInProgress"}, 423
         except Exception as e:
             current_app.logger.error(e)
             return {"message": str(e)}, 500
@@ -84,6 +100,72 @@ class SessionList(Resource):
         return marshal(isess.as_dict(), schema.session), 201
 
 
+@api.route("/counts")
+class SessionCounts(Resource):
+    @api.doc("get_session_counts")
+    @api.marshal_with(schema.project_counts)
+    def get(self):
+        """Returns the number of sessions of every project.
+
+        Projects without sessions are not part of the response,
+        pre-warmed sessions are not counted.
+        """
+        counts = (
+            db.session.query(
+                models.InteractiveSession.project_uuid,
+                func.count(models.InteractiveSession.pipeline_uuid),
+            )
+            .filter(models.InteractiveSession.prewarmed_time.is_(None))
+            .group_by(models.InteractiveSession.project_uuid)
+        )
+        if "project_uuid" in request.args:
+            counts = counts.filter(
+                models.InteractiveSession.project_uuid == request.args["project_uuid"]
+            )
+
+        return {
+            "counts": [
+                {"project_uuid": project_uuid, "count": count}
+                for project_uuid, count in counts.all()
+            ]
+        }
+
+
+def _claim_prewarmed_session(
+    project_uuid: str, pipeline_uuid: str
+) -> Optional[models.InteractiveSession]:
+    """Claims the pre-warmed session of a pipeline, if any.
+
+    Returns:
+        The claimed session, None if the pipeline has no pre-warmed
+        session, e.g. because it has already been claimed or because it
+        is being reclaimed by the session pool.
+
+    """
+    # Locked to not race with the session pool stopping the session,
+    # which also locks the session before checking it is pre-warmed.
+    isess = (
+        models.InteractiveSession.query.options(
+            lazyload(models.InteractiveSession.image_mappings)
+        )
+        .with_for_update()
+        .populate_existing()
+        .filter_by(project_uuid=project_uuid, pipeline_uuid=pipeline_uuid)
+        .one_or_none()
+    )
+    if (
+        isess is None
+        or isess.prewarmed_time is None
+        or isess.status not in ["LAUNCHING", "RUNNING"]
+    ):
+        db.session.commit()
+        return None
+
+    isess.prewarmed_time = None
+    db.session.commit()
+    return isess
+
+
 @api.route("/<string:project_uuid>/<string:pipeline_uuid>")
 @api.param("project_uuid", "UUID of project")
 @api.param("pipeline_uuid", "UUID of pipeline")
@@ -143,19 +225,48 @@ class Session(Resource):
         return {"message": "Session restart was successful."}, 200
 
 
+@api.route("/<string:project_uuid>/<string:pipeline_uuid>/kernels")
+@api.param("project_uuid", "UUID of project")
+@api.param("pipeline_uuid", "UUID of pipeline")
+class SessionKernels(Resource):
+    @api.doc("report_session_kernels_activity")
+    @api.expect(schema.kernels_activity)
+    @api.response(200, "Kernels activity recorded")
+    @api.response(400, "Invalid kernels activity")
+    @api.response(404, "Session not found")
+    def put(self, project_uuid, pipeline_uuid):
+        """Reports whether the session has busy kernels.
+
+        Called by the session-sidecar when the activity of the kernels
+        changes and periodically, see utils.is_orchest_idle.
+        """
+        busy = (request.get_json(silent=True) or {}).get("busy")
+        if not isinstance(busy, bool):
+            return {"message": "'busy' must be a boolean."}, 400
+
+        n_updated = models.InteractiveSession.query.filter(
+            models.InteractiveSession.project_uuid == project_uuid,
+            models.InteractiveSession.pipeline_uuid == pipeline_uuid,
+        ).update(
+            {
+                "busy_kernels": busy,
+                "kernels_reported_time": datetime.now(timezone.utc),
+            },
+            synchronize_session=False,
+        )
+        db.session.commit()
+
+        if not n_updated:
+            return {"message": "Session not found."}, 404
+        return {"message": "Kernels activity recorded."}, 200
+
+
 class CreateInteractiveSession(TwoPhaseFunction):
     def _transaction(self, session_config: Dict[str, Any]):
 
-        # Gate check to see if there is a Jupyter lab build active
-        latest_jupyter_build = models.JupyterBuild.query.order_by(
-            desc(models.JupyterBuild.requested_time)
-        ).first()
-
-        if latest_jupyter_build is not None and latest_jupyter_build.status in [
-            "PENDING",
-            "STARTED",
-        ]:
-            raise JupyterBuildInProgressException()
+        # An ongoing JupyterLab build does not block the session, the
+        # session uses the current JupyterLab image, the build only
+        # moves the image name to the new image once done.
 
         # Make sure the service environments are there. This piece of
         # code needs to be there to reject a session post if the
@@ -191,6 +302,8 @@ class CreateInteractiveSession(TwoPhaseFunction):
             # have secrets removed.
             "user_services": session_config.get("services", {}),
         }
+        if session_config.get("prewarm", False):
+            interactive_session["prewarmed_time"] = datetime.now(timezone.utc)
         db.session.add(models.InteractiveSession(**interactive_session))
 
         self.collateral_kwargs["session_config"] = session_config
@@ -199,6 +312,12 @@ class CreateInteractiveSession(TwoPhaseFunction):
     def _background_session_start(cls, app, session_config: Dict[str, Any]):
 
         with app.app_context():
+            # The auth-server might have cached that the services of the
+            # session do not exist, or the services of a previous
+            # session of the pipeline.
+            invalidate_service_auth_cache(
+                app, session_config["project_uuid"], session_config["pipeline_uuid"]
+            )
             try:
                 project_uuid = session_config["project_uuid"]
                 pipeline_uuid = session_config["pipeline_uuid"]
@@ -248,6 +367,7 @@ class CreateInteractiveSession(TwoPhaseFunction):
                 session_entry.container_ids = session.get_container_IDs()
                 session_entry.jupyter_server_ip = IP.jupyter_server
                 session_entry.notebook_server_info = session.notebook_server_info
+                session_entry.launch_timings = session.launch_timings
 
                 # Do not overwrite the STOPPING status if the session is
                 # stopping.
@@ -300,6 +420,7 @@ class StopInteractiveSession(TwoPhaseFunction):
         self,
         project_uuid: str,
         pipeline_uuid: str,
+        prewarmed_only: bool = False,
     ):
 
         # The with for update is to avoid a race condition where
@@ -316,6 +437,10 @@ class StopInteractiveSession(TwoPhaseFunction):
             .filter_by(project_uuid=project_uuid, pipeline_uuid=pipeline_uuid)
             .one_or_none()
         )
+        # Checked after locking, the session might have been claimed
+        # in the meantime.
+        if session is not None and prewarmed_only and session.prewarmed_time is None:
+            session = None
         if session is None:
             self.collateral_kwargs["project_uuid"] = None
             self.collateral_kwargs["pipeline_uuid"] = None
@@ -423,6 +548,8 @@ class StopInteractiveSession(TwoPhaseFunction):
                 db.session.delete(session)
                 db.session.commit()
 
+            invalidate_service_auth_cache(app, project_uuid, pipeline_uuid)
+
     def _collateral(
         self,
         project_uuid: str,
@@ -1,6 +1,13 @@
+import fcntl
+import hashlib
+import io
 import json
 import logging
+import os
+import tarfile
+import threading
 import time
+from typing import Dict, Iterable, Iterator
 
 import docker
 
@@ -10,6 +17,103 @@ from app import utils
 from app.connections import docker_client
 
 __DOCKERFILE_RESERVED_FLAG = "_ORCHEST_RESERVED_FLAG_"
+__BUILD_CONTEXT_CHUNK_SIZE = 1024 * 1024
+__BASE_IMAGE_PULL_LOCKS_DIRECTORY = "/tmp/base_image_pull_locks"
+
+
+def pull_base_image(base_image: str, refresh: bool = False) -> None:
+    """Pulls a base image, unless it is already present.
+
+    Builds run in parallel in different processes of the builds worker.
+    Builds sharing a base image that is not present would all pull it
+    as part of the build, instead, the first build to get to this point
+    pulls the image while holding a lock specific to the image, the
+    other builds wait for the lock and then find the image locally.
+
+    Args:
+        base_image: Name of the image, optionally with a tag.
+        refresh: If True, the image is pulled even if present, to get
+            the latest version of its tag.
+
+    Raises:
+        docker.errors.APIError if the pull failed.
+
+    """
+    os.makedirs(__BASE_IMAGE_PULL_LOCKS_DIRECTORY, exist_ok=True)
+    lock_path = os.path.join(
+        __BASE_IMAGE_PULL_LOCKS_DIRECTORY,
+        hashlib.sha256(base_image.encode()).hexdigest(),
+    )
+    with open(lock_path, "w") as lock_file:
+        # Released when the file is closed.
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        if not refresh:
+            try:
+                docker_client.images.get(base_image)
+                return
+            except docker.errors.ImageNotFound:
+                pass
+
+        repository, tag = docker.utils.parse_repository_tag(base_image)
+        # Without a tag all tags of the repository would be pulled.
+        docker_client.images.pull(repository, tag=tag or "latest")
+
+
+def stream_build_context(
+    context_path: str, files: Iterable[str], extra_files: Dict[str, str]
+) -> Iterator[bytes]:
+    """Streams a docker build context as an uncompressed tar.
+
+    The tar is written by a thread to a pipe while being read, so that
+    neither a copy of the context nor the tar are ever written to disk
+    or kept in memory.
+
+    Args:
+        context_path: Directory the files are relative to.
+        files: Paths, relative to context_path, to add to the context.
+            Directories are not added recursively.
+        extra_files: Mapping from a path in the context to the content
+            of the file, e.g. to add a Dockerfile.
+
+    Yields:
+        Chunks of the tar archive.
+
+    """
+    read_fd, write_fd = os.pipe()
+
+    def write_tar():
+        try:
+            with os.fdopen(write_fd, "wb") as write_fo:
+                with tarfile.open(fileobj=write_fo, mode="w|") as tar:
+                    for path in files:
+                        full_path = os.path.join(context_path, path)
+                        info = tar.gettarinfo(full_path, arcname=path)
+                        # E.g. sockets.
+                        if info is None:
+                            continue
+                        if info.isfile():
+                            with open(full_path, "rb") as f:
+                                tar.addfile(info, f)
+                        else:
+                            tar.addfile(info)
+
+                    for path, content in extra_files.items():
+                        content = content.encode("utf-8")
+                        info = tarfile.TarInfo(path)
+                        info.size = len(content)
+                        info.mode = 0o644
+                        tar.addfile(info, io.BytesIO(content))
+        # The reading end will get a truncated tar, making the build
+        # fail.
+        except Exception as e:
+            logging.error(f"Failed to stream the build context: {e}")
+
+    writer = threading.Thread(target=write_tar, daemon=True)
+    writer.start()
+    with os.fdopen(read_fd, "rb") as read_fo:
+        for chunk in iter(lambda: read_fo.read(__BUILD_CONTEXT_CHUNK_SIZE), b""):
+            yield chunk
+    writer.join()
 
 
 def build_docker_image(
@@ -18,6 +122,7 @@ def build_docker_image(
     dockerfile_path,
     user_logs_file_object,
     complete_logs_path,
+    use_cache=False,
 ):
     """Build a docker image with the given tag, context_path and docker
         file.
@@ -30,6 +135,9 @@ def build_docker_image(
             script are written.
         complete_logs_path: path to where to store the full logs are
             written.
+        use_cache: If True, layers of previous builds are reused, and
+            the image currently tagged as `image_name`, if any, is used
+            as cache source.
 
     Returns:
 
@@ -52,18 +160,52 @@ def build_docker_image(
                     "Pulling image...\n"
                 )
             )
+            try:
+                pull_base_image(build_context["base_image"])
+            # The build will try to pull the image itself, failing with
+            # a meaningful error if the image does not exist.
+            except Exception as e:
+                complete_logs_file_object.write(f"Failed to pull the base image: {e}\n")
         except Exception:
             complete_logs_file_object.write(
                 "docker_client.images.get() call to Docker API failed."
             )
 
-        # connect to docker and issue the build
+        cache_from = None
+        if use_cache:
+            # When cache_from is set, the daemon only trusts cached
+            # layers that are part of the given images. Do not set it if
+            # there is no previous image, so that the local layers are
+            # still considered.
+            try:
+                docker_client.images.get(image_name)
+                cache_from = [image_name]
+            except docker.errors.ImageNotFound:
+                pass
+            except Exception:
+                complete_logs_file_object.write(
+                    "docker_client.images.get() call to Docker API failed."
+                )
+
+        # connect to docker and issue the build, only the needed files
+        # are sent, streamed from where they are.
         generator = docker_client.api.build(
-            path=build_context["snapshot_path"],
+            path=None,
+            fileobj=stream_build_context(
+                build_context["context_path"],
+                build_context["context_files"],
+                build_context.get("extra_files", {}),
+            ),
+            custom_context=True,
             dockerfile=dockerfile_path,
             tag=image_name,
             rm=True,
-            nocache=True,
+            # Intermediate containers are otherwise left behind by
+            # failed builds, and, when making use of the cache, they are
+            # not labeled with the task uuid used for cleanups.
+            forcerm=True,
+            nocache=not use_cache,
+            cache_from=cache_from,
             container_limits={"cpushares": _config.USER_CONTAINERS_CPU_SHARES},
         )
 
@@ -129,25 +271,40 @@ def build_docker_image(
 
             return "FAILURE"
 
+        # The step running the user script has been skipped.
+        if use_cache and not found_beginning_flag:
+            user_logs_file_object.write(
+                "Nothing changed since the previous build, reusing its result.\n"
+            )
+
         return "SUCCESS"
 
 
-def cleanup_docker_artifacts(filters):
+def cleanup_docker_artifacts(filters, container_filters=None):
     """Cleanup container(s) and images given filters.
 
     Args:
         filters:
+        container_filters: If passed, used instead of `filters` to
+            select the containers to cleanup.
 
     Returns:
 
     """
+    if container_filters is None:
+        container_filters = filters
+
     # Actually we are just looking for a single container, but the
     # syntax is the same as looking for N.
-    containers_to_prune = docker_client.containers.list(filters=filters, all=True)
+    containers_to_prune = docker_client.containers.list(
+        filters=container_filters, all=True
+    )
     tries = 0
     while containers_to_prune:
-        docker_client.containers.prune(filters=filters)
-        containers_to_prune = docker_client.containers.list(filters=filters, all=True)
+        docker_client.containers.prune(filters=container_filters)
+        containers_to_prune = docker_client.containers.list(
+            filters=container_filters, all=True
+        )
         # Be as responsive as possible, only sleep at the first
         # iteration if necessary.
         if containers_to_prune:
@@ -209,9 +366,7 @@ def delete_project_environment_dangling_images(project_uuid, environment_uuid):
     }
 
     project_env_images = docker_images_list_safe(docker_client, filters=filters)
-
-    for docker_img in project_env_images:
-        utils.remove_if_dangling(docker_img)
+    _remove_dangling_images(project_env_images)
 
 
 def delete_project_dangling_images(project_uuid):
@@ -233,6 +388,15 @@ def delete_project_dangling_images(project_uuid):
     }
 
     project_images = docker_images_list_safe(docker_client, filters=filters)
+    _remove_dangling_images(project_images)
+
+
+def _remove_dangling_images(images) -> None:
+    nameless_images = [img for img in images if len(img.attrs["RepoTags"]) == 0]
+    if not nameless_images:
+        return
 
-    for docker_img in project_images:
-        utils.remove_if_dangling(docker_img)
+    # A single query for all images, instead of one per image.
+    images_in_use = utils.get_docker_images_in_use(img.id for img in nameless_images)
+    for docker_img in nameless_images:
+        utils.remove_if_dangling(docker_img, images_in_use)
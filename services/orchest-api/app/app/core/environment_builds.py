@@ -1,13 +1,16 @@
+import hashlib
 import json
 import logging
 import os
+import shlex
 import signal
 import time
 from datetime import datetime
-from typing import Any
+from typing import Any, List, Set
 
 import requests
 from celery.contrib.abortable import AbortableAsyncResult
+from docker.utils import build as docker_build_utils
 
 from _orchest.internals import config as _config
 from app.core.docker_utils import build_docker_image, cleanup_docker_artifacts
@@ -16,6 +19,7 @@ from config import CONFIG_CLASS
 
 __DOCKERFILE_RESERVED_FLAG = "_ORCHEST_RESERVED_FLAG_"
 __ENV_BUILD_FULL_LOGS_DIRECTORY = "/tmp/environment_builds_logs"
+__ENV_SETUP_SCRIPT_NAME = "._orchest_env_setup_script.sh"
 
 
 def update_environment_build_status(
@@ -39,15 +43,122 @@ def update_environment_build_status(
         return response.json()
 
 
-def write_environment_dockerfile(
-    base_image, task_uuid, project_uuid, env_uuid, work_dir, bash_script, flag, path
-):
-    """Write a custom dockerfile with the given specifications.
+def get_setup_script_dependencies(bash_script_path, context_files) -> List[str]:
+    """Returns the paths of the context referenced by the setup script.
+
+    A path is considered to be referenced if it appears as a word of the
+    script, e.g. `pip install -r requirements.txt` references
+    "requirements.txt". This does not capture paths that are built
+    dynamically, e.g. by variable expansion, or referenced by other
+    scripts, which is why referencing a directory, e.g. ".", will lead
+    to the entire directory to be considered.
+
+    Args:
+        bash_script_path: Path to the setup script.
+        context_files: Set of paths, relative to the build context,
+            that are part of the context. Referenced paths are relative
+            to the context.
+
+    Returns:
+        A sorted list of normalized paths relative to the context.
+
+    """
+    with open(bash_script_path) as f:
+        script = f.read()
+
+    words = []
+    for line in script.splitlines():
+        try:
+            words.extend(shlex.split(line, comments=True))
+        except ValueError:
+            # E.g. unbalanced quotes because of multi line strings.
+            words.extend(line.split())
+
+    dependencies = set()
+    for word in words:
+        # E.g. --requirement=requirements.txt.
+        word = word.split("=", 1)[-1]
+        if not word or os.path.isabs(word):
+            continue
+        path = os.path.normpath(word)
+        if path == "." or path in context_files:
+            dependencies.add(path)
+
+    # No need to copy paths that are already within another path.
+    if "." in dependencies:
+        return ["."]
+    return sorted(
+        p
+        for p in dependencies
+        if not any(p.startswith(f"{other}/") for other in dependencies)
+    )
+
+
+def get_setup_hash(bash_script_path, context_path, context_files, dependencies) -> str:
+    """Hashes the setup script and the files it references."""
+    hasher = hashlib.sha256()
+
+    with open(bash_script_path, "rb") as f:
+        hasher.update(f.read())
+
+    for path in sorted(context_files):
+        if not any(
+            dep == "." or path == dep or path.startswith(f"{dep}/")
+            for dep in dependencies
+        ):
+            continue
+        full_path = os.path.join(context_path, path)
+        if not os.path.isfile(full_path):
+            continue
+        hasher.update(path.encode())
+        with open(full_path, "rb") as f:
+            for chunk in iter(lambda: f.read(65536), b""):
+                hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def get_build_context_files(context_path, ignore_patterns) -> Set[str]:
+    """Returns the paths of a directory that are part of the context.
+
+    Args:
+        context_path: Directory to use as build context.
+        ignore_patterns: .dockerignore patterns of paths to exclude.
+
+    Returns:
+        A set of paths, both files and directories, relative to
+        context_path.
+
+    """
+    return set(
+        os.path.normpath(path)
+        for path in docker_build_utils.exclude_paths(context_path, ignore_patterns)
+    )
+
+
+def get_environment_dockerfile(
+    base_image,
+    task_uuid,
+    project_uuid,
+    env_uuid,
+    work_dir,
+    bash_script,
+    flag,
+    dependencies,
+    setup_hash,
+) -> str:
+    """Returns a custom dockerfile with the given specifications.
 
     This dockerfile is built in an ad-hoc way to later be able to only
     log messages related to the user script. Note that the produced
     dockerfile will make it so that the entire context is copied.
 
+    The dockerfile is layered so that the build cache can be used: the
+    user script, and the files it references, are copied and run before
+    anything that changes at every build, e.g. the task uuid label and
+    the rest of the project. This way the expensive step of running the
+    user script is skipped if the script and its dependencies did not
+    change since the last build.
+
     Args:
         base_image: Base image of the docker file.
         task_uuid:
@@ -57,30 +168,33 @@ def write_environment_dockerfile(
         bash_script: Script to run in a RUN command.
         flag: Flag to use to be able to differentiate between logs of
             the bash_script and logs to be ignored.
-        path: Where to save the file.
+        dependencies: Paths of the context referenced by the script,
+            see get_setup_script_dependencies.
+        setup_hash: Hash of the script and its dependencies.
 
     Returns:
+        The content of the dockerfile.
 
     """
+    work_dir = os.path.join("/", work_dir)
     statements = []
     statements.append(f"FROM {base_image}")
     # These labels are coupled with the logic that marks environment
     # images for removal on update and the deletion of said stale
     # images.
-    # The task uuid is applied first so that if a build is aborted early
-    # any produced artifact will at least have this label and will thus
-    # "searchable" through this label, e.g for cleanups.
-    statements.append(f"LABEL _orchest_env_build_task_uuid={task_uuid}")
     statements.append("LABEL _orchest_env_build_is_intermediate=1")
     statements.append(f"LABEL _orchest_project_uuid={project_uuid}")
     statements.append(f"LABEL _orchest_environment_uuid={env_uuid}")
-
-    # Copy the entire context, that is, given the current use case, that
-    # we are copying the project directory (from the snapshot) into the
-    # docker image that is to be built, this allows the user defined
-    # script defined through orchest to make use of files that are part
-    # of its project, e.g. a requirements.txt or other scripts.
-    statements.append(f"COPY . \"{os.path.join('/', work_dir)}\"")
+    statements.append(f"LABEL _orchest_env_setup_hash={setup_hash}")
+
+    # Copy the files the script depends on, e.g. a requirements.txt or
+    # other scripts, so that the user defined script defined through
+    # orchest can make use of files that are part of its project.
+    for dependency in [*dependencies, bash_script]:
+        statements.append(
+            "COPY "
+            + json.dumps([dependency, os.path.normpath(f"{work_dir}/{dependency}")])
+        )
 
     # Permission statements.
     ps = [
@@ -103,28 +217,43 @@ def write_environment_dockerfile(
     # as it should. The bash script is removed so that the user won't
     # be able to see it after the build is done.
     rm_statement = (
-        f"&& (if [ $(id -u) = 0 ]; then rm {bash_script}; else "
-        f"sudo rm {bash_script}; fi)"
+        f"&& (if [ $(id -u) = 0 ]; then rm -f {bash_script}; else "
+        f"sudo rm -f {bash_script}; fi)"
+    )
+    permissions_statement = (
+        f'((if [ $(id -u) = 0 ]; then {ps}; else {sps}; fi) || ! echo "{msg}")'
     )
 
     statements.append(
-        f'RUN cd "{os.path.join("/", work_dir)}" '
+        f'RUN cd "{work_dir}" '
         f'&& echo "{flag}" '
         # The ! in front of echo is there so that the script will fail
         # since the statements in the "if" have failed, the echo is a
         # way of injecting the help message.
-        f'&& ((if [ $(id -u) = 0 ]; then {ps}; else {sps}; fi) || ! echo "{msg}") '
+        f"&& {permissions_statement} "
         f"&& bash {bash_script} "
         # Needed to inject the rm statement this way, black was
         # introducing an error.
         f'&& echo "{flag}" {rm_statement}'
     )
-    statements.append("LABEL _orchest_env_build_is_intermediate=0")
 
-    statements = "\n".join(statements)
+    # The task uuid is applied before any step that cannot be cached, so
+    # that if a build is aborted any produced artifact will at least
+    # have this label and will thus "searchable" through this label, e.g
+    # for cleanups.
+    statements.append(f"LABEL _orchest_env_build_task_uuid={task_uuid}")
 
-    with open(path, "w") as dockerfile:
-        dockerfile.write(statements)
+    # Copy the entire context, that is, given the current use case, that
+    # we are copying the project directory (from the snapshot) into the
+    # docker image that is to be built, e.g. for environments that are
+    # used as services without mounting the project directory.
+    statements.append(f'COPY . "{work_dir}"')
+    statements.append(
+        f'RUN cd "{work_dir}" && {permissions_statement} {rm_statement}'
+    )
+    statements.append("LABEL _orchest_env_build_is_intermediate=0")
+
+    return "\n".join(statements)
 
 
 def check_environment_correctness(project_uuid, environment_uuid, project_path):
@@ -186,12 +315,17 @@ def check_environment_correctness(project_uuid, environment_uuid, project_path):
 def prepare_build_context(task_uuid, project_uuid, environment_uuid, project_path):
     """Prepares the docker build context for a given environment.
 
-    Prepares the docker build context by taking a snapshot of the
-    project directory, and using this snapshot as a context in which the
-    ad-hoc docker file will be placed. This dockerfile is built in a way
-    to respect the environment properties (base image, user bash script,
-    etc.) while also allowing to log only the messages that are related
-    to the user script while building the docker image.
+    Prepares the docker build context by selecting the files of the
+    project directory to send to the docker daemon, together with an
+    ad-hoc docker file. This dockerfile is built in a way to respect the
+    environment properties (base image, user bash script, etc.) while
+    also allowing to log only the messages that are related to the user
+    script while building the docker image.
+
+    No copy of the project is made, the files are streamed from the
+    project directory when building, see `stream_build_context`. Paths
+    matching the patterns of the project .dockerignore, if any, are not
+    part of the context, same as the ".orchest" directory.
 
     Args:
         task_uuid:
@@ -200,62 +334,73 @@ def prepare_build_context(task_uuid, project_uuid, environment_uuid, project_pat
         project_path:
 
     Returns:
-        Path to the prepared context.
+        The build context, see `build_docker_image`.
 
     Raises:
         See the check_environment_correctness_function
     """
-    dockerfile_name = task_uuid
     # the project path we receive is relative to the projects directory
     userdir_project_path = os.path.join("/userdir/projects", project_path)
 
     # sanity checks, if not respected exception will be raised
     check_environment_correctness(project_uuid, environment_uuid, userdir_project_path)
 
-    # make a snapshot of the project state
-    snapshot_path = f"/tmp/{dockerfile_name}"
-    os.system('rm -rf "%s"' % snapshot_path)
-    os.system('cp -R "%s" "%s"' % (userdir_project_path, snapshot_path))
-    # take the environment from the snapshot
     environment_path = os.path.join(
-        snapshot_path, f".orchest/environments/{environment_uuid}"
+        userdir_project_path, f".orchest/environments/{environment_uuid}"
     )
 
-    # build the docker file and move it to the context
-    with open(os.path.join(environment_path, "properties.json")) as json_file:
-        environment_properties = json.load(json_file)
-
-        # use the task_uuid to avoid clashing with user stuff
-        docker_file_name = dockerfile_name
-        bash_script_name = f".{dockerfile_name}.sh"
-        write_environment_dockerfile(
-            environment_properties["base_image"],
-            task_uuid,
-            project_uuid,
-            environment_uuid,
-            _config.PROJECT_DIR,
-            bash_script_name,
-            __DOCKERFILE_RESERVED_FLAG,
-            os.path.join(snapshot_path, docker_file_name),
-        )
+    # use the task_uuid to avoid clashing with user stuff
+    docker_file_name = task_uuid
+    # Not task specific so that the layers running it can be cached.
+    bash_script_name = __ENV_SETUP_SCRIPT_NAME
 
-        # move the startup script to the context
-        os.system(
-            'cp "%s" "%s"'
-            % (
-                os.path.join(environment_path, _config.ENV_SETUP_SCRIPT_FILE_NAME),
-                os.path.join(snapshot_path, bash_script_name),
+    # hide stuff from the user
+    ignore_patterns = [".dockerignore", ".orchest", docker_file_name, bash_script_name]
+    user_docker_ignore = os.path.join(userdir_project_path, ".dockerignore")
+    if os.path.isfile(user_docker_ignore):
+        with open(user_docker_ignore) as f:
+            ignore_patterns.extend(
+                line.strip()
+                for line in f
+                if line.strip() and not line.startswith("#")
             )
-        )
+    context_files = get_build_context_files(userdir_project_path, ignore_patterns)
 
-    # hide stuff from the user
-    with open(os.path.join(snapshot_path, ".dockerignore"), "w") as docker_ignore:
-        docker_ignore.write(".dockerignore\n")
-        docker_ignore.write(".orchest\n")
-        docker_ignore.write("%s\n" % docker_file_name)
+    with open(os.path.join(environment_path, "properties.json")) as json_file:
+        environment_properties = json.load(json_file)
+
+    bash_script_path = os.path.join(
+        environment_path, _config.ENV_SETUP_SCRIPT_FILE_NAME
+    )
+    with open(bash_script_path) as f:
+        bash_script = f.read()
+
+    dependencies = get_setup_script_dependencies(bash_script_path, context_files)
+    dockerfile = get_environment_dockerfile(
+        environment_properties["base_image"],
+        task_uuid,
+        project_uuid,
+        environment_uuid,
+        _config.PROJECT_DIR,
+        bash_script_name,
+        __DOCKERFILE_RESERVED_FLAG,
+        dependencies,
+        get_setup_hash(
+            bash_script_path, userdir_project_path, context_files, dependencies
+        ),
+    )
 
     return {
-        "snapshot_path": snapshot_path,
+        "context_path": userdir_project_path,
+        "context_files": sorted(context_files),
+        "extra_files": {
+            docker_file_name: dockerfile,
+            bash_script_name: bash_script,
+            # Keeps the dockerfile out of the `COPY .` of the image, the
+            # bash script is needed by an earlier COPY and is removed
+            # once run instead.
+            ".dockerignore": "\n".join([".dockerignore", docker_file_name]),
+        },
         "base_image": environment_properties["base_image"],
     }
 
@@ -281,8 +426,8 @@ def build_environment_task(task_uuid, project_uuid, environment_uuid, project_pa
         try:
             update_environment_build_status("STARTED", session, task_uuid)
 
-            # Prepare the project snapshot with the correctly placed
-            # dockerfile, scripts, etc.
+            # Select the files of the project to send to the daemon,
+            # together with the dockerfile, scripts, etc.
             build_context = prepare_build_context(
                 task_uuid, project_uuid, environment_uuid, project_path
             )
@@ -307,6 +452,7 @@ def build_environment_task(task_uuid, project_uuid, environment_uuid, project_pa
                     task_uuid,
                     user_logs_fo,
                     complete_logs_path,
+                    use_cache=CONFIG_CLASS.ENVIRONMENT_BUILD_CACHE,
                 ),
                 identity=f"{project_uuid}-{environment_uuid}",
                 server=_config.ORCHEST_SOCKETIO_SERVER_ADDRESS,
@@ -319,9 +465,6 @@ def build_environment_task(task_uuid, project_uuid, environment_uuid, project_pa
                 abort_lambda=lambda: AbortableAsyncResult(task_uuid).is_aborted(),
             )
 
-            # cleanup
-            os.system('rm -rf "%s"' % build_context["snapshot_path"])
-
             update_environment_build_status(status, session, task_uuid)
 
         # Catch all exceptions because we need to make sure to set the
@@ -354,11 +497,24 @@ def build_environment_task(task_uuid, project_uuid, environment_uuid, project_pa
             # cleanable. I've opted for this solution to save time since
             # we might be moving to a different containerization
             # backend.
+            # Intermediate containers of the steps preceding the task
+            # uuid label, i.e. of the cacheable steps, can only be found
+            # through the environment. Builds of the same environment
+            # are not concurrent, since starting a build aborts the
+            # previous one.
+            container_filters = {
+                "label": [
+                    "_orchest_env_build_is_intermediate=1",
+                    f"_orchest_project_uuid={project_uuid}",
+                    f"_orchest_environment_uuid={environment_uuid}",
+                ]
+            }
+
             if os.fork() == 0:
                 for _ in range(10):
                     time.sleep(0.5)
                     try:
-                        cleanup_docker_artifacts(filters)
+                        cleanup_docker_artifacts(filters, container_filters)
                     except Exception as e:
                         logging.error(e)
                 # To avoid running any celery code that would run once
@@ -0,0 +1,225 @@
+"""In-memory index of the docker ids of images, by image name.
+
+Resolving the images of the environments of a pipeline, e.g. to
+validate a job or to lock the images used by a run, would otherwise
+inspect every image through the docker daemon, and locking does so at
+least twice, see `utils.lock_environment_images_for_run`.
+
+The index is built by listing the images once and is then kept current
+by the watcher, which subscribes to the image events of the docker
+daemon (tag, untag, delete, pull, ...). Lookups are memory reads, names
+that are not in the index are looked up through the daemon by the
+callers, so that an image that has just been built is never reported as
+missing because its tag event has not been processed yet.
+
+Every processed event advances the watermark of the index, i.e. the
+time of the last event the index reflects. Events are delivered in
+order, hence, if there are no events concerning a set of images after
+the watermark, the daemon agrees with what was read from the index, see
+`changed_since`. This is how image locking confirms the docker ids it
+has committed without inspecting the images again.
+
+The index is kept in memory, the orchest-api runs a single gunicorn
+worker. When the watcher is not connected to the daemon the index is
+empty and has no watermark, callers then fall back to the daemon.
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+import docker
+
+from app.connections import docker_client
+
+_EVENTS_FILTERS = {"type": "image"}
+
+_index_lock = threading.Lock()
+# Image name, "<repository>:<tag>" -> docker id of the image.
+_index: Dict[str, str] = {}
+# Time, in ns, of the last event reflected by the index, None if the
+# watcher is not connected.
+_watermark: Optional[int] = None
+
+
+def _normalize_name(name: str) -> str:
+    repository, tag = docker.utils.parse_repository_tag(name)
+    return f"{repository}:{tag or 'latest'}"
+
+
+def _to_docker_timestamp(time_ns: int) -> str:
+    # The daemon accepts "<seconds>.<nanoseconds>", ints passed to
+    # docker-py would only give a resolution of seconds.
+    return f"{time_ns // 10 ** 9}.{time_ns % 10 ** 9:09d}"
+
+
+def get_image_id(name: str) -> Optional[str]:
+    """Returns the docker id of an image according to the index.
+
+    Returns:
+        The docker id of the image, None if the image is not in the
+        index or the index is not available, in which case the daemon
+        should be queried.
+
+    """
+    with _index_lock:
+        if _watermark is None:
+            return None
+        return _index.get(_normalize_name(name))
+
+
+def get_watermark() -> Optional[int]:
+    """Returns the time of the last event reflected by the index.
+
+    Must be read before looking up the images, so that the events
+    happening during the lookups are taken into account by
+    `changed_since`.
+
+    Returns:
+        The time, in ns, None if the index is not available.
+
+    """
+    with _index_lock:
+        return _watermark
+
+
+def _is_event_about(
+    event: Dict[str, Any], names: Iterable[str], image_ids: Iterable[str]
+) -> bool:
+    actor = event.get("Actor", {})
+    name = actor.get("Attributes", {}).get("name")
+    return actor.get("ID") in image_ids or (
+        name is not None and _normalize_name(name) in names
+    )
+
+
+def changed_since(
+    watermark: int, names: Iterable[str], image_ids: Iterable[str]
+) -> bool:
+    """Tells if any of the given images might have changed.
+
+    Queries the events of the daemon that happened after the watermark,
+    which is a single call regardless of the number of images.
+
+    Args:
+        watermark: As returned by `get_watermark` before the images were
+            looked up.
+        names: Names of the images that were looked up.
+        image_ids: Docker ids the images resolved to.
+
+    Returns:
+        True if there has been an event concerning the images after the
+        watermark, or if the events could not be queried.
+
+    """
+    names = {_normalize_name(name) for name in names}
+    image_ids = set(image_ids)
+    try:
+        events = docker_client.api.events(
+            since=_to_docker_timestamp(watermark + 1),
+            until=_to_docker_timestamp(time.time_ns()),
+            filters=_EVENTS_FILTERS,
+            decode=True,
+        )
+        try:
+            return any(_is_event_about(event, names, image_ids) for event in events)
+        finally:
+            events.close()
+    except Exception as e:
+        logging.warning(f"Failed to query docker image events: {e}")
+        return True
+
+
+def _inspect(name_or_id: str) -> Optional[docker.models.images.Image]:
+    try:
+        return docker_client.images.get(name_or_id)
+    except docker.errors.ImageNotFound:
+        return None
+
+
+def _apply_event(event: Dict[str, Any]) -> None:
+    action = event.get("Action")
+    actor = event.get("Actor", {})
+    actor_id = actor.get("ID")
+
+    if action == "tag":
+        name = actor.get("Attributes", {}).get("name")
+        with _index_lock:
+            if name is not None:
+                _index[_normalize_name(name)] = actor_id
+    elif action in ["untag", "delete"]:
+        # The event does not tell which tag has been removed, the image
+        # is inspected to find out which of its names it still has. The
+        # result can be more recent than the event, which is fine since
+        # later events are applied on top of it.
+        image = _inspect(actor_id)
+        tags = set(image.tags) if image is not None else set()
+        with _index_lock:
+            for name, image_id in list(_index.items()):
+                if image_id == actor_id and name not in tags:
+                    del _index[name]
+    else:
+        # E.g. pull, load or import, the actor is either the name or the
+        # id of the image.
+        image = _inspect(actor_id)
+        with _index_lock:
+            if image is not None:
+                for name in image.tags:
+                    _index[name] = image.id
+
+    with _index_lock:
+        _watermark_event(event)
+
+
+def _watermark_event(event: Dict[str, Any]) -> None:
+    global _watermark
+    time_ns = event.get("timeNano")
+    if time_ns is not None and _watermark is not None:
+        _watermark = max(_watermark, time_ns)
+
+
+def _reset(index: Optional[Dict[str, str]], watermark: Optional[int]) -> None:
+    global _index, _watermark
+    with _index_lock:
+        _index = index if index is not None else {}
+        _watermark = watermark
+
+
+class ImageIndexWatcher:
+    @classmethod
+    def run(cls, app) -> None:
+        """Keeps the index current, reconnecting on failures.
+
+        Meant to be run in its own daemon thread, never returns.
+        """
+        logger = logging.getLogger("image-index")
+        while True:
+            try:
+                cls._watch(logger)
+            except Exception as e:
+                logger.error(f"Docker image events watcher disconnected: {e}")
+            # Events are missed while disconnected, the index is rebuilt
+            # when reconnecting.
+            _reset(None, None)
+            time.sleep(app.config["IMAGE_INDEX_RECONNECT_INTERVAL"])
+
+    @classmethod
+    def _watch(cls, logger) -> None:
+        since = time.time_ns()
+        # Subscribe before listing, the events happening while listing
+        # are replayed by the daemon because of `since`.
+        events = docker_client.api.events(
+            since=_to_docker_timestamp(since), filters=_EVENTS_FILTERS, decode=True
+        )
+        try:
+            index = {}
+            for image in docker_client.images.list():
+                for name in image.tags:
+                    index[name] = image.id
+            _reset(index, since - 1)
+            logger.info(f"Indexed the docker ids of {len(index)} image names.")
+
+            for event in events:
+                _apply_event(event)
+        finally:
+            events.close()
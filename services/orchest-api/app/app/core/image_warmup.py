@@ -0,0 +1,167 @@
+"""Pulling of the base images of environments ahead of builds.
+
+A build whose base image is not present has to pull it first, which
+can take minutes, e.g. for the first builds after an update or after
+an environment has been changed to a new base image. The warmer
+periodically looks up the base images referenced by the environments of
+all projects, i.e. their properties.json, and pulls those that are
+missing. Images that are not managed by Orchest are also pulled again
+from time to time, so that new versions of their tag are already
+present when builds happen.
+
+Orchest images (e.g. "orchest/base-kernel-py") are never refreshed,
+their version is tied to the version of Orchest and they are pulled by
+orchest-ctl when updating.
+
+The status of the images is kept in memory, see `get_status`, the
+orchest-api runs a single gunicorn worker.
+"""
+import glob
+import json
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+import docker
+
+from app.connections import docker_client
+from app.core.docker_utils import pull_base_image
+
+_ENVIRONMENTS_PROPERTIES_GLOB = (
+    "/userdir/projects/*/.orchest/environments/*/properties.json"
+)
+
+_status_lock = threading.Lock()
+# Image name -> status of the image.
+_status: Dict[str, Dict[str, Any]] = {}
+
+
+def get_referenced_base_images() -> Dict[str, int]:
+    """Returns the base images used by the environments of projects.
+
+    Returns:
+        A dictionary mapping the name of a base image to the number of
+        environments using it.
+
+    """
+    images = {}
+    for path in glob.glob(_ENVIRONMENTS_PROPERTIES_GLOB):
+        try:
+            with open(path, "r") as f:
+                base_image = json.load(f).get("base_image")
+        # E.g. the environment is being written or deleted.
+        except (OSError, json.JSONDecodeError):
+            continue
+        if isinstance(base_image, str) and base_image:
+            images[base_image] = images.get(base_image, 0) + 1
+    return images
+
+
+def get_status() -> List[Dict[str, Any]]:
+    """Returns the status of the base images known to the warmer.
+
+    Returns:
+        A list of dictionaries, one for every base image, sorted by
+        image name. See the `base_image` schema.
+
+    """
+    with _status_lock:
+        return [dict(_status[image]) for image in sorted(_status)]
+
+
+def _update_status(image: str, **kwargs) -> None:
+    with _status_lock:
+        _status[image].update(kwargs)
+
+
+def _is_orchest_image(image: str) -> bool:
+    return image.startswith("orchest/")
+
+
+class BaseImageWarmer:
+    @classmethod
+    def warm_up(cls, app) -> None:
+        """Pulls the base images that are missing or need a refresh."""
+        logger = logging.getLogger("base-image-warmer")
+        refresh_interval = timedelta(
+            seconds=app.config["BASE_IMAGES_REFRESH_INTERVAL"]
+        )
+        retry_interval = timedelta(seconds=app.config["BASE_IMAGES_RETRY_INTERVAL"])
+
+        images = get_referenced_base_images()
+        with _status_lock:
+            for image in list(_status):
+                if image not in images:
+                    del _status[image]
+            for image, n_environments in images.items():
+                _status.setdefault(
+                    image,
+                    {
+                        "image": image,
+                        "status": "PENDING",
+                        "image_id": None,
+                        "last_pulled_time": None,
+                        "last_attempt_time": None,
+                        "error": None,
+                    },
+                )["environments"] = n_environments
+
+        for image in sorted(images):
+            with _status_lock:
+                last_attempt_time = _status[image]["last_attempt_time"]
+            since_last_attempt = (
+                datetime.now(timezone.utc) - last_attempt_time
+                if last_attempt_time is not None
+                else None
+            )
+
+            try:
+                image_id = docker_client.images.get(image).id
+            except docker.errors.ImageNotFound:
+                image_id = None
+            except Exception as e:
+                logger.error(f"Failed to inspect base image {image}: {e}")
+                continue
+
+            if image_id is not None:
+                refresh = not _is_orchest_image(image) and (
+                    since_last_attempt is None or since_last_attempt > refresh_interval
+                )
+                if not refresh:
+                    _update_status(image, status="PRESENT", image_id=image_id)
+                    continue
+            else:
+                refresh = False
+                # Do not keep on pulling, e.g., a non existing image.
+                if (
+                    since_last_attempt is not None
+                    and since_last_attempt < retry_interval
+                ):
+                    _update_status(image, status="FAILURE", image_id=None)
+                    continue
+
+            _update_status(
+                image, status="PULLING", last_attempt_time=datetime.now(timezone.utc)
+            )
+            logger.info(f"Pulling base image {image}.")
+            try:
+                pull_base_image(image, refresh=refresh)
+                image_id = docker_client.images.get(image).id
+            except Exception as e:
+                logger.error(f"Failed to pull base image {image}: {e}")
+                # A refresh failing does not make the image unusable.
+                _update_status(
+                    image,
+                    status="PRESENT" if image_id is not None else "FAILURE",
+                    error=str(e),
+                )
+                continue
+
+            _update_status(
+                image,
+                status="PRESENT",
+                image_id=image_id,
+                last_pulled_time=datetime.now(timezone.utc),
+                error=None,
+            )
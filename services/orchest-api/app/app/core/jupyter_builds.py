@@ -1,3 +1,5 @@
+import hashlib
+import json
 import logging
 import os
 import signal
@@ -5,16 +7,21 @@ import time
 from datetime import datetime
 from typing import Any
 
+import docker
 import requests
 from celery.contrib.abortable import AbortableAsyncResult
 
 from _orchest.internals import config as _config
+from _orchest.internals.utils import docker_images_list_safe
+from app.connections import docker_client
 from app.core.docker_utils import build_docker_image, cleanup_docker_artifacts
 from app.core.sio_streamed_task import SioStreamedTask
 from config import CONFIG_CLASS
 
 __DOCKERFILE_RESERVED_FLAG = "_ORCHEST_RESERVED_FLAG_"
 __JUPYTER_BUILD_FULL_LOGS_DIRECTORY = "/tmp/jupyter_builds_logs"
+__JUPYTER_BASE_IMAGE = "orchest/jupyter-server:latest"
+__JUPYTER_SETUP_SCRIPT_NAME = ".orchest_jupyter_setup_script.sh"
 
 
 def update_jupyter_build_status(
@@ -35,12 +42,15 @@ def update_jupyter_build_status(
         return response.json()
 
 
-def write_jupyter_dockerfile(task_uuid, work_dir, bash_script, flag, path):
-    """Write a custom dockerfile with the given specifications.
+def get_jupyter_dockerfile(task_uuid, work_dir, bash_script, flag, setup_hash) -> str:
+    """Returns a custom dockerfile with the given specifications.
 
     This dockerfile is built in an ad-hoc way to later be able to only
-    log messages related to the user script. Note that the produced
-    dockerfile will make it so that the entire context is copied.
+    log messages related to the user script.
+
+    The user script is copied and run before anything that changes at
+    every build, e.g. the task uuid label, so that the build cache can
+    be used, see get_environment_dockerfile in environment_builds.py.
 
     Args:
         task_uuid:
@@ -48,27 +58,28 @@ def write_jupyter_dockerfile(task_uuid, work_dir, bash_script, flag, path):
         bash_script: Script to run in a RUN command.
         flag: Flag to use to be able to differentiate between logs of
             the bash_script and logs to be ignored.
-        path: Where to save the file.
+        setup_hash: See get_setup_hash.
 
     Returns:
+        The content of the dockerfile.
 
     """
+    work_dir = os.path.join("/", work_dir)
     statements = []
-    statements.append("FROM orchest/jupyter-server:latest")
-    # The task uuid is applied first so that if a build is aborted early
-    # any produced artifact will at least have this label and will thus
-    # "searchable" through this label, e.g for cleanups.
-    statements.append(f"LABEL _orchest_jupyter_build_task_uuid={task_uuid}")
+    statements.append(f"FROM {__JUPYTER_BASE_IMAGE}")
     statements.append("LABEL _orchest_jupyter_build_is_intermediate=1")
+    statements.append(f"LABEL _orchest_jupyter_setup_hash={setup_hash}")
 
-    statements.append(f"COPY . \"{os.path.join('/', work_dir)}\"")
+    statements.append(
+        "COPY " + json.dumps([bash_script, os.path.join(work_dir, bash_script)])
+    )
 
     # Note: commands are concatenated with && because this way an
     # exit_code != 0 will bubble up and cause the docker build to fail,
     # as it should. The bash script is removed so that the user won't
     # be able to see it after the build is done.
     statements.append(
-        f'RUN cd "{os.path.join("/", work_dir)}" '
+        f'RUN cd "{work_dir}" '
         f'&& echo "{flag}" '
         f"&& bash {bash_script} "
         f'&& echo "{flag}" '
@@ -78,62 +89,115 @@ def write_jupyter_dockerfile(task_uuid, work_dir, bash_script, flag, path):
         "cp -rfT $userdir_path_ext $build_path_ext; fi"
         f"&& rm {bash_script}"
     )
+
+    # The task uuid is applied before any step that cannot be cached, so
+    # that if a build is aborted any produced artifact will at least
+    # have this label and will thus "searchable" through this label, e.g
+    # for cleanups.
+    statements.append(f"LABEL _orchest_jupyter_build_task_uuid={task_uuid}")
     statements.append("LABEL _orchest_jupyter_build_is_intermediate=0")
 
-    statements = "\n".join(statements)
+    return "\n".join(statements)
+
+
+def get_setup_hash(bash_script: str) -> str:
+    """Hashes the setup script and the image it is run on.
+
+    The id of the base image is part of the hash so that the JupyterLab
+    image is rebuilt when Orchest is updated.
+    """
+    hasher = hashlib.sha256()
+    hasher.update(bash_script.encode("utf-8"))
+    try:
+        hasher.update(docker_client.images.get(__JUPYTER_BASE_IMAGE).id.encode())
+    except docker.errors.ImageNotFound:
+        pass
+    return hasher.hexdigest()
 
-    with open(path, "w") as dockerfile:
-        dockerfile.write(statements)
+
+def is_jupyter_image_up_to_date(setup_hash: str) -> bool:
+    """Tells if the current JupyterLab image was built from the setup.
+
+    Args:
+        setup_hash: See get_setup_hash.
+
+    Returns:
+        True if the JupyterLab image exists and has been built with the
+        same setup script and base image, in which case there is no
+        need to build it again.
+
+    """
+    try:
+        image = docker_client.images.get(_config.JUPYTER_IMAGE_NAME)
+    except docker.errors.ImageNotFound:
+        return False
+    return image.labels.get("_orchest_jupyter_setup_hash") == setup_hash
+
+
+def remove_previous_jupyter_images() -> None:
+    """Removes the JupyterLab images replaced by newer builds.
+
+    Building the JupyterLab image moves its name to the new image, the
+    previous one is left nameless. Images still used by sessions that
+    were started before the build can't be removed, they are removed
+    after a later build.
+    """
+    filters = {
+        "dangling": True,
+        "label": ["_orchest_jupyter_build_is_intermediate=0"],
+    }
+    for img in docker_images_list_safe(docker_client, filters=filters):
+        try:
+            docker_client.images.remove(img.id)
+        except docker.errors.APIError as e:
+            logging.info(f"Could not remove previous JupyterLab image {img.id}: {e}")
 
 
 def prepare_build_context(task_uuid):
     """Prepares the docker build context for building the Jupyter image.
 
-    Prepares the docker build context by copying the JupyterLab
-    fine tune bash script.
+    The context only consists of the dockerfile and of the JupyterLab
+    fine tune bash script, both streamed to the daemon.
 
     Args:
         task_uuid:
 
     Returns:
-        Path to the prepared context.
+        The build context, see `build_docker_image`, together with the
+        hash of the setup, see get_setup_hash.
 
     """
+    # use the task_uuid to avoid clashing with user stuff
     dockerfile_name = task_uuid
-    # the project path we receive is relative to the projects directory
-    jupyterlab_setup_script = os.path.join("/userdir", _config.JUPYTER_SETUP_SCRIPT)
+    # Not task specific so that the layers running it can be cached.
+    bash_script_name = __JUPYTER_SETUP_SCRIPT_NAME
 
-    snapshot_path = f"/tmp/{dockerfile_name}"
-
-    if os.path.isdir(snapshot_path):
-        os.system('rm -rf "%s"' % snapshot_path)
-
-    os.system('mkdir "%s"' % (snapshot_path))
+    jupyterlab_setup_script = os.path.join("/userdir", _config.JUPYTER_SETUP_SCRIPT)
+    if os.path.isfile(jupyterlab_setup_script):
+        with open(jupyterlab_setup_script) as f:
+            bash_script = f.read()
+    else:
+        # empty shell script if no setup_script exists
+        bash_script = ""
 
-    bash_script_name = f".{dockerfile_name}.sh"
-    write_jupyter_dockerfile(
+    setup_hash = get_setup_hash(bash_script)
+    dockerfile = get_jupyter_dockerfile(
         task_uuid,
         "tmp/jupyter",
         bash_script_name,
         __DOCKERFILE_RESERVED_FLAG,
-        os.path.join(snapshot_path, dockerfile_name),
+        setup_hash,
     )
 
-    if os.path.isfile(jupyterlab_setup_script):
-        # move the setup_script to the context
-        os.system(
-            'cp "%s" "%s"'
-            % (
-                jupyterlab_setup_script,
-                os.path.join(snapshot_path, bash_script_name),
-            )
-        )
-    else:
-        # create empty shell script if no setup_script exists
-        os.system('touch "%s"' % os.path.join(snapshot_path, bash_script_name))
-
     return {
-        "snapshot_path": snapshot_path,
+        "context_path": "/userdir",
+        "context_files": [],
+        "extra_files": {
+            dockerfile_name: dockerfile,
+            bash_script_name: bash_script,
+        },
+        "base_image": __JUPYTER_BASE_IMAGE,
+        "setup_hash": setup_hash,
     }
 
 
@@ -155,8 +219,8 @@ def build_jupyter_task(task_uuid):
         try:
             update_jupyter_build_status("STARTED", session, task_uuid)
 
-            # Prepare the project snapshot with the correctly placed
-            # dockerfile, scripts, etc.
+            # Prepare the dockerfile, scripts, etc. to send to the
+            # daemon.
             build_context = prepare_build_context(task_uuid)
 
             # Use the agreed upon pattern for the docker image name.
@@ -169,15 +233,34 @@ def build_jupyter_task(task_uuid):
                 __JUPYTER_BUILD_FULL_LOGS_DIRECTORY, docker_image_name
             )
 
+            # Skip the build if the image has been built from the same
+            # setup. Otherwise the current image keeps being used by new
+            # sessions until the build is done, the name of the image is
+            # then moved to the new image.
+            if is_jupyter_image_up_to_date(build_context["setup_hash"]):
+
+                def task_lambda(user_logs_fo):
+                    user_logs_fo.write(
+                        "Nothing changed since the previous build, reusing its "
+                        "result.\n"
+                    )
+                    return "SUCCESS"
+
+            else:
+
+                def task_lambda(user_logs_fo):
+                    return build_docker_image(
+                        docker_image_name,
+                        build_context,
+                        task_uuid,
+                        user_logs_fo,
+                        complete_logs_path,
+                        use_cache=CONFIG_CLASS.ENVIRONMENT_BUILD_CACHE,
+                    )
+
             status = SioStreamedTask.run(
                 # What we are actually running/doing in this task,
-                task_lambda=lambda user_logs_fo: build_docker_image(
-                    docker_image_name,
-                    build_context,
-                    task_uuid,
-                    user_logs_fo,
-                    complete_logs_path,
-                ),
+                task_lambda=task_lambda,
                 identity="jupyter",
                 server=_config.ORCHEST_SOCKETIO_SERVER_ADDRESS,
                 namespace=_config.ORCHEST_SOCKETIO_JUPYTER_BUILDING_NAMESPACE,
@@ -189,11 +272,14 @@ def build_jupyter_task(task_uuid):
                 abort_lambda=lambda: AbortableAsyncResult(task_uuid).is_aborted(),
             )
 
-            # cleanup
-            os.system('rm -rf "%s"' % build_context["snapshot_path"])
-
             update_jupyter_build_status(status, session, task_uuid)
 
+            if status == "SUCCESS":
+                try:
+                    remove_previous_jupyter_images()
+                except Exception as e:
+                    logging.error(e)
+
         # Catch all exceptions because we need to make sure to set the
         # build state to failed.
         except Exception as e:
@@ -215,11 +301,17 @@ def build_jupyter_task(task_uuid):
             # Artifacts of this build (intermediate containers, images,
             # etc.) See the build task docstring in
             # environment_builds.py for why this needs to be here.
+            # Intermediate containers of the cacheable steps don't have
+            # the task uuid label, Jupyter builds are not concurrent
+            # since starting a build aborts the previous one.
+            container_filters = {
+                "label": ["_orchest_jupyter_build_is_intermediate=1"]
+            }
             if os.fork() == 0:
                 for _ in range(10):
                     time.sleep(0.5)
                     try:
-                        cleanup_docker_artifacts(filters)
+                        cleanup_docker_artifacts(filters, container_filters)
                     except Exception as e:
                         logging.error(e)
                 # To avoid running any celery code that would run once
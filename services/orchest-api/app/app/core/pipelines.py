@@ -2,14 +2,20 @@ import asyncio
 import copy
 import logging
 import os
+import time
 from datetime import datetime
-from typing import Any, Dict, Iterable, List, Optional, Set, TypedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, TypedDict
 
 import aiodocker
 import aiohttp
 
 from _orchest.internals import config as _config
-from _orchest.internals.utils import get_device_requests, get_orchest_mounts
+from _orchest.internals.utils import (
+    get_device_requests_from_capabilities,
+    get_environment_capabilities_from_properties,
+    get_environment_url,
+    get_orchest_mounts,
+)
 from config import CONFIG_CLASS
 
 
@@ -92,6 +98,49 @@ def construct_pipeline(
     raise ValueError("Function not defined for specified run_type")
 
 
+# (project_uuid, environment_uuid) -> (time of the lookup,
+# capabilities). Shared by all the runs executed by a worker process,
+# e.g. the runs of a job.
+_environment_capabilities_cache: Dict[Tuple[str, str], Tuple[float, List[str]]] = {}
+
+
+async def get_environment_capabilities(
+    session: aiohttp.ClientSession, environment_uuid: str, project_uuid: str
+) -> List[str]:
+    """Gets the capabilities of an environment, e.g. GPU support.
+
+    Lookups are cached for ENVIRONMENT_CAPABILITIES_CACHE_TTL seconds,
+    failed lookups are not cached.
+
+    Returns:
+        A list of capabilities, empty if the lookup failed.
+
+    """
+    key = (project_uuid, environment_uuid)
+    ttl = CONFIG_CLASS.ENVIRONMENT_CAPABILITIES_CACHE_TTL
+    cached = _environment_capabilities_cache.get(key)
+    if cached is not None and time.monotonic() - cached[0] < ttl:
+        return cached[1]
+
+    try:
+        async with session.get(
+            get_environment_url(environment_uuid, project_uuid)
+        ) as response:
+            response.raise_for_status()
+            environment = await response.json()
+    except Exception as e:
+        logging.error(
+            "Failed to get environment for environment_uuid[%s] and "
+            "project_uuid[%s]. Error: %s (%s)"
+            % (environment_uuid, project_uuid, e, type(e))
+        )
+        return []
+
+    capabilities = get_environment_capabilities_from_properties(environment)
+    _environment_capabilities_cache[key] = (time.monotonic(), capabilities)
+    return capabilities
+
+
 async def update_status(
     status: str,
     task_id: str,
@@ -237,10 +286,16 @@ class PipelineStepRunner:
         # add volume mount
         orchest_mounts += get_volume_mounts(run_config, task_id)
 
-        device_requests = get_device_requests(
-            self.properties["environment"],
-            run_config["project_uuid"],
-            form="docker-engine",
+        # Resolved once per run, see `Pipeline.run`.
+        capabilities = run_config.get("env_uuid_capabilities", {}).get(
+            self.properties["environment"]
+        )
+        if capabilities is None:
+            capabilities = await get_environment_capabilities(
+                session, self.properties["environment"], run_config["project_uuid"]
+            )
+        device_requests = get_device_requests_from_capabilities(
+            capabilities, form="docker-engine"
         )
 
         # The working directory is the location of the file being
@@ -842,6 +897,20 @@ class Pipeline:
                 run_endpoint=run_config["run_endpoint"],
             )
 
+            # Look up the capabilities of the environments concurrently
+            # and once per run instead of once per step, so that the
+            # launch of steps is not held back by the lookups.
+            env_uuids = list(set(step.properties["environment"] for step in self.steps))
+            capabilities = await asyncio.gather(
+                *[
+                    get_environment_capabilities(
+                        session, env_uuid, run_config["project_uuid"]
+                    )
+                    for env_uuid in env_uuids
+                ]
+            )
+            run_config["env_uuid_capabilities"] = dict(zip(env_uuids, capabilities))
+
             status = await self.sentinel.run(
                 runner_client,
                 session,
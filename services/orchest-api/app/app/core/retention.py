@@ -0,0 +1,182 @@
+"""Enforcement of the retention policy of job pipeline runs.
+
+See max_retained_pipeline_runs in models.py for docs on the policy.
+
+Deleting non retained pipeline runs used to happen as part of running a
+job and of updating the status of its runs, i.e. while holding the lock
+on the job row, which would slow down the scheduler for jobs with a
+high run churn. Instead, the compactor periodically runs in the
+background (see `create_app`) and deletes the pipeline runs that fall
+out of the retention window of their job, in batches, each batch being
+a single DELETE statement. The directories of the deleted runs are then
+removed asynchronously through celery.
+
+In case of multiple gunicorn workers there will be multiple compactors
+running, runs that are being deleted are locked and skipped by the
+other instances.
+"""
+import collections
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from sqlalchemy import func
+
+from app import models
+from app.celery_app import make_celery
+from app.connections import db
+
+_END_STATES = ["SUCCESS", "FAILURE", "ABORTED"]
+
+# Stats about the last compaction done by this process, to be exposed
+# together with the backlog.
+_last_compaction: Dict[str, Any] = {
+    "time": None,
+    "deleted_pipeline_runs": 0,
+}
+
+
+def _non_retained_pipeline_runs_conditions() -> list:
+    return [
+        models.NonInteractivePipelineRun.job_uuid == models.Job.uuid,
+        models.Job.max_retained_pipeline_runs >= 0,
+        # Only consider runs in an end state.
+        models.NonInteractivePipelineRun.status.in_(_END_STATES),
+        # Only get the runs that would be out of the threshold.
+        # NOTE: this means that a run with a run_index which is greater
+        # than the one considered and is in an end state won't be
+        # deleted in favour of keeping this deletion in order. This also
+        # means that deletion can be out of order for runs which have an
+        # index lower or equal if some are already completed.
+        models.NonInteractivePipelineRun.pipeline_run_index
+        # -1 because the field is incremented by one for every scheduled
+        # pipeline run, so pipeline run 0 would make this go to 1.
+        <= (models.Job.total_scheduled_pipeline_runs - 1)
+        - models.Job.max_retained_pipeline_runs,
+    ]
+
+
+def get_retention_backlog() -> Dict[str, Any]:
+    """Returns metrics about the pipeline runs waiting to be deleted.
+
+    Returns:
+        A dictionary with the number of pipeline runs to be deleted,
+        the number of jobs they belong to and stats about the last
+        compaction done by this process.
+
+    """
+    backlog = (
+        db.session.query(
+            func.count(models.NonInteractivePipelineRun.uuid),
+            func.count(models.NonInteractivePipelineRun.job_uuid.distinct()),
+        )
+        .filter(*_non_retained_pipeline_runs_conditions())
+        .one()
+    )
+    return {
+        "pipeline_runs": backlog[0],
+        "jobs": backlog[1],
+        "last_compaction_time": _last_compaction["time"],
+        "last_compaction_deleted_pipeline_runs": _last_compaction[
+            "deleted_pipeline_runs"
+        ],
+    }
+
+
+def _delete_job_pipeline_run_directories(app, deleted_runs: List[Any]) -> None:
+    """Issues the deletion of the directories of the deleted runs."""
+    runs_per_job = collections.defaultdict(list)
+    for run in deleted_runs:
+        runs_per_job[(run.project_uuid, run.pipeline_uuid, run.job_uuid)].append(
+            run.uuid
+        )
+
+    celery = make_celery(app)
+    # Delete in batches to have a balance between the number of created
+    # tasks and the size of the celery job args.
+    batch_size = 200
+    with celery.producer_or_acquire() as producer:
+        for (project_uuid, pipeline_uuid, job_uuid), run_uuids in runs_per_job.items():
+            for i in range(0, len(run_uuids), batch_size):
+                celery_job_kwargs = {
+                    "project_uuid": project_uuid,
+                    "pipeline_uuid": pipeline_uuid,
+                    "job_uuid": job_uuid,
+                    "pipeline_run_uuids": run_uuids[i : i + batch_size],
+                }
+                task_args = {
+                    "name": "app.core.tasks.delete_job_pipeline_run_directories",
+                    "kwargs": celery_job_kwargs,
+                    "task_id": str(uuid.uuid4()),
+                    "producer": producer,
+                }
+                res = celery.send_task(**task_args)
+                res.forget()
+
+
+class RetentionCompactor:
+    @classmethod
+    def compact(cls, app) -> int:
+        """Deletes the pipeline runs which are not to be retained.
+
+        Returns:
+            The number of deleted pipeline runs.
+
+        """
+        logger = logging.getLogger("job-scheduler")
+
+        batch_size = app.config["PIPELINE_RUNS_RETENTION_BATCH_SIZE"]
+        runs_table = models.PipelineRun.__table__
+        total_deleted = 0
+
+        with app.app_context():
+            while True:
+                try:
+                    # Skip runs that are locked, e.g. because another
+                    # compactor is deleting them. Only the runs are
+                    # locked, not the jobs, so that the scheduler is not
+                    # blocked.
+                    runs_to_delete = (
+                        db.session.query(models.NonInteractivePipelineRun.uuid)
+                        .filter(*_non_retained_pipeline_runs_conditions())
+                        .limit(batch_size)
+                        .with_for_update(of=runs_table, skip_locked=True)
+                        .subquery()
+                    )
+                    # Steps and image mappings are deleted by the DB
+                    # through ON DELETE CASCADE.
+                    deleted_runs = db.session.execute(
+                        runs_table.delete()
+                        .where(runs_table.c.uuid.in_(runs_to_delete))
+                        .returning(
+                            runs_table.c.uuid,
+                            runs_table.c.job_uuid,
+                            runs_table.c.project_uuid,
+                            runs_table.c.pipeline_uuid,
+                        )
+                    ).fetchall()
+                    db.session.commit()
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f"Failed to delete non retained pipeline runs: {e}")
+                    break
+
+                if deleted_runs:
+                    logger.info(
+                        f"Deleted {len(deleted_runs)} non retained pipeline runs."
+                    )
+                    total_deleted += len(deleted_runs)
+                    try:
+                        _delete_job_pipeline_run_directories(app, deleted_runs)
+                    except Exception as e:
+                        logger.error(
+                            f"Failed to issue deletion of pipeline run directories: {e}"
+                        )
+
+                if len(deleted_runs) < batch_size:
+                    break
+
+        _last_compaction["time"] = datetime.now(timezone.utc)
+        _last_compaction["deleted_pipeline_runs"] = total_deleted
+        return total_deleted
@@ -1,16 +1,26 @@
 """Job scheduler.
 
-In case of multiple gunicorn workers, there will be multiple instances
-of the `Scheduler` running. This means that the scheduler needs to lock
-database rows in order to prevent duplicate execution by other scheduler
-instances.
-
 The scheduler works by checking for which jobs are due to be run by
 querying the database, which acts as the ground truth. The column of
 interest to decide if a job should be scheduled is the
 next_scheduled_time column, which is a UTC timestamp confronted with the
 current UTC time.
 
+Instead of polling the database at a fixed interval, the scheduler
+sleeps until the earliest next_scheduled_time among all jobs, and is
+woken up early when a job is created, updated or resumed, see
+`app.utils.notify_job_scheduler`. Changes that are not notified, e.g.
+made by another process, are picked up within
+SCHEDULER_MAX_SLEEP_INTERVAL seconds.
+
+In case of multiple gunicorn workers, there will be multiple instances
+of the `Scheduler` running. A due job is claimed, i.e. its
+next_scheduled_time is moved forward, in the same transaction that
+creates its runs. The transaction locks the job row and skips jobs that
+are already locked, which prevents duplicate execution by other
+scheduler instances, and a failure to run the job leaves it due instead
+of losing the run.
+
 Given a job that should have been run at time X, if Orchest was not
 running at that time, the scheduler will run the job.
 Given a recurring job that should have been run at time X, if Orchest
@@ -27,10 +37,12 @@ job runs that were missed will be scheduled and run.
 
 """
 import logging
+import threading
 from datetime import datetime, timezone
+from typing import Iterable, Optional, Set
 
 from croniter import croniter
-from sqlalchemy import desc
+from sqlalchemy import func
 from sqlalchemy.orm import load_only
 
 from _orchest.internals.two_phase_executor import TwoPhaseExecutor
@@ -41,75 +53,157 @@ from app.models import Job
 
 class Scheduler:
     @classmethod
-    def check_for_jobs_to_be_scheduled(cls, app):
-
+    def run(cls, app, wake_up: threading.Event) -> None:
+        """Runs the scheduler, never returns.
+
+        Args:
+            app: Flask app.
+            wake_up: Event used to wake up the scheduler before the next
+                scheduled check, see `app.utils.notify_job_scheduler`.
+        """
         logger = logging.getLogger("job-scheduler")
+        max_sleep = app.config["SCHEDULER_MAX_SLEEP_INTERVAL"]
+
+        while True:
+            # Clear before checking so that a notification that arrives
+            # during the check is not lost.
+            wake_up.clear()
+
+            next_scheduled_time = None
+            try:
+                failed = cls.check_for_jobs_to_be_scheduled(app)
+                # Jobs that failed to run are still due, they are
+                # retried by the next check instead of right away.
+                next_scheduled_time = cls.get_next_scheduled_time(app, failed)
+            except Exception as e:
+                logger.error(e)
+
+            sleep = max_sleep
+            if next_scheduled_time is not None:
+                till_next = next_scheduled_time - datetime.now(timezone.utc)
+                sleep = min(max(till_next.total_seconds(), 0), max_sleep)
+            wake_up.wait(sleep)
 
-        now = datetime.now(timezone.utc)
+    @classmethod
+    def get_next_scheduled_time(
+        cls, app, exclude: Iterable[str] = ()
+    ) -> Optional[datetime]:
+        """Returns the earliest time at which a job is to be scheduled.
+
+        Makes use of the ix_jobs_next_scheduled_time_status index.
 
+        Args:
+            app: Flask app.
+            exclude: UUIDs of jobs to not take into account.
+        """
         with app.app_context():
             query = (
-                Job.query.options(
-                    load_only(
-                        "uuid",
-                        "schedule",
-                        "next_scheduled_time",
-                    )
-                )
+                db.session.query(func.min(Job.next_scheduled_time))
                 # Ignore drafts.
                 .filter(Job.status != "DRAFT")
-                # Filter out jobs that do not have to run anymore.
                 .filter(Job.next_scheduled_time.isnot(None))
-                # Jobs which have next_scheduled_time before now need to
-                # to be scheduled.
-                .filter(now > Job.next_scheduled_time)
-                # Order by time difference descending, so that the job
-                # which is more "behind" gets scheduled first.
-                .order_by(desc(now - Job.next_scheduled_time))
             )
+            exclude = list(exclude)
+            if exclude:
+                query = query.filter(Job.uuid.notin_(exclude))
+            next_scheduled_time = query.scalar()
+            db.session.commit()
 
-            jobs_to_run = query.all()
+        if next_scheduled_time is not None and next_scheduled_time.tzinfo is None:
+            next_scheduled_time = next_scheduled_time.replace(tzinfo=timezone.utc)
+        return next_scheduled_time
 
-            if jobs_to_run:
-                logger.info(f"found {len(jobs_to_run)} jobs to run")
+    @classmethod
+    def check_for_jobs_to_be_scheduled(cls, app) -> Set[str]:
+        """Runs the jobs that are due.
+
+        Returns:
+            The UUIDs of the jobs that failed to be run. They are still
+            due, i.e. they will be run by a later check.
+        """
 
+        logger = logging.getLogger("job-scheduler")
+
+        now = datetime.now(timezone.utc)
+        failed = set()
+
+        with app.app_context():
             # Use one transaction per job, so errors in one job do not
-            # hinder the others.
-            for job in jobs_to_run:
+            # hinder the others. Jobs are claimed one at a time, in the
+            # transaction that runs them, so that the claim is rolled
+            # back if running the job fails.
+            while True:
+                job_uuid = None
                 try:
-                    job = query.with_for_update().filter_by(uuid=job.uuid).first()
-                    # The job might have been paused in this tiny time
-                    # window.
-                    if job is None:
-                        continue
-
-                    # Based on the type of Job (recurring or not) set
-                    # the status and next_scheduled_time. Note that for
-                    # recurring jobs the next scheduled time is computed
-                    # starting from "now", this assumes that the
-                    # scheduler runs every N seconds where N < 60;
-                    # otherwise some runs might be lost. If such
-                    # assumption cannot be made, the first time the
-                    # scheduler runs (after boot) the calculation must
-                    # be made using "now" to aggregate lost jobs into 1,
-                    # while all other scheduler calls need to use the
-                    # current value of next_scheduled_time as a base.
-                    # Note: we maintain correctness even if the
-                    # scheduler runs past the minute the job was
-                    # scheduled for.
-                    job.last_scheduled_time = job.next_scheduled_time
-                    if job.schedule is not None:
-                        job.next_scheduled_time = croniter(job.schedule, now).get_next(
-                            datetime
-                        )
-                    else:
-                        # One time jobs are not rescheduled again.
-                        job.next_scheduled_time = None
-
                     with TwoPhaseExecutor(db.session) as tpe:
-                        logger.info(f"Scheduling job {job.uuid}.")
-                        RunJob(tpe).transaction(job.uuid)
-
-                    db.session.commit()
+                        job = cls._claim_due_job(now, failed)
+                        if job is not None:
+                            job_uuid = job.uuid
+                            logger.info(f"Scheduling job {job_uuid}.")
+                            RunJob(tpe).transaction(job_uuid)
                 except Exception as e:
                     logger.error(e)
+                    if job_uuid is None:
+                        break
+                    failed.add(job_uuid)
+                    continue
+
+                if job_uuid is None:
+                    break
+
+        return failed
+
+    @classmethod
+    def _claim_due_job(cls, now: datetime, exclude: Set[str]) -> Optional[Job]:
+        """Locks a due job and moves its next_scheduled_time forward.
+
+        Must be called in a transaction, the job row is locked until it
+        ends. Jobs which are locked, e.g. because they are being updated
+        or run by another scheduler, are skipped, they will be
+        considered by the next check if still due.
+
+        Returns:
+            The claimed job, None if there are no due jobs.
+        """
+        query = (
+            Job.query.options(
+                load_only(
+                    "uuid",
+                    "schedule",
+                    "next_scheduled_time",
+                )
+            )
+            # Ignore drafts.
+            .filter(Job.status != "DRAFT")
+            # Filter out jobs that do not have to run anymore.
+            .filter(Job.next_scheduled_time.isnot(None))
+            # Jobs which have next_scheduled_time before now need to
+            # to be scheduled.
+            .filter(now >= Job.next_scheduled_time)
+        )
+        if exclude:
+            query = query.filter(Job.uuid.notin_(exclude))
+        job = (
+            # Order by time ascending, so that the job which is more
+            # "behind" gets scheduled first.
+            query.order_by(Job.next_scheduled_time)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if job is None:
+            return None
+
+        # Based on the type of Job (recurring or not) set the
+        # next_scheduled_time. Note that for recurring jobs the next
+        # scheduled time is computed starting from "now", given that the
+        # scheduler wakes up at the next_scheduled_time of the job, the
+        # only runs that would be aggregated into 1 are those lost while
+        # Orchest was not running. Note: we maintain correctness even if
+        # the scheduler runs past the minute the job was scheduled for.
+        job.last_scheduled_time = job.next_scheduled_time
+        if job.schedule is not None:
+            job.next_scheduled_time = croniter(job.schedule, now).get_next(datetime)
+        else:
+            # One time jobs are not rescheduled again.
+            job.next_scheduled_time = None
+        return job
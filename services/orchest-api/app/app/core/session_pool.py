@@ -0,0 +1,83 @@
+"""Reclaiming of pre-warmed interactive sessions.
+
+Launching an interactive session takes a while, the Jupyter server, the
+enterprise gateway, the memory-server and the sidecar have to be
+started. To hide this latency, the webserver can pre-warm sessions for
+other pipelines of a project when a pipeline of the project is opened,
+see the INTERACTIVE_SESSIONS_POOL_SIZE global config. A pre-warmed
+session is a regular session, launched with the full configuration of
+its pipeline, since the mounts and the environment of a container can't
+be changed once it's been created. Pipelines defining services are not
+pre-warmed. Opening the pipeline claims the session, see the POST of the
+sessions namespace.
+
+Pre-warmed sessions that are not claimed within
+INTERACTIVE_SESSIONS_POOL_IDLE_TIMEOUT are stopped by the reclaimer, so
+that unused sessions don't hold on to resources.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+
+from _orchest.internals.two_phase_executor import TwoPhaseExecutor
+from app import models
+from app.apis.namespace_sessions import StopInteractiveSession
+from app.connections import db
+
+
+class SessionPoolReclaimer:
+    @classmethod
+    def reclaim(cls, app) -> int:
+        """Stops the pre-warmed sessions that have been idle too long.
+
+        Returns:
+            The number of sessions that are being stopped.
+
+        """
+        logger = logging.getLogger("session-pool")
+
+        threshold = datetime.now(timezone.utc) - timedelta(
+            seconds=app.config["INTERACTIVE_SESSIONS_POOL_IDLE_TIMEOUT"]
+        )
+        n_stopped = 0
+
+        with app.app_context():
+            try:
+                idle_sessions = (
+                    db.session.query(
+                        models.InteractiveSession.project_uuid,
+                        models.InteractiveSession.pipeline_uuid,
+                    )
+                    .filter(
+                        models.InteractiveSession.prewarmed_time < threshold,
+                        models.InteractiveSession.status == "RUNNING",
+                    )
+                    .all()
+                )
+                # Release the read, the sessions are locked one at a
+                # time when being stopped.
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Failed to query idle pre-warmed sessions: {e}")
+                return n_stopped
+
+            for project_uuid, pipeline_uuid in idle_sessions:
+                try:
+                    with TwoPhaseExecutor(db.session) as tpe:
+                        # The session is only stopped if it has not
+                        # been claimed in the meantime.
+                        stopped = StopInteractiveSession(tpe).transaction(
+                            project_uuid, pipeline_uuid, prewarmed_only=True
+                        )
+                except Exception as e:
+                    logger.error(
+                        "Failed to stop pre-warmed session "
+                        f"{project_uuid}-{pipeline_uuid}: {e}"
+                    )
+                    continue
+                if stopped:
+                    n_stopped += 1
+
+        if n_stopped:
+            logger.info(f"Stopping {n_stopped} idle pre-warmed sessions.")
+        return n_stopped
@@ -4,6 +4,7 @@ import socket
 import time
 import traceback
 from abc import abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from enum import Enum
 from typing import Any, Dict, List, NamedTuple, Optional
@@ -53,6 +54,25 @@ def _inject_message_as_user_service(ip, port, service, msg):
     sock.close()
 
 
+def _wait_for_tcp_port(ip: str, port: int, timeout: float) -> bool:
+    """Waits for a TCP port to accept connections.
+
+    Returns:
+        True if a connection could be established within `timeout`
+        seconds, False otherwise.
+
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with socket.create_connection((ip, port), timeout=0.5):
+                return True
+        except OSError:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+
+
 # TODO: possibly make contextlib session by implementing __enter__ and
 #       __exit__
 class Session:
@@ -69,14 +89,21 @@ class Session:
         client (docker.client.DockerClient): Docker client to manage
             Docker resources.
         network: Name of docker network to manage resources on.
+        launch_timings: Duration in seconds of the phases of the last
+            launch, e.g. {"orchest_services": 1.2, "sidecar": 0.1,
+            "user_services": 0.8, "total": 2.1}.
 
     """
 
     _resources: Optional[list] = None
 
+    # Max number of containers started concurrently.
+    _max_parallel_container_starts = 8
+
     def __init__(self, client, network: Optional[str] = None):
         self.client = client
         self.network = network
+        self.launch_timings: Dict[str, float] = {}
 
         self._containers = {}
 
@@ -168,6 +195,42 @@ class Session:
         container.reload()
         return container.attrs["NetworkSettings"]["Networks"][self.network]["IPAddress"]
 
+    def _run_containers(self, specs: Dict[str, dict]) -> Dict[str, Exception]:
+        """Runs containers concurrently.
+
+        Containers that could be started are added to the containers of
+        the session, so that they are cleaned up by a shutdown even if
+        others failed to start.
+
+        Args:
+            specs: Mapping from resource name to the container
+                specification, see ``_get_orchest_services_specs``.
+
+        Returns:
+            Mapping from resource name to the exception raised when
+            starting its container, for the containers that failed to
+            start.
+
+        """
+        failures = {}
+        if not specs:
+            return failures
+
+        with ThreadPoolExecutor(
+            max_workers=min(len(specs), self._max_parallel_container_starts)
+        ) as executor:
+            futures = {
+                name: executor.submit(self.client.containers.run, **spec)
+                for name, spec in specs.items()
+            }
+
+        for name, future in futures.items():
+            try:
+                self._containers[name] = future.result()
+            except Exception as e:
+                failures[name] = e
+        return failures
+
     def launch(
         self,
         uuid: str,
@@ -240,6 +303,8 @@ class Session:
 
         """
         logger = utils.get_logger()
+        self.launch_timings = {}
+        launch_start = time.monotonic()
 
         # TODO: make convert this "pipeline" uuid into a "session" uuid.
         orchest_services = _get_orchest_services_specs(
@@ -249,37 +314,33 @@ class Session:
             self.network,
         )
 
-        for resource in self._resources:
-            try:
-                container = self.client.containers.run(**orchest_services[resource])
-                self._containers[resource] = container
-            except Exception as e:
-                logger.error("Failed to start container %s [%s]." % (e, type(e)))
-                raise errors.SessionContainerError(
-                    "Could not start required containers."
+        # The orchest services do not depend on each other to start,
+        # thus they are started concurrently.
+        phase_start = time.monotonic()
+        failures = self._run_containers(
+            {resource: orchest_services[resource] for resource in self._resources}
+        )
+        self.launch_timings["orchest_services"] = time.monotonic() - phase_start
+        if failures:
+            for resource, e in failures.items():
+                logger.error(
+                    "Failed to start container %s: %s [%s]." % (resource, e, type(e))
                 )
+            raise errors.SessionContainerError("Could not start required containers.")
 
         # Wait for the sidecar to be ready so that all logs are captured
         # , moreover, in TCP mode docker will not start a container if
         # it can't connect to the logger. This is not an health check
         # because an health check would have to run periodically, which
         # is a waste.
-        sidecar_c = self._containers["session-sidecar"]
-        n = 50
-        for _ in range(n):
-            exit_code = sidecar_c.exec_run(
-                f"netstat -plnt | grep ':{_config.SIDECAR_PORT}'",
-            )[0]
-            if exit_code == 0:
-                break
-            else:
-                time.sleep(0.1)
-        else:
-            raise errors.SessionContainerError("Sidecar not listening.")
-
         # Using the sidecar ip is necessary because docker won't do name
         # resolution when passing a name to the log-driver.
-        sidecar_ip = self._get_container_IP(sidecar_c)
+        phase_start = time.monotonic()
+        sidecar_ip = self._get_container_IP(self._containers["session-sidecar"])
+        if not _wait_for_tcp_port(sidecar_ip, _config.SIDECAR_PORT, timeout=10):
+            raise errors.SessionContainerError("Sidecar not listening.")
+        self.launch_timings["sidecar"] = time.monotonic() - phase_start
+
         user_services = _get_user_services_specs(
             uuid,
             session_config,
@@ -288,28 +349,32 @@ class Session:
             self.network,
         )
 
-        for service_name, service_spec in user_services.items():
+        phase_start = time.monotonic()
+        failures = self._run_containers(user_services)
+        self.launch_timings["user_services"] = time.monotonic() - phase_start
+        for service_name, e in failures.items():
+            logger.error(
+                "Failed to start user service container %s [%s]." % (e, type(e))
+            )
             try:
-                container = self.client.containers.run(**service_spec)
-                self._containers[service_name] = container
-            except Exception as e:
-                logger.error(
-                    "Failed to start user service container %s [%s]." % (e, type(e))
-                )
-                try:
-                    container = self.client.containers.get(service_spec["name"])
-                    container.remove(force=True)
-                except NotFound:
-                    logger.warning("Did not find dangling user service container.")
-
-                # Necessary because the docker container won't emit any
-                # logs for SDK level errors.
-                _inject_message_as_user_service(
-                    sidecar_ip,
-                    _config.SIDECAR_PORT,
-                    service_name,
-                    e.explanation if isinstance(e, APIError) else str(e),
+                container = self.client.containers.get(
+                    user_services[service_name]["name"]
                 )
+                container.remove(force=True)
+            except NotFound:
+                logger.warning("Did not find dangling user service container.")
+
+            # Necessary because the docker container won't emit any
+            # logs for SDK level errors.
+            _inject_message_as_user_service(
+                sidecar_ip,
+                _config.SIDECAR_PORT,
+                service_name,
+                e.explanation if isinstance(e, APIError) else str(e),
+            )
+
+        self.launch_timings["total"] = time.monotonic() - launch_start
+        logger.info(f"Launched session {uuid}, timings: {self.launch_timings}.")
 
     @abstractmethod
     def shutdown(self) -> None:
@@ -438,12 +503,14 @@ class InteractiveSession(Session):
             See `Args` section in parent class :class:`Session`.
 
         """
+        launch_start = time.monotonic()
         super().launch(
             session_config["pipeline_uuid"],
             session_config,
             session_type=SessionType.INTERACTIVE,
         )
 
+        phase_start = time.monotonic()
         IP = self.get_containers_IP()
 
         current_app.logger.info(
@@ -479,6 +546,8 @@ class InteractiveSession(Session):
             else:
                 break
 
+        self.launch_timings["jupyter_server"] = time.monotonic() - phase_start
+        self.launch_timings["total"] = time.monotonic() - launch_start
         return
 
     def has_busy_kernels(self, session_config: Dict[str, Any]) -> bool:
@@ -1106,6 +1175,13 @@ def _get_orchest_services_specs(
             "labels": {"session_identity_uuid": uuid, "project_uuid": project_uuid},
         }
 
+        # The session-sidecar reports the activity of the kernels to the
+        # orchest-api, see utils.is_orchest_idle.
+        orchest_services_specs["session-sidecar"]["environment"].append(
+            "ORCHEST_JUPYTER_SERVER_KERNELS_URL="
+            f"http://{base_url[1:]}:8888{base_url}/api/kernels"
+        )
+
         jupyer_server_image = "orchest/jupyter-server:latest"
 
         # Check if user tweaked JupyterLab image exists
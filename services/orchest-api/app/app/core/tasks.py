@@ -3,6 +3,7 @@ import copy
 import json
 import os
 import shutil
+import subprocess
 from typing import Any, Dict, List, Optional, Union
 
 import aiohttp
@@ -193,6 +194,32 @@ def run_pipeline(
     return asyncio.run(run_pipeline_async(run_config, pipeline, task_id))
 
 
+def copy_snapshot_to_run_dir(snapshot_dir: str, run_dir: str) -> None:
+    """Creates the directory of a job pipeline run from the snapshot.
+
+    The copy is done with `--reflink=auto`, meaning that on filesystems
+    that support it (e.g. btrfs, XFS) the run directory shares its data
+    blocks with the snapshot and only the blocks that are written by
+    the run diverge, which makes creating the run directory of a large
+    project close to instant and (almost) free in terms of disk usage.
+    On other filesystems `cp` falls back to a regular copy.
+
+    NOTE: hardlinks can't be used instead, steps (e.g. notebooks) are
+    written in place, which would modify the snapshot and thus the
+    directory of every other run of the job.
+
+    Raises:
+        OSError if it failed to copy.
+
+    """
+    exit_code = subprocess.call(
+        ["cp", "-R", "--reflink=auto", snapshot_dir, run_dir],
+        stderr=subprocess.STDOUT,
+    )
+    if exit_code != 0:
+        raise OSError(f"Failed to copy {snapshot_dir} to {run_dir}: {exit_code}.")
+
+
 @celery.task(bind=True, base=AbortableTask)
 def start_non_interactive_pipeline_run(
     self,
@@ -230,9 +257,8 @@ def start_non_interactive_pipeline_run(
     run_dir = os.path.join(job_dir, self.request.id)
 
     # Copy the contents of `snapshot_dir` to the new (not yet existing
-    # folder) `run_dir` (that will then be created by `copytree`).
-    # copytree(snapshot_dir, run_dir)
-    os.system('cp -R "%s" "%s"' % (snapshot_dir, run_dir))
+    # folder) `run_dir`.
+    copy_snapshot_to_run_dir(snapshot_dir, run_dir)
 
     # Update the `run_config` for the interactive pipeline run. The
     # pipeline run should execute on the `run_dir` as its
@@ -1,11 +1,3 @@
-class SessionInProgressException(Exception):
-    pass
-
-
-class JupyterBuildInProgressException(Exception):
-    pass
-
-
 class SessionContainerError(Exception):
     pass
 
@@ -21,7 +21,7 @@ from sqlalchemy import (
 )
 from sqlalchemy.dialects import postgresql
 from sqlalchemy.dialects.postgresql import JSONB, TIMESTAMP
-from sqlalchemy.orm import deferred
+from sqlalchemy.orm import deferred, query_expression
 
 from app.connections import db
 
@@ -143,6 +143,14 @@ class EnvironmentBuild(BaseModel):
     started_time = db.Column(db.DateTime, unique=False, nullable=True)
     finished_time = db.Column(db.DateTime, unique=False, nullable=True)
     status = db.Column(db.String(15), unique=False, nullable=True)
+    # Priority of the build in the builds queue, see
+    # ENVIRONMENT_BUILDS_DEFAULT_PRIORITY.
+    priority = db.Column(
+        db.Integer,
+        unique=False,
+        nullable=False,
+        server_default=text("5"),
+    )
 
     def __repr__(self):
         return f"<EnvironmentBuildTask: {self.uuid}>"
@@ -221,6 +229,37 @@ class InteractiveSession(BaseModel):
         server_default="{}",
     )
 
+    # Duration of the phases of the launch, see Session.launch_timings.
+    launch_timings = db.Column(
+        JSONB,
+        unique=False,
+        nullable=True,
+    )
+
+    # Set while the session is part of the pool of pre-warmed sessions
+    # of its project, i.e. it has been launched ahead of the pipeline
+    # being opened. Such a session is claimed, and this field reset,
+    # when the pipeline is opened, or stopped once it has been idle
+    # for too long, see app/core/session_pool.py.
+    prewarmed_time = db.Column(
+        TIMESTAMP(timezone=True),
+        nullable=True,
+    )
+
+    # Whether the session has busy kernels, as last reported by its
+    # session-sidecar, and when it was reported. Reports are pushed when
+    # the activity changes and periodically, so that the idleness check
+    # does not have to query the Jupyter server of every session, see
+    # utils.is_orchest_idle.
+    busy_kernels = db.Column(
+        db.Boolean(),
+        nullable=True,
+    )
+    kernels_reported_time = db.Column(
+        TIMESTAMP(timezone=True),
+        nullable=True,
+    )
+
     # Orchest environments used as services.
     image_mappings = db.relationship(
         "InteractiveSessionImageMapping",
@@ -443,6 +482,14 @@ ForeignKeyConstraint(
     [Job.project_uuid, Job.pipeline_uuid], [Pipeline.project_uuid, Pipeline.uuid]
 )
 
+# Used by the keyset pagination of jobs, see the jobs namespace.
+Index(
+    "ix_jobs_project_uuid_created_time_uuid",
+    Job.project_uuid,
+    Job.created_time,
+    Job.uuid,
+)
+
 
 class PipelineRun(BaseModel):
     __tablename__ = "pipeline_runs"
@@ -496,6 +543,15 @@ ForeignKeyConstraint(
     [Pipeline.project_uuid, Pipeline.uuid],
 )
 
+# Used by the keyset pagination of runs, see the runs namespace.
+Index(
+    "ix_pipeline_runs_project_uuid_pipeline_uuid_started_time_uuid",
+    PipelineRun.project_uuid,
+    PipelineRun.pipeline_uuid,
+    PipelineRun.started_time.desc().nullslast(),
+    PipelineRun.uuid.desc(),
+)
+
 
 class PipelineRunStep(BaseModel):
     __tablename__ = "pipeline_run_steps"
@@ -515,11 +571,11 @@ class PipelineRunStep(BaseModel):
         return f"<{self.__class__.__name__}: {self.run_uuid}.{self.step_uuid}>"
 
 
-def _create_text_search_vector(*args):
+def _create_text_search_document(*args):
     exp = args[0]
     for e in args[1:]:
         exp += " " + e
-    return func.to_tsvector("simple", exp)
+    return exp
 
 
 class NonInteractivePipelineRun(PipelineRun):
@@ -597,7 +653,11 @@ class NonInteractivePipelineRun(PipelineRun):
         )
     )
 
-    __text_search_vector = _create_text_search_vector(
+    # What the fuzzy filter of the runs of a job searches through, see
+    # utils.fuzzy_filter_non_interactive_pipeline_runs. Both indexes on
+    # it are expression indexes, the expressions must stay in sync with
+    # the ones of the migrations for the indexes to be used.
+    __text_search_document = _create_text_search_document(
         func.lower(cast(pipeline_run_index, postgresql.TEXT)),
         # This is needed to reflect what the FE is showing to the user.
         case(
@@ -610,6 +670,11 @@ class NonInteractivePipelineRun(PipelineRun):
         ),
         func.lower(cast(parameters_text_search_values, postgresql.TEXT)),
     )
+    __text_search_vector = func.to_tsvector("simple", __text_search_document)
+
+    # Relevance of the run for a fuzzy filter, only loaded when runs are
+    # sorted by relevance.
+    search_rank = query_expression()
 
     # related to inheriting from PipelineRun
     __mapper_args__ = {
@@ -623,6 +688,16 @@ Index(
     postgresql_using="gin",
 )
 
+# Substring matches of the fuzzy filter, requires the pg_trgm extension.
+Index(
+    "ix_job_pipeline_runs_text_search_trgm",
+    NonInteractivePipelineRun._NonInteractivePipelineRun__text_search_document.label(
+        "text_search_document"
+    ),
+    postgresql_using="gin",
+    postgresql_ops={"text_search_document": "gin_trgm_ops"},
+)
+
 
 # Used to find old job pipeline runs to delete, see
 # jobs.max_retained_pipeline_runs.
@@ -650,6 +725,33 @@ UniqueConstraint(
 )
 
 
+class JobPipelineRunStatusCount(BaseModel):
+    """Number of pipeline runs of a job that are in a given status.
+
+    Maintained by triggers on the pipeline_runs table, created through
+    the 9a7c3e5b1d24 migration, whenever runs of a job are created,
+    deleted or change status, so that the status breakdown of a job
+    does not require aggregating its runs. Counts can drop to 0, the
+    row is then kept.
+    """
+
+    __tablename__ = "job_pipeline_run_status_counts"
+
+    job_uuid = db.Column(
+        db.String(36),
+        db.ForeignKey("jobs.uuid", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    status = db.Column(db.String(15), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, server_default=text("0"))
+
+    def __repr__(self):
+        return (
+            f"<JobPipelineRunStatusCount: {self.job_uuid} | {self.status} | "
+            f"{self.count}>"
+        )
+
+
 class InteractivePipelineRun(PipelineRun):
     # Just a wrapper around PipelineRun so that we can selectively
     # reference InteractivePipelineRun(s) without filtering by the type
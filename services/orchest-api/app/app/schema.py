@@ -24,6 +24,23 @@ pagination_data = Model(
     },
 )
 
+cursor_pagination_data = Model(
+    "CursorPaginationData",
+    {
+        "next_cursor": fields.String(
+            required=True,
+            description="Cursor to get the next page, null on the last page.",
+        ),
+        "approximate_total": fields.Integer(
+            required=False,
+            description=(
+                "Estimate of the total number of items, only if requested, "
+                "ignoring the cursor."
+            ),
+        ),
+    },
+)
+
 
 # Namespace: Sessions
 server = Model(
@@ -51,6 +68,29 @@ session = Model(
         "user_services": fields.Raw(
             required=False, description="User services part of the session"
         ),
+        "launch_timings": fields.Raw(
+            required=False,
+            description=(
+                "Duration in seconds of the phases of the launch of the session, "
+                "null while the session is launching."
+            ),
+        ),
+        "prewarmed_time": fields.String(
+            required=False,
+            description=(
+                "Time at which the session was pre-warmed, null if the session "
+                "is not an unclaimed pre-warmed session."
+            ),
+        ),
+    },
+)
+
+kernels_activity = Model(
+    "KernelsActivity",
+    {
+        "busy": fields.Boolean(
+            required=True, description="True if a kernel of the session is busy."
+        ),
     },
 )
 
@@ -87,6 +127,50 @@ projects = Model(
     {"projects": fields.List(fields.Nested(project), description="All projects")},
 )
 
+project_count = Model(
+    "ProjectCount",
+    {
+        "project_uuid": fields.String(required=True, description="UUID of project"),
+        "count": fields.Integer(
+            required=True, description="Number of entities of the project"
+        ),
+    },
+)
+
+project_counts = Model(
+    "ProjectCounts",
+    {
+        "counts": fields.List(
+            fields.Nested(project_count),
+            description="Counts of projects having at least one entity",
+        )
+    },
+)
+
+project_overview = Model(
+    "ProjectOverview",
+    {
+        "uuid": fields.String(required=True, description="UUID of project"),
+        "job_count": fields.Integer(
+            required=True, description="Number of jobs of the project"
+        ),
+        "session_count": fields.Integer(
+            required=True,
+            description="Number of interactive sessions of the project",
+        ),
+    },
+)
+
+projects_overview = Model(
+    "ProjectsOverview",
+    {
+        "projects": fields.List(
+            fields.Nested(project_overview),
+            description="Entity counts of all projects",
+        )
+    },
+)
+
 service = Model(
     "Service",
     {
@@ -202,6 +286,14 @@ session_config = Model(
             required=True, description="Host path to userdir"
         ),
         "services": fields.Nested(services),
+        "prewarm": fields.Boolean(
+            required=False,
+            description=(
+                "If True, the session is launched as part of the pool of "
+                "pre-warmed sessions of the project, to be claimed when the "
+                "pipeline is opened."
+            ),
+        ),
     },
 )
 
@@ -314,6 +406,11 @@ interactive_runs = Model(
     },
 )
 
+paginated_interactive_runs = interactive_runs.inherit(
+    "PaginatedInteractiveRuns",
+    {"pagination_data": fields.Nested(cursor_pagination_data)},
+)
+
 status_update = Model(
     "StatusUpdate",
     {
@@ -408,6 +505,12 @@ non_interactive_run = pipeline_run.inherit(
             attribute=lambda x: datetime.datetime.now(datetime.timezone.utc),
             description="Server time to be used when calculating run durations.",
         ),
+        "search_rank": fields.Float(
+            description=(
+                "Relevance of the run for the fuzzy filter, only set when sorting "
+                "by relevance."
+            )
+        ),
     },
 )
 
@@ -432,6 +535,11 @@ paginated_job_pipeline_runs = Model(
     },
 )
 
+cursor_paginated_job_pipeline_runs = job_pipeline_runs.inherit(
+    "CursorPaginatedJobPipelineRuns",
+    {"pagination_data": fields.Nested(cursor_pagination_data)},
+)
+
 job_spec = Model(
     "Jobspecification",
     {
@@ -561,6 +669,11 @@ jobs = Model(
     },
 )
 
+paginated_jobs = jobs.inherit(
+    "PaginatedJobs",
+    {"pagination_data": fields.Nested(cursor_pagination_data)},
+)
+
 environment_build = Model(
     "EnvironmentBuild",
     {
@@ -586,6 +699,17 @@ environment_build = Model(
             description="Status of the build",
             enum=["PENDING", "STARTED", "SUCCESS", "FAILURE", "ABORTED"],
         ),
+        "priority": fields.Integer(
+            required=True, description="Priority of the build in the builds queue"
+        ),
+        "queue_position": fields.Integer(
+            required=False,
+            description=(
+                "1-based position of the build among the PENDING builds, i.e. "
+                "the number of builds that will be picked up before it plus one. "
+                "Null if the build is not PENDING."
+            ),
+        ),
     },
 )
 
@@ -598,6 +722,13 @@ environment_build_request = Model(
             required=True, description="UUID of the environment"
         ),
         "project_path": fields.String(required=True, description="Project path"),
+        "priority": fields.Integer(
+            required=False,
+            description=(
+                "Priority of the build, builds with a higher priority are started "
+                "first. Defaults to ENVIRONMENT_BUILDS_DEFAULT_PRIORITY."
+            ),
+        ),
     },
 )
 
@@ -732,6 +863,64 @@ next_scheduled_job_data = Model(
     },
 )
 
+retention_backlog = Model(
+    "RetentionBacklog",
+    {
+        "pipeline_runs": fields.Integer(
+            required=True,
+            description="Number of pipeline runs waiting to be deleted.",
+        ),
+        "jobs": fields.Integer(
+            required=True,
+            description="Number of jobs with pipeline runs waiting to be deleted.",
+        ),
+        "last_compaction_time": fields.String(
+            required=False,
+            description="Time of the last compaction done by the orchest-api. UTC.",
+        ),
+        "last_compaction_deleted_pipeline_runs": fields.Integer(
+            required=True,
+            description="Number of pipeline runs deleted by the last compaction.",
+        ),
+    },
+)
+
+base_image = Model(
+    "BaseImage",
+    {
+        "image": fields.String(required=True, description="Name of the base image."),
+        "environments": fields.Integer(
+            required=True, description="Number of environments using the image."
+        ),
+        "status": fields.String(
+            required=True,
+            description="Status of the image.",
+            enum=["PENDING", "PULLING", "PRESENT", "FAILURE"],
+        ),
+        "image_id": fields.String(
+            required=False, description="Docker id of the image, if present."
+        ),
+        "last_pulled_time": fields.String(
+            required=False, description="Time of the last successful pull. UTC."
+        ),
+        "last_attempt_time": fields.String(
+            required=False, description="Time of the last pull attempt. UTC."
+        ),
+        "error": fields.String(
+            required=False, description="Error of the last pull, if it failed."
+        ),
+    },
+)
+
+base_images = Model(
+    "BaseImages",
+    {
+        "base_images": fields.List(
+            fields.Nested(base_image), description="Collection of base images"
+        ),
+    },
+)
+
 _idleness_check_result_details = Model(
     "IdlenessCheckResultDetails",
     {
@@ -1,16 +1,20 @@
+import base64
+import json
 import logging
 import time
 from datetime import datetime, timezone
-from typing import Dict, List, Optional, Set
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 
 import requests
 from celery.utils.log import get_task_logger
 from docker import errors
 from flask import current_app
-from flask_restx import Model, Namespace
+from flask_restx import Model, Namespace, inputs, reqparse
 from flask_sqlalchemy import Pagination
-from sqlalchemy import or_, text
-from sqlalchemy.orm import query, undefer
+from sqlalchemy import and_, cast, desc, false, func, inspect, nullslast, or_
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION
+from sqlalchemy.orm import load_only, noload, query, undefer
+from sqlalchemy.sql.elements import Label
 
 import app.models as models
 from _orchest.internals import config as _config
@@ -18,7 +22,7 @@ from _orchest.internals.utils import docker_images_list_safe, docker_images_rm_s
 from app import errors as self_errors
 from app import schema
 from app.connections import db, docker_client
-from app.core import sessions
+from app.core import image_index, sessions
 
 
 def register_schema(api: Namespace) -> Namespace:
@@ -35,6 +39,43 @@ def register_schema(api: Namespace) -> Namespace:
     return api
 
 
+def notify_job_scheduler() -> None:
+    """Wakes up the job scheduler so that it checks for due jobs.
+
+    Should be called after a change to the next_scheduled_time or the
+    status of a job has been committed, see app/core/scheduler.py. Does
+    nothing if the process is not running the job scheduler.
+    """
+    wake_up = current_app.config.get("JOB_SCHEDULER_WAKE_UP")
+    if wake_up is not None:
+        wake_up.set()
+
+
+def invalidate_service_auth_cache(app, project_uuid: str, session_uuid: str) -> None:
+    """Lets the auth-server know the services of a session changed.
+
+    The auth-server caches whether services require authentication,
+    this makes it pick up the services of a session that has been
+    started or stopped right away. Failures are only logged, the cache
+    entries of the auth-server expire anyway.
+
+    Args:
+        app: The Flask app.
+        project_uuid: UUID of the project of the session.
+        session_uuid: UUID of the session, i.e. of the pipeline for
+            interactive sessions.
+
+    """
+    try:
+        requests.delete(
+            f'{app.config["AUTH_SERVER_ADDRESS"]}/auth/service/cache',
+            params={"project_uuid": project_uuid, "session_uuid": session_uuid},
+            timeout=2,
+        )
+    except Exception as e:
+        app.logger.warning(f"Failed to invalidate the service auth cache: {e}")
+
+
 def shutdown_jupyter_server(url: str) -> bool:
     """Shuts down the Jupyter server via an authenticated POST request.
 
@@ -133,7 +174,20 @@ def update_status_db(
     return bool(res)
 
 
-def get_environment_image_docker_id(name_or_id: str):
+def get_environment_image_docker_id(name_or_id: str, use_index: bool = True):
+    """Returns the docker id of an image, None if it does not exist.
+
+    Args:
+        name_or_id: Name or docker id of the image.
+        use_index: If True, the image is looked up in the in-memory
+            image index first, see app/core/image_index.py. Otherwise,
+            or if the image is not in the index, the daemon is queried.
+
+    """
+    if use_index:
+        docker_id = image_index.get_image_id(name_or_id)
+        if docker_id is not None:
+            return docker_id
     try:
         return docker_client.images.get(name_or_id).id
     except errors.ImageNotFound:
@@ -158,7 +212,7 @@ def get_env_uuids_missing_image(project_uuid: str, env_uuids: str) -> List[str]:
 
 
 def get_env_uuids_to_docker_id_mappings(
-    project_uuid: str, env_uuids: Set[str]
+    project_uuid: str, env_uuids: Set[str], use_index: bool = True
 ) -> Dict[str, str]:
     """Map each environment uuid to its current image docker id.
 
@@ -166,6 +220,7 @@ def get_env_uuids_to_docker_id_mappings(
         project_uuid: UUID of the project to which the environments
          belong
         env_uuids: Set of environment uuids.
+        use_index: See get_environment_image_docker_id.
 
     Returns:
         Dict[env_uuid] = docker_id
@@ -179,7 +234,8 @@ def get_env_uuids_to_docker_id_mappings(
         env_uuid_docker_id_mappings[env_uuid] = get_environment_image_docker_id(
             _config.ENVIRONMENT_IMAGE_NAME.format(
                 project_uuid=project_uuid, environment_uuid=env_uuid
-            )
+            ),
+            use_index=use_index,
         )
 
     envs_missing_image = [
@@ -193,6 +249,49 @@ def get_env_uuids_to_docker_id_mappings(
     return env_uuid_docker_id_mappings
 
 
+def _reread_env_uuids_to_docker_id_mappings(
+    project_uuid: str,
+    env_uuids: Set[str],
+    env_uuid_docker_id_mappings: Dict[str, str],
+    watermark: Optional[int],
+) -> Dict[str, str]:
+    """Reads the mappings again once they have been committed.
+
+    If the image index has been available since the mappings were read
+    and the daemon reports no image events concerning the images since
+    then, the mappings are still current and are returned as they are.
+    Otherwise they are read from the daemon, the index could be lagging
+    behind.
+
+    Args:
+        project_uuid: UUID of the project to which the environments
+         belong
+        env_uuids: Set of environment uuids.
+        env_uuid_docker_id_mappings: The mappings that were committed.
+        watermark: The watermark of the image index before the mappings
+            were read, see app/core/image_index.py.
+
+    Returns:
+        Dict[env_uuid] = docker_id
+
+    """
+    if watermark is not None:
+        names = [
+            _config.ENVIRONMENT_IMAGE_NAME.format(
+                project_uuid=project_uuid, environment_uuid=env_uuid
+            )
+            for env_uuid in env_uuids
+        ]
+        if not image_index.changed_since(
+            watermark, names, env_uuid_docker_id_mappings.values()
+        ):
+            return env_uuid_docker_id_mappings
+
+    return get_env_uuids_to_docker_id_mappings(
+        project_uuid, env_uuids, use_index=False
+    )
+
+
 def lock_environment_images_for_run(
     run_id: str, project_uuid: str, environment_uuids: Set[str]
 ) -> Dict[str, str]:
@@ -240,7 +339,10 @@ def lock_environment_images_for_run(
     """
     model = models.PipelineRunImageMapping
 
-    # Read the current docker image ids of each env.
+    # Read the current docker image ids of each env. The watermark of
+    # the image index must be read first, see
+    # _reread_env_uuids_to_docker_id_mappings.
+    watermark = image_index.get_watermark()
     env_uuid_docker_id_mappings = get_env_uuids_to_docker_id_mappings(
         project_uuid, environment_uuids
     )
@@ -267,8 +369,8 @@ def lock_environment_images_for_run(
     # we are using has become nameless and it is outdated, and might be
     # deleted if we did not lock in time, i.e. if we got on the base
     # side of the race condition.
-    env_uuid_docker_id_mappings2 = get_env_uuids_to_docker_id_mappings(
-        project_uuid, environment_uuids
+    env_uuid_docker_id_mappings2 = _reread_env_uuids_to_docker_id_mappings(
+        project_uuid, environment_uuids, env_uuid_docker_id_mappings, watermark
     )
     while set(env_uuid_docker_id_mappings.values()) != set(
         env_uuid_docker_id_mappings2.values()
@@ -295,7 +397,7 @@ def lock_environment_images_for_run(
         # means that we know that we are pointing to images that won't
         # be deleted because the run is already in the db as PENDING.
         env_uuid_docker_id_mappings2 = get_env_uuids_to_docker_id_mappings(
-            project_uuid, environment_uuids
+            project_uuid, environment_uuids, use_index=False
         )
     return env_uuid_docker_id_mappings
 
@@ -322,6 +424,7 @@ def lock_environment_images_for_session(
     """
     model = models.InteractiveSessionImageMapping
 
+    watermark = image_index.get_watermark()
     env_uuid_docker_id_mappings = get_env_uuids_to_docker_id_mappings(
         project_uuid, environment_uuids
     )
@@ -340,8 +443,8 @@ def lock_environment_images_for_session(
     db.session.bulk_save_objects(session_image_mappings)
     db.session.commit()
 
-    env_uuid_docker_id_mappings2 = get_env_uuids_to_docker_id_mappings(
-        project_uuid, environment_uuids
+    env_uuid_docker_id_mappings2 = _reread_env_uuids_to_docker_id_mappings(
+        project_uuid, environment_uuids, env_uuid_docker_id_mappings, watermark
     )
     while set(env_uuid_docker_id_mappings.values()) != set(
         env_uuid_docker_id_mappings2.values()
@@ -360,7 +463,7 @@ def lock_environment_images_for_session(
         env_uuid_docker_id_mappings = env_uuid_docker_id_mappings2
 
         env_uuid_docker_id_mappings2 = get_env_uuids_to_docker_id_mappings(
-            project_uuid, environment_uuids
+            project_uuid, environment_uuids, use_index=False
         )
     return env_uuid_docker_id_mappings
 
@@ -385,6 +488,7 @@ def lock_environment_images_for_job(
     """
     model = models.JobImageMapping
 
+    watermark = image_index.get_watermark()
     env_uuid_docker_id_mappings = get_env_uuids_to_docker_id_mappings(
         project_uuid, environment_uuids
     )
@@ -402,8 +506,8 @@ def lock_environment_images_for_job(
     db.session.bulk_save_objects(job_image_mappings)
     db.session.commit()
 
-    env_uuid_docker_id_mappings2 = get_env_uuids_to_docker_id_mappings(
-        project_uuid, environment_uuids
+    env_uuid_docker_id_mappings2 = _reread_env_uuids_to_docker_id_mappings(
+        project_uuid, environment_uuids, env_uuid_docker_id_mappings, watermark
     )
     while set(env_uuid_docker_id_mappings.values()) != set(
         env_uuid_docker_id_mappings2.values()
@@ -421,7 +525,7 @@ def lock_environment_images_for_job(
         env_uuid_docker_id_mappings = env_uuid_docker_id_mappings2
 
         env_uuid_docker_id_mappings2 = get_env_uuids_to_docker_id_mappings(
-            project_uuid, environment_uuids
+            project_uuid, environment_uuids, use_index=False
         )
     return env_uuid_docker_id_mappings
 
@@ -492,35 +596,80 @@ def is_environment_in_use(project_uuid: str, env_uuid: str) -> bool:
     return len(int_runs) > 0 or len(int_sess) > 0 or len(jobs) > 0
 
 
-def is_docker_image_in_use(img_id: str) -> bool:
-    """True if the image is or will be in use by a run/job
+def get_docker_images_in_use(img_ids: Optional[Iterable[str]] = None) -> Set[str]:
+    """Returns the ids of the images that are or will be in use.
+
+    An image is in use if it is mapped to a run that is PENDING or
+    STARTED, to a session that is LAUNCHING or RUNNING or to a job that
+    has not ended, see lock_environment_images_for_run. The mappings of
+    runs, sessions and jobs are looked up in a single UNION query, so
+    that cleanups can diff the result against the list of images
+    instead of querying the db for every image.
+
+    Note that the ids must be read after the images to be removed have
+    become nameless, otherwise a run could lock an image in between.
 
     Args:
-        img_id:
+        img_ids: If specified, only these ids are considered.
 
     Returns:
-        bool:
+        The set of docker ids of images in use.
+
     """
+    runs = (
+        db.session.query(models.PipelineRunImageMapping.docker_img_id)
+        .join(
+            models.PipelineRun,
+            models.PipelineRun.uuid == models.PipelineRunImageMapping.run_uuid,
+        )
+        .filter(models.PipelineRun.status.in_(["PENDING", "STARTED"]))
+    )
+    sessions = (
+        db.session.query(models.InteractiveSessionImageMapping.docker_img_id)
+        .join(
+            models.InteractiveSession,
+            and_(
+                models.InteractiveSession.project_uuid
+                == models.InteractiveSessionImageMapping.project_uuid,
+                models.InteractiveSession.pipeline_uuid
+                == models.InteractiveSessionImageMapping.pipeline_uuid,
+            ),
+        )
+        .filter(models.InteractiveSession.status.in_(["LAUNCHING", "RUNNING"]))
+    )
+    jobs = (
+        db.session.query(models.JobImageMapping.docker_img_id)
+        .join(models.Job, models.Job.uuid == models.JobImageMapping.job_uuid)
+        .filter(models.Job.status.in_(["DRAFT", "PENDING", "STARTED", "PAUSED"]))
+    )
 
-    int_runs = models.PipelineRun.query.filter(
-        models.PipelineRun.image_mappings.any(docker_img_id=img_id),
-        models.PipelineRun.status.in_(["PENDING", "STARTED"]),
-    ).all()
+    if img_ids is not None:
+        img_ids = list(img_ids)
+        if not img_ids:
+            return set()
+        runs = runs.filter(models.PipelineRunImageMapping.docker_img_id.in_(img_ids))
+        sessions = sessions.filter(
+            models.InteractiveSessionImageMapping.docker_img_id.in_(img_ids)
+        )
+        jobs = jobs.filter(models.JobImageMapping.docker_img_id.in_(img_ids))
 
-    int_sessions = models.InteractiveSession.query.filter(
-        models.InteractiveSession.image_mappings.any(docker_img_id=img_id),
-        models.InteractiveSession.status.in_(["LAUNCHING", "RUNNING"]),
-    ).all()
+    # UNION, not UNION ALL, the same image is often used by many runs.
+    return {img_id for (img_id,) in runs.union(sessions, jobs)}
 
-    jobs = models.Job.query.filter(
-        models.Job.image_mappings.any(docker_img_id=img_id),
-        models.Job.status.in_(["DRAFT", "PENDING", "STARTED", "PAUSED"]),
-    ).all()
 
-    return bool(int_runs) or bool(int_sessions) or bool(jobs)
+def is_docker_image_in_use(img_id: str) -> bool:
+    """True if the image is or will be in use by a run/job
+
+    Args:
+        img_id:
+
+    Returns:
+        bool:
+    """
+    return bool(get_docker_images_in_use([img_id]))
 
 
-def remove_if_dangling(img) -> bool:
+def remove_if_dangling(img, images_in_use: Optional[Set[str]] = None) -> bool:
     """Remove an image if its dangling.
 
     A dangling image is an image that is nameless and tag-less,
@@ -529,6 +678,9 @@ def remove_if_dangling(img) -> bool:
 
     Args:
         img:
+        images_in_use: Ids of the images in use, as returned by
+            get_docker_images_in_use, to avoid querying the db for every
+            image when removing many. Queried if not passed.
 
     Returns:
         True if the image was successfully removed.
@@ -536,8 +688,13 @@ def remove_if_dangling(img) -> bool:
         or will be used by a run.
 
     """
+    if len(img.attrs["RepoTags"]) > 0:
+        return False
+    if images_in_use is None:
+        images_in_use = get_docker_images_in_use([img.id])
+
     # nameless image
-    if len(img.attrs["RepoTags"]) == 0 and not is_docker_image_in_use(img.id):
+    if img.id not in images_in_use:
         # need to check multiple times because of a race condition
         # given by the fact that cleaning up a project will
         # stop runs and jobs, then cleanup images and dangling
@@ -629,11 +786,36 @@ def process_stale_environment_images(
         filters["label"].append(f"_orchest_project_uuid={project_uuid}")
 
     env_imgs = docker_images_list_safe(docker_client, filters=filters)
-    for img in env_imgs:
-        _process_stale_environment_image(img, only_marked_for_removal)
+    to_remove = [
+        img
+        for img in env_imgs
+        if _process_stale_environment_image(img, only_marked_for_removal)
+    ]
+    if not to_remove:
+        return
+
+    # Read after the images have lost their name, see
+    # get_docker_images_in_use.
+    images_in_use = get_docker_images_in_use(img.id for img in to_remove)
+    for img in to_remove:
+        if img.id not in images_in_use:
+            # Delete through id, hence deleting the image regardless of
+            # the fact that it has other tags. force=True is used to
+            # delete regardless of the existence of stopped containers,
+            # this is required because pipeline runs PUT to the
+            # orchest-api their finished state before deleting their
+            # stopped containers.
+            docker_images_rm_safe(docker_client, img.id, attempt_count=20, force=True)
+
+
+def _process_stale_environment_image(img, only_marked_for_removal) -> bool:
+    """Removes the environment name of a stale image.
 
+    Returns:
+        True if the image is stale and should be removed if it is not in
+        use.
 
-def _process_stale_environment_image(img, only_marked_for_removal) -> None:
+    """
     pr_uuid = img.labels.get("_orchest_project_uuid")
     env_uuid = img.labels.get("_orchest_environment_uuid")
     build_uuid = img.labels.get("_orchest_env_build_task_uuid")
@@ -660,7 +842,7 @@ def _process_stale_environment_image(img, only_marked_for_removal) -> None:
         # "survived" two updates in a row because a job is still using
         # that.
     ):
-        return
+        return False
 
     has_env_name = f"{env_name}:latest" in img.tags
     if has_env_name:
@@ -674,15 +856,9 @@ def _process_stale_environment_image(img, only_marked_for_removal) -> None:
             # The image is not dangling, e.g. it has not been
             # substituted by a more up to date version of the same
             # environment.
-            return
+            return False
 
-    if not is_docker_image_in_use(img.id):
-        # Delete through id, hence deleting the image regardless of the
-        # fact that it has other tags. force=True is used to delete
-        # regardless of the existence of stopped containers, this is
-        # required because pipeline runs PUT to the orchest-api their
-        # finished state before deleting their stopped containers.
-        docker_images_rm_safe(docker_client, img.id, attempt_count=20, force=True)
+    return True
 
 
 def delete_dangling_orchest_images() -> None:
@@ -735,11 +911,33 @@ def is_orchest_idle() -> dict:
         .exists()
     ).scalar()
 
-    # Find busy kernels.
-    data["busy_kernels"] = False
-    isessions = models.InteractiveSession.query.filter(
-        models.InteractiveSession.status.in_(["RUNNING"])
-    ).all()
+    # Find busy kernels. Sessions report the activity of their kernels
+    # through their session-sidecar, only the sessions without a recent
+    # report, e.g. sessions that have just been launched, are asked
+    # directly.
+    report_threshold = (
+        datetime.now(timezone.utc)
+        - current_app.config["KERNELS_ACTIVITY_REPORT_TTL"]
+    )
+    is_running = models.InteractiveSession.status.in_(["RUNNING"])
+    reported_time = models.InteractiveSession.kernels_reported_time
+    data["busy_kernels"] = db.session.query(
+        db.session.query(models.InteractiveSession)
+        .filter(
+            is_running,
+            reported_time > report_threshold,
+            models.InteractiveSession.busy_kernels.is_(True),
+        )
+        .exists()
+    ).scalar()
+    isessions = (
+        models.InteractiveSession.query.filter(
+            is_running,
+            or_(reported_time.is_(None), reported_time <= report_threshold),
+        ).all()
+        if not data["busy_kernels"]
+        else []
+    )
     for session in isessions:
         session_obj = sessions.InteractiveSession.from_container_IDs(
             docker_client,
@@ -797,27 +995,244 @@ def page_to_pagination_data(pagination: Pagination) -> dict:
     }
 
 
+def get_keyset_pagination_parser() -> reqparse.RequestParser:
+    """Parser of the arguments shared by the listing endpoints.
+
+    See `keyset_paginate` and `get_projection` for their meaning.
+    """
+    parser = reqparse.RequestParser()
+    parser.add_argument("limit", type=int, location="args")
+    parser.add_argument("cursor", type=str, location="args")
+    parser.add_argument("fields", type=str, location="args")
+    parser.add_argument(
+        "approximate_total", type=inputs.boolean, location="args", default=False
+    )
+    return parser
+
+
+def _encode_cursor(values: List[Any]) -> str:
+    values = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def _decode_cursor(cursor: str, keys: List[Any]) -> List[Any]:
+    values = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    if not isinstance(values, list) or len(values) != len(keys):
+        raise ValueError("Invalid cursor.")
+
+    decoded = []
+    for key, value in zip(keys, values):
+        if isinstance(value, str) and key.type.python_type is datetime:
+            value = datetime.fromisoformat(value)
+        decoded.append(value)
+    return decoded
+
+
+def keyset_paginate(
+    query: query,
+    keys: List[Any],
+    cursor: Optional[str],
+    limit: int,
+    nulls_last: Iterable[Any] = (),
+) -> Tuple[List[Any], Optional[str]]:
+    """Gets a page of a query through keyset (cursor) pagination.
+
+    Contrary to offset pagination, getting a page does not get slower
+    the further the page is, nor does it need a COUNT(*) of the query,
+    rows are filtered on the keys of the last row of the previous page,
+    which can make use of an index on the keys.
+
+    Args:
+        query: Query to paginate, its ordering is replaced.
+        keys: Columns to order by, descending, the last key must make
+            the ordering unique, e.g. the primary key. A key can also be
+            a labeled expression, the rows must then have an attribute
+            named after the label, e.g. through `with_expression`.
+        cursor: The next_cursor of the previous page, None to get the
+            first page.
+        limit: Max number of rows of the page.
+        nulls_last: Keys that can be NULL, NULLs are sorted last. The
+            other keys are expected to not be NULL.
+
+    Returns:
+        The rows of the page and the cursor of the next page, None if
+        this is the last page.
+
+    Raises:
+        ValueError: If the cursor or the limit is invalid.
+
+    """
+    if limit <= 0:
+        raise ValueError("limit must be >= 1.")
+    nulls_last = {key.key for key in nulls_last}
+    # Labels are only known to the select they are part of, filter and
+    # order by the labeled expressions instead.
+    names = [key.key for key in keys]
+    keys = [key.element if isinstance(key, Label) else key for key in keys]
+
+    if cursor is not None:
+        values = _decode_cursor(cursor, keys)
+        # Rows after the cursor in lexicographic order, i.e. the first
+        # k keys are equal and the next one is after the cursor.
+        conditions = []
+        for i, (key, value) in enumerate(zip(keys, values)):
+            # Nothing is sorted after a NULL.
+            if value is not None:
+                after = key < value
+                if names[i] in nulls_last:
+                    after = or_(after, key.is_(None))
+                equal = [
+                    k.is_(None) if v is None else k == v
+                    for k, v in zip(keys[:i], values[:i])
+                ]
+                conditions.append(and_(*equal, after))
+        query = query.filter(or_(*conditions) if conditions else false())
+
+    query = query.order_by(None).order_by(
+        *[
+            nullslast(desc(key)) if name in nulls_last else desc(key)
+            for key, name in zip(keys, names)
+        ]
+    )
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor([getattr(rows[-1], name) for name in names])
+    return rows, next_cursor
+
+
+def get_approximate_count(query: query) -> int:
+    """Gets the number of rows of a query as estimated by the planner.
+
+    Avoids the cost of a COUNT(*), which has to go through all rows,
+    meant to give users an idea of the size of a listing.
+    """
+    statement = (
+        query.enable_eagerloads(False)
+        .order_by(None)
+        .statement.compile(dialect=db.engine.dialect)
+    )
+    plan = (
+        db.session.connection()
+        .exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement.string}", statement.params)
+        .scalar()
+    )
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def get_projection(
+    entity: Any, model: Model, fields: Optional[str], keys: Iterable[Any] = ()
+) -> Tuple[List[Any], Optional[List[str]]]:
+    """Gets the loader options to only load some fields of an entity.
+
+    Allows listing endpoints to avoid loading, e.g., large JSONB
+    columns or relationships that the client does not need.
+
+    Args:
+        entity: The db model being queried.
+        model: The schema model the entity is marshalled with.
+        fields: Comma separated names of the fields of `model` to
+            return, None to return all fields.
+        keys: Columns that must be loaded nevertheless, e.g. the keys of
+            `keyset_paginate`.
+
+    Returns:
+        The options to pass to the query and the list of fields, None
+        if all fields are to be returned.
+
+    Raises:
+        ValueError: If a field is not part of `model`.
+
+    """
+    if fields is None:
+        return [], None
+
+    fields = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in model]
+    if not fields or unknown:
+        raise ValueError(f"Invalid fields: {unknown}.")
+
+    mapper = inspect(entity)
+    columns = [key.key for key in keys] + [
+        field for field in fields if field in mapper.column_attrs.keys()
+    ]
+    options = [load_only(*[getattr(entity, column) for column in set(columns)])]
+    for relationship in mapper.relationships.keys():
+        if relationship not in fields:
+            options.append(noload(getattr(entity, relationship)))
+    return options, fields
+
+
+def get_listing_mask(key: str, fields: Optional[List[str]]) -> Optional[str]:
+    """Gets the marshalling mask of a listing, see `get_projection`."""
+    if fields is None:
+        return None
+    return f"{key}{{{','.join(fields)}}},pagination_data"
+
+
+# pg_trgm splits strings in trigrams, shorter tokens can't be searched
+# through a trigram index.
+_TRIGRAM_LENGTH = 3
+
+
+def _escape_like(token: str) -> str:
+    return token.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _tokenize_fuzzy_filter(fuzzy_filter: str) -> List[str]:
+    return fuzzy_filter.lower().split()
+
+
 def fuzzy_filter_non_interactive_pipeline_runs(
     query: query,
     fuzzy_filter: str,
 ) -> query:
+    """Filters job pipeline runs on their index, status and parameters.
 
-    fuzzy_filter = fuzzy_filter.lower().strip().split()
-    # Quote terms to avoid operators like ! leading to syntax errors and
-    # to avoid funny injections.
-    fuzzy_filter = [f"''{token}'':*" for token in fuzzy_filter]
-    fuzzy_filter = " & ".join(fuzzy_filter)
-    # sqlalchemy is erroneously considering the query created through
-    # func.to_tsquery invalid.
-    fuzzy_filter = f"to_tsquery('simple', '{fuzzy_filter}')"
-
-    filters = [
-        models.NonInteractivePipelineRun._NonInteractivePipelineRun__text_search_vector.op(  # noqa
-            "@@"
-        )(
-            text(fuzzy_filter)
-        ),
-    ]
-    query = query.filter(or_(*filters))
+    Every whitespace separated token of the filter must match. Tokens of
+    at least 3 characters match any substring of the searched document
+    through its trigram index, shorter ones have too few trigrams to
+    make use of it and match the start of a word through the text
+    search index instead, e.g. "1" matches run 12 but not run 21.
+    """
+    run = models.NonInteractivePipelineRun
+    document = run._NonInteractivePipelineRun__text_search_document
+    vector = run._NonInteractivePipelineRun__text_search_vector
+
+    filters = []
+    for token in _tokenize_fuzzy_filter(fuzzy_filter):
+        if len(token) >= _TRIGRAM_LENGTH:
+            filters.append(document.like(f"%{_escape_like(token)}%", escape="\\"))
+        else:
+            # Quote the token to avoid operators like ! leading to
+            # syntax errors, the token is passed as a bound parameter.
+            token = token.replace("\\", "\\\\").replace("'", "''")
+            filters.append(vector.op("@@")(func.to_tsquery("simple", f"'{token}':*")))
 
+    if filters:
+        query = query.filter(and_(*filters))
     return query
+
+
+def get_fuzzy_filter_rank(fuzzy_filter: str) -> Any:
+    """Gets the relevance of a job pipeline run for a fuzzy filter.
+
+    The rank is the trigram word similarity between the filter and the
+    searched document, see `fuzzy_filter_non_interactive_pipeline_runs`,
+    1 being an exact match of a word, to be used to sort by relevance.
+    """
+    run = models.NonInteractivePipelineRun
+    # word_similarity returns a real, which does not round trip through
+    # a float of a pagination cursor: the value of the cursor would not
+    # be equal to the rank it was taken from once compared to it.
+    return cast(
+        func.word_similarity(
+            " ".join(_tokenize_fuzzy_filter(fuzzy_filter)),
+            run._NonInteractivePipelineRun__text_search_document,
+        ),
+        DOUBLE_PRECISION,
+    )
@@ -1,5 +1,7 @@
 import datetime
 
+from kombu import Queue
+
 from _orchest.internals import config as _config
 
 
@@ -16,17 +18,72 @@ class Config:
     # TODO: for now this is put here.
     ORCHEST_API_ADDRESS = "http://orchest-api:80/api"
     ORCHEST_WEBSERVER_ADDRESS = "http://orchest-webserver:80"
+    AUTH_SERVER_ADDRESS = "http://auth-server:80"
+
+    # Max time the job scheduler sleeps between checks when the process
+    # is running as scheduler, in seconds. The scheduler wakes up when
+    # a job is due or when notified of a change to a job, this interval
+    # only bounds how late changes that are not notified are picked up.
+    SCHEDULER_MAX_SLEEP_INTERVAL = 300
 
-    # How often to run the scheduling logic when the process is running
-    # as scheduler, in seconds.
-    SCHEDULER_INTERVAL = 10
+    # How often to delete the job pipeline runs that are not to be
+    # retained, in seconds, and how many to delete per statement. See
+    # app/core/retention.py.
+    PIPELINE_RUNS_RETENTION_INTERVAL = 30
+    PIPELINE_RUNS_RETENTION_BATCH_SIZE = 500
 
     GPU_ENABLED_INSTANCE = _config.GPU_ENABLED_INSTANCE
 
+    # Whether environment and JupyterLab builds reuse the layers of
+    # previous builds, e.g. to not reinstall dependencies if the setup
+    # script and the files it references did not change.
+    ENVIRONMENT_BUILD_CACHE = True
+
+    # How often to look for base images of environments to pull ahead
+    # of builds, how often to pull present images again to get new
+    # versions of their tag and how long to wait before retrying a
+    # failed pull, in seconds. See app/core/image_warmup.py.
+    BASE_IMAGES_WARM_UP_INTERVAL = 60
+    BASE_IMAGES_REFRESH_INTERVAL = 6 * 3600
+    BASE_IMAGES_RETRY_INTERVAL = 600
+
+    # How long to wait before reconnecting to the docker daemon when
+    # the image events stream keeping the in-memory index of image
+    # docker ids current is interrupted, in seconds. See
+    # app/core/image_index.py.
+    IMAGE_INDEX_RECONNECT_INTERVAL = 5
+
+    # For how long the capabilities of an environment, e.g. GPU
+    # support, are cached by the workers running pipelines, in seconds.
+    ENVIRONMENT_CAPABILITIES_CACHE_TTL = 60
+
+    # How often to look for pre-warmed interactive sessions that have
+    # not been claimed, and after how long such sessions are stopped, in
+    # seconds. The size of the pool is given by
+    # INTERACTIVE_SESSIONS_POOL_SIZE in the global orchest config. See
+    # app/core/session_pool.py.
+    INTERACTIVE_SESSIONS_POOL_RECLAIM_INTERVAL = 60
+    INTERACTIVE_SESSIONS_POOL_IDLE_TIMEOUT = 30 * 60
+
+    # Priority of environment builds that do not request one, in the
+    # range [0, ENVIRONMENT_BUILDS_MAX_PRIORITY]. Pending builds with a
+    # higher priority are picked up first by the builds worker, builds
+    # of equal priority in order of request. The number of builds that
+    # run in parallel is given by MAX_BUILDS_PARALLELISM in the global
+    # orchest config.
+    ENVIRONMENT_BUILDS_DEFAULT_PRIORITY = 5
+    ENVIRONMENT_BUILDS_MAX_PRIORITY = 9
+
     # Used to decide when client heartbeats are too old to represent
     # activity.
     CLIENT_HEARTBEATS_IDLENESS_THRESHOLD = datetime.timedelta(minutes=30)
 
+    # For how long the busy state of the kernels of a session, reported
+    # by its session-sidecar, is trusted by the idleness check. The
+    # sidecar reports at least every 30 seconds, sessions without a
+    # recent report have their Jupyter server queried instead.
+    KERNELS_ACTIVITY_REPORT_TTL = datetime.timedelta(seconds=90)
+
     # ---- Celery configurations ----
     # NOTE: the configurations have to be lowercase.
     # NOTE: Flask will not configure lowercase variables. Therefore the
@@ -55,11 +112,20 @@ class Config:
     imports = ("app.core.tasks",)
     task_create_missing_queues = True
     task_default_queue = "celery"
+    # Environment builds have their own queue because RabbitMQ only
+    # honours message priorities for queues declared with a max
+    # priority, which can't be changed for the existing "builds" queue.
+    task_queues = (
+        Queue(
+            "environment_builds",
+            max_priority=ENVIRONMENT_BUILDS_MAX_PRIORITY,
+        ),
+    )
     task_routes = {
         "app.core.tasks.start_non_interactive_pipeline_run": {"queue": "jobs"},
         "app.core.tasks.delete_job_pipeline_run_directories": {"queue": "jobs"},
         "app.core.tasks.run_pipeline": {"queue": "celery"},
-        "app.core.tasks.build_environment": {"queue": "builds"},
+        "app.core.tasks.build_environment": {"queue": "environment_builds"},
         "app.core.tasks.build_jupyter": {"queue": "builds"},
     }
 
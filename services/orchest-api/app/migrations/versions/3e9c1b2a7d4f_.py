@@ -0,0 +1,28 @@
+"""Add priority to environment_builds
+
+Revision ID: 3e9c1b2a7d4f
+Revises: 97e836f74622
+Create Date: 2022-01-20 10:12:41.318402
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3e9c1b2a7d4f"
+down_revision = "97e836f74622"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "environment_builds",
+        sa.Column(
+            "priority", sa.Integer(), server_default=sa.text("5"), nullable=False
+        ),
+    )
+
+
+def downgrade():
+    op.drop_column("environment_builds", "priority")
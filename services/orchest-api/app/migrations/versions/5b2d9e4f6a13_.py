@@ -0,0 +1,33 @@
+"""Add busy_kernels and kernels_reported_time to interactive_sessions
+
+Revision ID: 5b2d9e4f6a13
+Revises: c4e8a1f7b3d2
+Create Date: 2022-01-27 14:22:05.671930
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "5b2d9e4f6a13"
+down_revision = "c4e8a1f7b3d2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "interactive_sessions", sa.Column("busy_kernels", sa.Boolean(), nullable=True)
+    )
+    op.add_column(
+        "interactive_sessions",
+        sa.Column(
+            "kernels_reported_time", postgresql.TIMESTAMP(timezone=True), nullable=True
+        ),
+    )
+
+
+def downgrade():
+    op.drop_column("interactive_sessions", "kernels_reported_time")
+    op.drop_column("interactive_sessions", "busy_kernels")
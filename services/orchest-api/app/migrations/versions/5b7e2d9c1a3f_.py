@@ -0,0 +1,31 @@
+"""Add launch_timings to interactive_sessions
+
+Revision ID: 5b7e2d9c1a3f
+Revises: 3e9c1b2a7d4f
+Create Date: 2022-01-21 15:40:07.902113
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "5b7e2d9c1a3f"
+down_revision = "3e9c1b2a7d4f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "interactive_sessions",
+        sa.Column(
+            "launch_timings",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=True,
+        ),
+    )
+
+
+def downgrade():
+    op.drop_column("interactive_sessions", "launch_timings")
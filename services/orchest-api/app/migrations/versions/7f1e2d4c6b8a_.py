@@ -0,0 +1,60 @@
+"""Add a trigram index for the text search of job pipeline runs
+
+Also recreates ix_job_pipeline_runs_text_search, its CASE expression was
+not in the same order as the one of the model, which kept the planner
+from using it.
+
+Revision ID: 7f1e2d4c6b8a
+Revises: 9a7c3e5b1d24
+Create Date: 2022-01-31 16:48:12.530248
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7f1e2d4c6b8a"
+down_revision = "9a7c3e5b1d24"
+branch_labels = None
+depends_on = None
+
+_DOCUMENT = "lower(CAST(pipeline_run_index AS TEXT)) || ' ' || CASE WHEN (status = 'ABORTED') THEN 'cancelled' WHEN (status = 'FAILURE') THEN 'failed' WHEN (status = 'STARTED') THEN 'running' ELSE lower(status) END || ' ' || lower(CAST(parameters_text_search_values AS TEXT))"  # noqa
+
+_OLD_DOCUMENT = "lower(CAST(pipeline_run_index AS TEXT)) || ' ' || CASE WHEN (status = 'STARTED') THEN 'running' WHEN (status = 'ABORTED') THEN 'cancelled' WHEN (status = 'FAILURE') THEN 'failed' ELSE lower(status) END || ' ' || lower(CAST(parameters_text_search_values AS TEXT))"  # noqa
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    op.drop_index(
+        "ix_job_pipeline_runs_text_search",
+        table_name="pipeline_runs",
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "ix_job_pipeline_runs_text_search",
+        "pipeline_runs",
+        [sa.text(f"to_tsvector('simple', {_DOCUMENT})")],
+        unique=False,
+        postgresql_using="gin",
+    )
+    op.execute(
+        "CREATE INDEX ix_job_pipeline_runs_text_search_trgm ON pipeline_runs "
+        f"USING gin (({_DOCUMENT}) gin_trgm_ops)"
+    )
+
+
+def downgrade():
+    op.drop_index("ix_job_pipeline_runs_text_search_trgm", table_name="pipeline_runs")
+    op.drop_index(
+        "ix_job_pipeline_runs_text_search",
+        table_name="pipeline_runs",
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "ix_job_pipeline_runs_text_search",
+        "pipeline_runs",
+        [sa.text(f"to_tsvector('simple', {_OLD_DOCUMENT})")],
+        unique=False,
+        postgresql_using="gin",
+    )
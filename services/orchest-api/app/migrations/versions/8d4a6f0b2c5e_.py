@@ -0,0 +1,29 @@
+"""Add prewarmed_time to interactive_sessions
+
+Revision ID: 8d4a6f0b2c5e
+Revises: 5b7e2d9c1a3f
+Create Date: 2022-01-24 11:03:52.614270
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "8d4a6f0b2c5e"
+down_revision = "5b7e2d9c1a3f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "interactive_sessions",
+        sa.Column(
+            "prewarmed_time", postgresql.TIMESTAMP(timezone=True), nullable=True
+        ),
+    )
+
+
+def downgrade():
+    op.drop_column("interactive_sessions", "prewarmed_time")
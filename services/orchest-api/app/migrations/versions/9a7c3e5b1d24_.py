@@ -0,0 +1,127 @@
+"""Add job_pipeline_run_status_counts, maintained through triggers
+
+Revision ID: 9a7c3e5b1d24
+Revises: 5b2d9e4f6a13
+Create Date: 2022-01-28 11:05:37.902114
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9a7c3e5b1d24"
+down_revision = "5b2d9e4f6a13"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "job_pipeline_run_status_counts",
+        sa.Column("job_uuid", sa.String(length=36), nullable=False),
+        sa.Column("status", sa.String(length=15), nullable=False),
+        sa.Column("count", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["job_uuid"],
+            ["jobs.uuid"],
+            name=op.f("fk_job_pipeline_run_status_counts_job_uuid_jobs"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint(
+            "job_uuid", "status", name=op.f("pk_job_pipeline_run_status_counts")
+        ),
+    )
+
+    # Statement level triggers, so that bulk inserts, e.g. the runs of a
+    # job run, and bulk deletes, e.g. by the retention compactor, update
+    # every count once per statement. Rows are upserted in a consistent
+    # order to avoid deadlocks between statements.
+    # Deleted runs only decrement existing counts, when a job is
+    # deleted its counts might already have been deleted through the
+    # cascade, inserting them would violate the foreign key.
+    op.execute(
+        """
+        CREATE FUNCTION update_job_pipeline_run_status_counts() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO job_pipeline_run_status_counts AS c
+                    (job_uuid, status, count)
+                SELECT job_uuid, status, count(*)
+                FROM new_runs
+                WHERE job_uuid IS NOT NULL AND status IS NOT NULL
+                GROUP BY job_uuid, status
+                ORDER BY job_uuid, status
+                ON CONFLICT (job_uuid, status)
+                DO UPDATE SET count = c.count + EXCLUDED.count;
+            ELSIF TG_OP = 'UPDATE' THEN
+                INSERT INTO job_pipeline_run_status_counts AS c
+                    (job_uuid, status, count)
+                SELECT job_uuid, status, sum(delta)
+                FROM (
+                    SELECT job_uuid, status, 1 AS delta FROM new_runs
+                    UNION ALL
+                    SELECT job_uuid, status, -1 AS delta FROM old_runs
+                ) AS changes
+                WHERE job_uuid IS NOT NULL AND status IS NOT NULL
+                GROUP BY job_uuid, status
+                HAVING sum(delta) <> 0
+                ORDER BY job_uuid, status
+                ON CONFLICT (job_uuid, status)
+                DO UPDATE SET count = c.count + EXCLUDED.count;
+            ELSE
+                UPDATE job_pipeline_run_status_counts AS c
+                SET count = c.count - deleted.count
+                FROM (
+                    SELECT job_uuid, status, count(*) AS count
+                    FROM old_runs
+                    WHERE job_uuid IS NOT NULL AND status IS NOT NULL
+                    GROUP BY job_uuid, status
+                ) AS deleted
+                WHERE c.job_uuid = deleted.job_uuid AND c.status = deleted.status;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+    )
+    # Transition tables can't be used by triggers with multiple events.
+    op.execute(
+        """
+        CREATE TRIGGER pipeline_runs_insert_job_status_counts
+        AFTER INSERT ON pipeline_runs
+        REFERENCING NEW TABLE AS new_runs
+        FOR EACH STATEMENT EXECUTE FUNCTION update_job_pipeline_run_status_counts();
+
+        CREATE TRIGGER pipeline_runs_update_job_status_counts
+        AFTER UPDATE ON pipeline_runs
+        REFERENCING OLD TABLE AS old_runs NEW TABLE AS new_runs
+        FOR EACH STATEMENT EXECUTE FUNCTION update_job_pipeline_run_status_counts();
+
+        CREATE TRIGGER pipeline_runs_delete_job_status_counts
+        AFTER DELETE ON pipeline_runs
+        REFERENCING OLD TABLE AS old_runs
+        FOR EACH STATEMENT EXECUTE FUNCTION update_job_pipeline_run_status_counts();
+        """
+    )
+
+    op.execute(
+        """
+        INSERT INTO job_pipeline_run_status_counts (job_uuid, status, count)
+        SELECT job_uuid, status, count(*)
+        FROM pipeline_runs
+        WHERE job_uuid IS NOT NULL AND status IS NOT NULL
+        GROUP BY job_uuid, status;
+        """
+    )
+
+
+def downgrade():
+    op.execute(
+        """
+        DROP TRIGGER pipeline_runs_delete_job_status_counts ON pipeline_runs;
+        DROP TRIGGER pipeline_runs_update_job_status_counts ON pipeline_runs;
+        DROP TRIGGER pipeline_runs_insert_job_status_counts ON pipeline_runs;
+        DROP FUNCTION update_job_pipeline_run_status_counts();
+        """
+    )
+    op.drop_table("job_pipeline_run_status_counts")
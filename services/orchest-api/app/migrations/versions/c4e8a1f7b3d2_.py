@@ -0,0 +1,43 @@
+"""Add indexes for the keyset pagination of runs and jobs
+
+Revision ID: c4e8a1f7b3d2
+Revises: 8d4a6f0b2c5e
+Create Date: 2022-01-26 09:41:18.203517
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c4e8a1f7b3d2"
+down_revision = "8d4a6f0b2c5e"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_pipeline_runs_project_uuid_pipeline_uuid_started_time_uuid",
+        "pipeline_runs",
+        [
+            "project_uuid",
+            "pipeline_uuid",
+            sa.text("started_time DESC NULLS LAST"),
+            sa.text("uuid DESC"),
+        ],
+        unique=False,
+    )
+    op.create_index(
+        "ix_jobs_project_uuid_created_time_uuid",
+        "jobs",
+        ["project_uuid", "created_time", "uuid"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_jobs_project_uuid_created_time_uuid", table_name="jobs")
+    op.drop_index(
+        "ix_pipeline_runs_project_uuid_pipeline_uuid_started_time_uuid",
+        table_name="pipeline_runs",
+    )
@@ -14,6 +14,7 @@ from tests.test_utils import (
     Project,
 )
 
+import app.core.retention
 import app.core.sessions
 from _orchest.internals.test_utils import AbortableAsyncResultMock, CeleryMock, gen_uuid
 from app import create_app
@@ -31,7 +32,12 @@ from config import CONFIG_CLASS
 def celery(monkeypatch):
     """Mock celery and access added and revoked tasks."""
     celery = CeleryMock()
-    for module in [namespace_environment_builds, namespace_runs, namespace_jobs]:
+    for module in [
+        namespace_environment_builds,
+        namespace_runs,
+        namespace_jobs,
+        app.core.retention,
+    ]:
         monkeypatch.setattr(module, "make_celery", lambda *args, **kwargs: celery)
     return celery
 
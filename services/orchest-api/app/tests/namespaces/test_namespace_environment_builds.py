@@ -37,6 +37,29 @@ def test_environmentbuildlist_post_same(client, celery, project):
     assert data["failed_requests"] is None
 
 
+def test_environmentbuildlist_post_priority(client, celery, project):
+    req = create_env_build_request(project.uuid, 3)
+    req["environment_build_requests"][1]["priority"] = 9
+    req["environment_build_requests"][2]["priority"] = 0
+    client.post("/api/environment-builds/", json=req)
+
+    data = client.get("/api/environment-builds/").get_json()["environment_builds"]
+    positions = {build["environment_uuid"]: build["queue_position"] for build in data}
+    envs = [r["environment_uuid"] for r in req["environment_build_requests"]]
+    assert [positions[env] for env in envs] == [2, 1, 3]
+
+    priorities = sorted(kwargs["priority"] for _, kwargs in celery.tasks)
+    assert priorities == [0, 5, 9]
+
+
+def test_environmentbuildlist_post_invalid_priority(client, celery, project):
+    req = create_env_build_request(project.uuid, 1)
+    req["environment_build_requests"][0]["priority"] = 100
+    resp = client.post("/api/environment-builds/", json=req)
+    assert resp.status_code == 400
+    assert not celery.tasks
+
+
 def test_environmentbuildlist_post_with_error1(client, project, monkeypatch):
     monkeypatch.setattr(
         namespace_environment_builds, "make_celery", raise_exception_function()
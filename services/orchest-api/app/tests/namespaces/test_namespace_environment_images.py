@@ -1,6 +1,10 @@
+import json
+
+import docker
 from tests.test_utils import create_env_build_request
 
 from app.apis import namespace_environment_images
+from app.core import image_warmup
 
 
 def test_environmentimage_delete_non_existent(client):
@@ -77,3 +81,47 @@ def test_environmentimageinuse_get(client):
 def test_projectenvironmentdanglingimages_delete(client):
     resp = client.delete("/api/environment-images/dangling/proj_uuid/env_uuid")
     assert resp.status_code == 200
+
+
+def test_baseimagelist_warm_up(client, monkeypatch, tmp_path):
+    for env_uuid, base_image in [
+        ("env-1", "orchest/base-kernel-py"),
+        ("env-2", "orchest/base-kernel-py"),
+        ("env-3", "my/base-image"),
+    ]:
+        env_dir = tmp_path / "project" / ".orchest" / "environments" / env_uuid
+        env_dir.mkdir(parents=True)
+        (env_dir / "properties.json").write_text(json.dumps({"base_image": base_image}))
+    monkeypatch.setattr(
+        image_warmup,
+        "_ENVIRONMENTS_PROPERTIES_GLOB",
+        str(tmp_path / "*" / ".orchest" / "environments" / "*" / "properties.json"),
+    )
+
+    present_images = {"orchest/base-kernel-py"}
+    pulled_images = []
+
+    class MockImages:
+        def get(self, name):
+            if name not in present_images:
+                raise docker.errors.ImageNotFound("error")
+            return type("Image", (), {"id": f"id-{name}"})
+
+    def mock_pull_base_image(name, refresh=False):
+        pulled_images.append(name)
+        present_images.add(name)
+
+    monkeypatch.setattr(
+        image_warmup, "docker_client", type("Client", (), {"images": MockImages()})
+    )
+    monkeypatch.setattr(image_warmup, "pull_base_image", mock_pull_base_image)
+
+    resp = client.post("/api/environment-images/base-images")
+    assert resp.status_code == 202
+    assert pulled_images == ["my/base-image"]
+
+    data = client.get("/api/environment-images/base-images").get_json()["base_images"]
+    assert [(img["image"], img["environments"], img["status"]) for img in data] == [
+        ("my/base-image", 1, "PRESENT"),
+        ("orchest/base-kernel-py", 2, "PRESENT"),
+    ]
@@ -7,6 +7,8 @@ from _orchest.internals.test_utils import raise_exception_function
 from _orchest.internals.two_phase_executor import TwoPhaseExecutor
 from app.apis import namespace_jobs
 from app.connections import db
+from app.core.retention import RetentionCompactor
+from app.core.scheduler import Scheduler
 
 
 @pytest.mark.parametrize(
@@ -95,6 +97,56 @@ def test_joblist_get(client, pipeline):
             assert job["env_variables"] is None
 
 
+def test_joblist_get_keyset_pagination(client, pipeline):
+    for _ in range(3):
+        job_spec = create_job_spec(pipeline.project.uuid, pipeline.uuid)
+        client.post("/api/jobs/", json=job_spec)
+
+    jobs = []
+    query_string = {"limit": 2, "fields": "uuid,status"}
+    for expected_length in [2, 1]:
+        data = client.get("/api/jobs/", query_string=query_string).get_json()
+        assert len(data["jobs"]) == expected_length
+        for job in data["jobs"]:
+            assert set(job) == {"uuid", "status"}
+        jobs.extend(data["jobs"])
+        query_string["cursor"] = data["pagination_data"]["next_cursor"]
+
+    assert query_string["cursor"] is None
+    assert len({job["uuid"] for job in jobs}) == 3
+
+
+@pytest.mark.parametrize(
+    "query_string",
+    [{"limit": 0}, {"limit": 1, "cursor": "invalid"}, {"fields": "not_a_field"}],
+    ids=["limit", "cursor", "fields"],
+)
+def test_joblist_get_invalid_pagination(client, pipeline, query_string):
+    job_spec = create_job_spec(pipeline.project.uuid, pipeline.uuid)
+    client.post("/api/jobs/", json=job_spec)
+
+    resp = client.get("/api/jobs/", query_string=query_string)
+    assert resp.status_code == 400
+
+
+def test_job_counts_get(client, pipeline):
+    for _ in range(2):
+        job_spec = create_job_spec(pipeline.project.uuid, pipeline.uuid)
+        client.post("/api/jobs/", json=job_spec)
+
+    for query_string, expected_counts in [
+        ({}, [{"project_uuid": pipeline.project.uuid, "count": 2}]),
+        (
+            {"project_uuid": pipeline.project.uuid},
+            [{"project_uuid": pipeline.project.uuid, "count": 2}],
+        ),
+        ({"project_uuid": "proj"}, []),
+    ]:
+        resp = client.get("/api/jobs/counts", query_string=query_string)
+        assert resp.status_code == 200
+        assert resp.get_json()["counts"] == expected_counts
+
+
 def test_job_get_empty(client):
     resp = client.get("/api/jobs/uuid")
     assert resp.status_code == 404
@@ -323,6 +375,84 @@ def test_job_delete_running_job(
             assert step["status"] == "ABORTED"
 
 
+def test_job_get_pipeline_run_status_counts(
+    client, celery, pipeline, abortable_async_res
+):
+    job_spec = create_job_spec(pipeline.project.uuid, pipeline.uuid)
+    job_uuid = client.post("/api/jobs/", json=job_spec).get_json()["uuid"]
+    query = {"aggregate_run_statuses": "true"}
+
+    job = client.get(f"/api/jobs/{job_uuid}", query_string=query).get_json()
+    assert job["pipeline_run_status_counts"] == {}
+
+    client.put(f"/api/jobs/{job_uuid}", json={"confirm_draft": True})
+    n_runs = len(
+        client.get(f"/api/jobs/{job_uuid}/pipeline_runs").get_json()["pipeline_runs"]
+    )
+    assert n_runs > 0
+    job = client.get(f"/api/jobs/{job_uuid}", query_string=query).get_json()
+    assert job["pipeline_run_status_counts"] == {"PENDING": n_runs}
+
+    jobs = client.get("/api/jobs/", query_string=query).get_json()["jobs"]
+    assert jobs[0]["pipeline_run_status_counts"] == {"PENDING": n_runs}
+
+    client.delete(f"/api/jobs/{job_uuid}")
+    job = client.get(f"/api/jobs/{job_uuid}", query_string=query).get_json()
+    assert job["pipeline_run_status_counts"] == {"ABORTED": n_runs}
+
+
+def test_job_get_not_modified(client, pipeline):
+    job_spec = create_job_spec(pipeline.project.uuid, pipeline.uuid)
+    job_uuid = client.post("/api/jobs/", json=job_spec).get_json()["uuid"]
+
+    resp = client.get(f"/api/jobs/{job_uuid}")
+    assert resp.status_code == 200
+    etag = resp.headers["ETag"]
+
+    resp = client.get(f"/api/jobs/{job_uuid}", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+
+    client.put(f"/api/jobs/{job_uuid}", json={"name": "new-name"})
+    resp = client.get(f"/api/jobs/{job_uuid}", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.get_json()["name"] == "new-name"
+
+
+def test_scheduler_run_job_failure(client, celery, pipeline, monkeypatch):
+    scheduled_start = datetime.datetime.now(
+        datetime.timezone.utc
+    ) - datetime.timedelta(minutes=1)
+    job_spec = create_job_spec(
+        pipeline.project.uuid,
+        pipeline.uuid,
+        scheduled_start=scheduled_start.isoformat(),
+    )
+    job_uuid = client.post("/api/jobs/", json=job_spec).get_json()["uuid"]
+    client.put(f"/api/jobs/{job_uuid}", json={"confirm_draft": True})
+
+    with monkeypatch.context() as m:
+        m.setattr(namespace_jobs.RunJob, "_transaction", raise_exception_function())
+        failed = Scheduler.check_for_jobs_to_be_scheduled(client.application)
+    assert failed == {job_uuid}
+
+    # The job has not been run and is still due.
+    job = client.get(f"/api/jobs/{job_uuid}").get_json()
+    assert job["status"] == "PENDING"
+    assert job["next_scheduled_time"] is not None
+    assert not client.get(f"/api/jobs/{job_uuid}/pipeline_runs").get_json()[
+        "pipeline_runs"
+    ]
+
+    assert Scheduler.check_for_jobs_to_be_scheduled(client.application) == set()
+
+    job = client.get(f"/api/jobs/{job_uuid}").get_json()
+    assert job["status"] == "STARTED"
+    assert job["next_scheduled_time"] is None
+    assert client.get(f"/api/jobs/{job_uuid}/pipeline_runs").get_json()[
+        "pipeline_runs"
+    ]
+
+
 def test_jobdeletion_delete_non_existent(client):
     assert client.delete("/api/jobs/cleanup/job_uuid").status_code == 404
 
@@ -379,6 +509,103 @@ def test_pipelinerun_set(client, celery, pipeline):
     assert client.get(f"/api/jobs/{job_uuid}").get_json()["status"] == "SUCCESS"
 
 
+def test_pipelineruns_get_keyset_pagination(client, celery, pipeline):
+    job_spec = create_job_spec(
+        pipeline.project.uuid, pipeline.uuid, parameters=[{}, {}, {}]
+    )
+    job_uuid = client.post("/api/jobs/", json=job_spec).get_json()["uuid"]
+    client.put(f"/api/jobs/{job_uuid}", json={"confirm_draft": True})
+
+    runs = []
+    query_string = {"limit": 2, "fields": "uuid,job_run_pipeline_run_index"}
+    for expected_length in [2, 1]:
+        data = client.get(
+            f"/api/jobs/{job_uuid}/pipeline_runs", query_string=query_string
+        ).get_json()
+        assert len(data["pipeline_runs"]) == expected_length
+        for run in data["pipeline_runs"]:
+            assert set(run) == {"uuid", "job_run_pipeline_run_index"}
+        runs.extend(data["pipeline_runs"])
+        query_string["cursor"] = data["pagination_data"]["next_cursor"]
+
+    assert query_string["cursor"] is None
+    # Newest first.
+    assert [run["job_run_pipeline_run_index"] for run in runs] == [2, 1, 0]
+
+
+@pytest.mark.parametrize(
+    "query_string",
+    [
+        {"limit": 0},
+        {"limit": 1, "cursor": "invalid"},
+        {"fields": "not_a_field"},
+        {"limit": 1, "page": 1, "page_size": 1},
+    ],
+    ids=["limit", "cursor", "fields", "limit-and-page"],
+)
+def test_pipelineruns_get_invalid_pagination(client, celery, pipeline, query_string):
+    job_spec = create_job_spec(pipeline.project.uuid, pipeline.uuid)
+    job_uuid = client.post("/api/jobs/", json=job_spec).get_json()["uuid"]
+    client.put(f"/api/jobs/{job_uuid}", json={"confirm_draft": True})
+
+    resp = client.get(f"/api/jobs/{job_uuid}/pipeline_runs", query_string=query_string)
+    assert resp.status_code == 400
+
+
+def test_pipelineruns_get_fuzzy_filter(client, celery, pipeline):
+    names = ["alpha", "alphabet", "alphabets", "beta"]
+    parameters = [{"uuid-0": {"name": name}} for name in names]
+    job_spec = create_job_spec(
+        pipeline.project.uuid, pipeline.uuid, parameters=parameters
+    )
+    job_uuid = client.post("/api/jobs/", json=job_spec).get_json()["uuid"]
+    client.put(f"/api/jobs/{job_uuid}", json={"confirm_draft": True})
+
+    def get_names(**query_string):
+        resp = client.get(
+            f"/api/jobs/{job_uuid}/pipeline_runs", query_string=query_string
+        )
+        assert resp.status_code == 200
+        data = resp.get_json()
+        names = [run["parameters"]["uuid-0"]["name"] for run in data["pipeline_runs"]]
+        return names, data.get("pagination_data", {}).get("next_cursor")
+
+    # Substrings of at least 3 characters, case insensitive.
+    assert get_names(fuzzy_filter="LPHA")[0] == ["alphabets", "alphabet", "alpha"]
+    assert get_names(fuzzy_filter="lpha pending")[0] == [
+        "alphabets",
+        "alphabet",
+        "alpha",
+    ]
+    # Shorter tokens match the start of words.
+    assert get_names(fuzzy_filter="be")[0] == ["beta"]
+    assert get_names(fuzzy_filter="ta")[0] == []
+    # LIKE wildcards are matched literally.
+    assert get_names(fuzzy_filter="a_p%")[0] == []
+
+    # "alphabet" and "alphabets" share a rank that is not exactly
+    # representable, paginating past it must not repeat nor skip runs.
+    pages = []
+    names, cursor = get_names(fuzzy_filter="alpha", sort="relevance", limit=1)
+    pages.append(names)
+    while cursor is not None:
+        names, cursor = get_names(
+            fuzzy_filter="alpha", sort="relevance", limit=1, cursor=cursor
+        )
+        pages.append(names)
+    assert pages[0] == ["alpha"]
+    assert sorted(pages[1:]) == [["alphabet"], ["alphabets"]]
+
+
+def test_pipelineruns_get_invalid_sort(client, celery, pipeline):
+    job_spec = create_job_spec(pipeline.project.uuid, pipeline.uuid)
+    job_uuid = client.post("/api/jobs/", json=job_spec).get_json()["uuid"]
+
+    url = f"/api/jobs/{job_uuid}/pipeline_runs"
+    assert client.get(url, query_string={"sort": "relevance"}).status_code == 400
+    assert client.get(url, query_string={"sort": "oldest"}).status_code == 400
+
+
 def test_pipelinerun_delete_non_existent(client, celery):
     assert client.delete("/api/jobs/job_uuid/pipeline_uuid").status_code == 404
 
@@ -581,6 +808,9 @@ def test_delete_non_retained_job_pipeline_runs_on_job_run_retain_all(
         with TwoPhaseExecutor(db.session) as tpe:
             namespace_jobs.RunJob(tpe).transaction(job_uuid)
 
+    # Non retained runs are deleted in the background.
+    RetentionCompactor.compact(test_app)
+
     # The previously existing pipeline runs should still be there.
     pipeline_runs = client.get(f"/api/jobs/{job_uuid}/pipeline_runs").get_json()[
         "pipeline_runs"
@@ -646,6 +876,9 @@ def test_delete_non_retained_job_pipeline_runs_on_job_run_retain_n(
         with TwoPhaseExecutor(db.session) as tpe:
             namespace_jobs.RunJob(tpe).transaction(job_uuid)
 
+    # Non retained runs are deleted in the background.
+    RetentionCompactor.compact(test_app)
+
     pipeline_runs = client.get(f"/api/jobs/{job_uuid}/pipeline_runs").get_json()[
         "pipeline_runs"
     ]
@@ -696,6 +929,10 @@ def test_delete_non_retained_job_pipeline_runs_on_job_run_update_retain_all(
                 "finished_time": datetime.datetime.now().isoformat(),
             },
         )
+
+    # Non retained runs are deleted in the background.
+    RetentionCompactor.compact(test_app)
+
     pipeline_runs = client.get(f"/api/jobs/{job_uuid}/pipeline_runs").get_json()[
         "pipeline_runs"
     ]
@@ -754,6 +991,15 @@ def test_delete_non_retained_job_pipeline_runs_on_job_run_update_retain_n(
 
     expected_deleted_runs_n = max(0, 3 - max_retained_pipeline_runs)
 
+    backlog = client.get("/api/jobs/retention_backlog").get_json()
+    assert backlog["pipeline_runs"] == expected_deleted_runs_n
+
+    # Non retained runs are deleted in the background.
+    RetentionCompactor.compact(test_app)
+    backlog = client.get("/api/jobs/retention_backlog").get_json()
+    assert backlog["pipeline_runs"] == 0
+    assert backlog["last_compaction_deleted_pipeline_runs"] == expected_deleted_runs_n
+
     pipeline_runs.sort(key=lambda x: x["pipeline_run_index"])
     expected_deleted_run_uuids = set(
         [run["uuid"] for run in pipeline_runs[:expected_deleted_runs_n]]
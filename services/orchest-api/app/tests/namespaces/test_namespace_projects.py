@@ -64,6 +64,21 @@ def test_project_put(client):
     assert data == project
 
 
+def test_projects_overview_get(client, interactive_session, job):
+    other_project = {"uuid": gen_uuid(), "env_variables": {}}
+    client.post("/api/projects/", json=other_project)
+
+    data = client.get("/api/projects/overview").get_json()["projects"]
+
+    assert sorted(data, key=lambda p: p["uuid"]) == sorted(
+        [
+            {"uuid": job.project.uuid, "job_count": 1, "session_count": 1},
+            {"uuid": other_project["uuid"], "job_count": 0, "session_count": 0},
+        ],
+        key=lambda p: p["uuid"],
+    )
+
+
 def test_project_delete_non_existing(client):
     resp = client.delete(f"/api/projects/{gen_uuid()}")
 
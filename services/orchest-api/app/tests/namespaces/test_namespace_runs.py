@@ -87,6 +87,37 @@ def test_runlist_get(client, celery, pipeline):
         assert len(resp.get_json()["runs"]) == expected_length
 
 
+def test_runlist_get_keyset_pagination(client, celery, pipeline):
+    for _ in range(3):
+        client.post(
+            "/api/runs/",
+            json=create_pipeline_run_spec(pipeline.project.uuid, pipeline.uuid),
+        )
+
+    runs = []
+    query_string = {"limit": 2, "fields": "uuid,status"}
+    for expected_length in [2, 1]:
+        data = client.get("/api/runs/", query_string=query_string).get_json()
+        assert len(data["runs"]) == expected_length
+        for run in data["runs"]:
+            assert set(run) == {"uuid", "status"}
+        runs.extend(data["runs"])
+        query_string["cursor"] = data["pagination_data"]["next_cursor"]
+
+    assert query_string["cursor"] is None
+    assert len({run["uuid"] for run in runs}) == 3
+
+
+@pytest.mark.parametrize(
+    "query_string",
+    [{"limit": 0}, {"limit": 1, "cursor": "invalid"}, {"fields": "not_a_field"}],
+    ids=["limit", "cursor", "fields"],
+)
+def test_runlist_get_invalid_pagination(client, query_string):
+    resp = client.get("/api/runs/", query_string=query_string)
+    assert resp.status_code == 400
+
+
 def test_run_delete_not_existing(client):
     resp = client.delete("/api/runs/run_uuid")
     assert resp.status_code == 400
@@ -36,6 +36,8 @@ def test_sessionlist_post_is_launching(client, pipeline, monkeypatch):
         "jupyter_server_ip": None,
         "notebook_server_info": {"port": 8888, "base_url": "/"},
         "user_services": {},
+        "launch_timings": None,
+        "prewarmed_time": None,
     }
 
     assert data == expected
@@ -75,6 +77,68 @@ def test_sessionlist_post_revert(client, pipeline, monkeypatch):
     assert resp.status_code == 404
 
 
+def test_sessionlist_post_claims_prewarmed_session(
+    client, pipeline, monkeypatch_interactive_session
+):
+    pipeline_spec = {
+        "project_uuid": pipeline.project.uuid,
+        "pipeline_uuid": pipeline.uuid,
+        "pipeline_path": "pip_path",
+        "project_dir": "project_dir",
+        "host_userdir": "host_userdir",
+    }
+
+    resp = client.post("/api/sessions/", json={**pipeline_spec, "prewarm": True})
+    assert resp.status_code == 201
+    assert resp.get_json()["prewarmed_time"] is not None
+
+    # Not shown to users until claimed.
+    data = client.get("/api/sessions/").get_json()
+    assert data == {"sessions": []}
+    query = {"include_prewarmed": "true"}
+    data = client.get("/api/sessions/", query_string=query).get_json()
+    assert len(data["sessions"]) == 1
+
+    # Pre-warming again does not claim it.
+    resp = client.post("/api/sessions/", json={**pipeline_spec, "prewarm": True})
+    assert resp.status_code == 409
+
+    resp = client.post("/api/sessions/", json=pipeline_spec)
+    assert resp.status_code == 200
+    assert resp.get_json()["status"] == "RUNNING"
+    assert resp.get_json()["prewarmed_time"] is None
+
+    data = client.get("/api/sessions/").get_json()
+    assert len(data["sessions"]) == 1
+
+    resp = client.post("/api/sessions/", json=pipeline_spec)
+    assert resp.status_code == 409
+
+
+def test_sessioncounts_get(client, pipeline, monkeypatch_interactive_session):
+    pipeline_spec = {
+        "project_uuid": pipeline.project.uuid,
+        "pipeline_uuid": pipeline.uuid,
+        "pipeline_path": "pip_path",
+        "project_dir": "project_dir",
+        "host_userdir": "host_userdir",
+    }
+    assert client.get("/api/sessions/counts").get_json() == {"counts": []}
+
+    # Pre-warmed sessions are not counted.
+    client.post("/api/sessions/", json={**pipeline_spec, "prewarm": True})
+    assert client.get("/api/sessions/counts").get_json() == {"counts": []}
+
+    client.post("/api/sessions/", json=pipeline_spec)
+    expected = {"counts": [{"project_uuid": pipeline.project.uuid, "count": 1}]}
+    assert client.get("/api/sessions/counts").get_json() == expected
+    query = {"project_uuid": "proj"}
+    data = client.get("/api/sessions/counts", query_string=query).get_json()
+    assert data == {"counts": []}
+
+    assert client.post("/api/sessions/counts", json=pipeline_spec).status_code == 405
+
+
 def test_session_put(client, pipeline, monkeypatch_interactive_session, monkeypatch):
     pipeline_spec = {
         "project_uuid": pipeline.project.uuid,
@@ -135,6 +199,40 @@ def test_session_put_non_existent(client):
     assert resp.status_code == 500
 
 
+def test_session_kernels_put(client, interactive_session, monkeypatch):
+    url = (
+        f"/api/sessions/{interactive_session.project_uuid}/"
+        f"{interactive_session.pipeline_uuid}/kernels"
+    )
+
+    # Reported sessions are not queried by the idleness check.
+    monkeypatch.setattr(
+        InteractiveSession, "has_busy_kernels", raise_exception_function()
+    )
+
+    resp = client.put(url, json={"busy": True})
+    assert resp.status_code == 200
+    data = client.get("/api/info/idle").get_json()
+    assert data["details"]["busy_kernels"]
+
+    resp = client.put(url, json={"busy": False})
+    assert resp.status_code == 200
+    data = client.get("/api/info/idle").get_json()
+    assert not data["details"]["busy_kernels"]
+
+
+def test_session_kernels_put_invalid(client, interactive_session):
+    url = (
+        f"/api/sessions/{interactive_session.project_uuid}/"
+        f"{interactive_session.pipeline_uuid}/kernels"
+    )
+    resp = client.put(url, json={"busy": "yes"})
+    assert resp.status_code == 400
+
+    resp = client.put("/api/sessions/hello/world/kernels", json={"busy": True})
+    assert resp.status_code == 404
+
+
 def test_session_delete_is_stopping(
     client, pipeline, monkeypatch_interactive_session, monkeypatch
 ):
@@ -1,4 +1,6 @@
+import io
 import os
+import tarfile
 
 import docker
 import pytest
@@ -13,6 +15,7 @@ from tests.test_utils import (
 
 import app.connections
 import app.core.environment_builds
+from app.core import docker_utils
 from _orchest.internals.test_utils import raise_exception_function
 
 # String that should not appear in the logs.
@@ -40,7 +43,7 @@ def test_environment_build(
     build_events,
     monkeypatch,
 ):
-    def mock_cleanup_docker_artifacts(filters):
+    def mock_cleanup_docker_artifacts(filters, container_filters=None):
         docker_cleanup_uuid_request.add(filters["label"][-1].split("=")[1])
 
     def mock_put_request(self, url, json=None, *args, **kwargs):
@@ -61,23 +64,28 @@ def test_environment_build(
         delete_requests.append((proj_uuid, env_uuid))
         return MockRequestReponse()
 
-    def mock_write_environment_dockerfile(*args, **kwargs):
-        pass
+    def mock_get_environment_dockerfile(*args, **kwargs):
+        return ""
 
     def mock_prepare_build_context(
         task_uuid, project_uuid, environment_uuid, project_path
     ):
-        return {"snapshot_path": None, "base_image": None}
+        return {
+            "context_path": None,
+            "context_files": [],
+            "extra_files": {},
+            "base_image": None,
+        }
 
     # To keep track if requests are properly made.
     monkeypatch.setattr(requests.sessions.Session, "put", mock_put_request)
     monkeypatch.setattr(requests.sessions.Session, "delete", mock_delete_request)
-    # Not much use to write the dockerfile since we are monkeypatching
-    # docker.
+    # Not much use to create the dockerfile since we are
+    # monkeypatching docker.
     monkeypatch.setattr(
         app.core.environment_builds,
-        "write_environment_dockerfile",
-        mock_write_environment_dockerfile,
+        "get_environment_dockerfile",
+        mock_get_environment_dockerfile,
     )
     # Not much use to prepare the build context since we are
     # monkeypatching docker.
@@ -197,3 +205,141 @@ def test_environment_build(
             f"orchest-env-{project_uuid}-{environment_uuid}",
         )
     )
+
+
+def test_get_setup_script_dependencies(tmp_path):
+    script = tmp_path / "setup_script.sh"
+    script.write_text(
+        "\n".join(
+            [
+                "# Uses notes.txt.",
+                "pip install -r requirements.txt --requirement=reqs/dev.txt",
+                "bash 'scripts/install.sh' && bash scripts/other.sh",
+                "cp -r data/ /tmp && cat /etc/hosts missing.txt",
+                'echo "unbalanced',
+            ]
+        )
+    )
+    context_files = {
+        "notes.txt",
+        "requirements.txt",
+        "reqs",
+        "reqs/dev.txt",
+        "scripts",
+        "scripts/install.sh",
+        "data",
+        "data/a.csv",
+    }
+
+    dependencies = app.core.environment_builds.get_setup_script_dependencies(
+        str(script), context_files
+    )
+
+    assert dependencies == [
+        "data",
+        "reqs/dev.txt",
+        "requirements.txt",
+        "scripts/install.sh",
+    ]
+
+    # Paths within a referenced directory are already copied with it.
+    script.write_text("bash scripts/install.sh && ls scripts")
+    assert app.core.environment_builds.get_setup_script_dependencies(
+        str(script), context_files
+    ) == ["scripts"]
+
+    script.write_text("cd . && pip install -r requirements.txt")
+    assert app.core.environment_builds.get_setup_script_dependencies(
+        str(script), context_files
+    ) == ["."]
+
+
+def test_get_setup_hash(tmp_path):
+    context = tmp_path / "project"
+    (context / "reqs").mkdir(parents=True)
+    (context / "reqs" / "base.txt").write_text("numpy")
+    (context / "main.py").write_text("print('main')")
+    script = tmp_path / "setup_script.sh"
+    script.write_text("pip install -r reqs/base.txt")
+    context_files = {"reqs", "reqs/base.txt", "main.py"}
+
+    def get_setup_hash(dependencies=("reqs",)):
+        return app.core.environment_builds.get_setup_hash(
+            str(script), str(context), context_files, list(dependencies)
+        )
+
+    setup_hash = get_setup_hash()
+    assert get_setup_hash() == setup_hash
+
+    # Files the script does not reference do not invalidate the setup.
+    (context / "main.py").write_text("print('changed')")
+    assert get_setup_hash() == setup_hash
+    assert get_setup_hash(["."]) != setup_hash
+
+    (context / "reqs" / "base.txt").write_text("numpy\npandas")
+    assert get_setup_hash() != setup_hash
+    setup_hash = get_setup_hash()
+
+    script.write_text("pip install -r reqs/base.txt && echo")
+    assert get_setup_hash() != setup_hash
+
+
+def test_get_environment_dockerfile_layer_order():
+    def get_dockerfile(task_uuid, setup_hash="setup-hash"):
+        return app.core.environment_builds.get_environment_dockerfile(
+            "base-image",
+            task_uuid,
+            "project-uuid",
+            "env-uuid",
+            "project-dir",
+            "setup.sh",
+            "_FLAG_",
+            ["reqs/base.txt"],
+            setup_hash,
+        ).split("\n")
+
+    statements = get_dockerfile("task-1")
+
+    def index(prefix):
+        return next(i for i, s in enumerate(statements) if s.startswith(prefix))
+
+    setup_run = index("RUN ")
+    assert index('COPY ["reqs/base.txt"') < setup_run
+    assert index('COPY ["setup.sh"') < setup_run
+    assert "bash setup.sh" in statements[setup_run]
+    assert index("LABEL _orchest_env_setup_hash=setup-hash") < setup_run
+    # Whatever changes at every build comes after the setup, so that
+    # its layers can be reused.
+    assert setup_run < index("LABEL _orchest_env_build_task_uuid=task-1")
+    assert setup_run < index("COPY . ")
+
+    other_statements = get_dockerfile("task-2")
+    assert other_statements[: setup_run + 1] == statements[: setup_run + 1]
+    assert other_statements != statements
+    other_statements = get_dockerfile("task-1", setup_hash="other-hash")
+    assert other_statements[:setup_run] != statements[:setup_run]
+
+
+def test_stream_build_context(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "script.sh").write_text("echo")
+    os.chmod(tmp_path / "sub" / "script.sh", 0o755)
+    (tmp_path / "left-out.txt").write_text("")
+
+    chunks = docker_utils.stream_build_context(
+        str(tmp_path),
+        ["sub", "sub/script.sh"],
+        {"Dockerfile": "FROM scratch", ".dockerignore": "Dockerfile"},
+    )
+
+    with tarfile.open(fileobj=io.BytesIO(b"".join(chunks))) as tar:
+        assert tar.getnames() == [
+            "sub",
+            "sub/script.sh",
+            "Dockerfile",
+            ".dockerignore",
+        ]
+        assert tar.getmember("sub").isdir()
+        assert tar.getmember("sub/script.sh").mode & 0o777 == 0o755
+        assert tar.extractfile("sub/script.sh").read() == b"echo"
+        assert tar.extractfile("Dockerfile").read() == b"FROM scratch"
@@ -0,0 +1,197 @@
+import logging
+
+import docker
+import pytest
+
+from _orchest.internals import config as _config
+from app import utils
+from app.core import image_index
+
+
+class _Image:
+    def __init__(self, id, tags):
+        self.id = id
+        self.tags = tags
+
+
+class _EventStream:
+    def __init__(self, events):
+        self._events = events
+        self.closed = False
+
+    def __iter__(self):
+        return iter(self._events)
+
+    def close(self):
+        self.closed = True
+
+
+class _API:
+    def __init__(self, events):
+        self.events_ = events
+        self.fail = False
+
+    def events(self, since=None, until=None, filters=None, decode=False):
+        if self.fail:
+            raise docker.errors.APIError("Daemon unreachable.")
+        # See image_index._to_docker_timestamp.
+        seconds, nanoseconds = since.split(".")
+        since = int(seconds) * 10 ** 9 + int(nanoseconds)
+        return _EventStream([e for e in self.events_ if e["timeNano"] >= since])
+
+
+class _Images:
+    def __init__(self, images):
+        self.images = images
+
+    def get(self, name_or_id):
+        for image in self.images:
+            if image.id == name_or_id or name_or_id in image.tags:
+                return image
+        raise docker.errors.ImageNotFound(name_or_id)
+
+    def list(self):
+        return list(self.images)
+
+
+class _DockerClient:
+    def __init__(self, images=(), events=()):
+        self.api = _API(list(events))
+        self.images = _Images(list(images))
+
+
+def _event(action, image_id, time_ns, name=None):
+    attributes = {"name": name} if name is not None else {}
+    return {
+        "Type": "image",
+        "Action": action,
+        "Actor": {"ID": image_id, "Attributes": attributes},
+        "timeNano": time_ns,
+    }
+
+
+@pytest.fixture(autouse=True)
+def reset_index():
+    yield
+    image_index._reset(None, None)
+
+
+def _use_client(monkeypatch, images=(), events=()):
+    client = _DockerClient(images, events)
+    monkeypatch.setattr(image_index, "docker_client", client)
+    return client
+
+
+def test_tag_moved_to_new_id(monkeypatch):
+    _use_client(monkeypatch)
+    image_index._reset({"env:latest": "id-1"}, 100)
+
+    image_index._apply_event(_event("tag", "id-2", 200, name="env:latest"))
+
+    assert image_index.get_image_id("env") == "id-2"
+    assert image_index.get_watermark() == 200
+
+
+def test_untag(monkeypatch):
+    # The image keeps its other name.
+    _use_client(monkeypatch, images=[_Image("id-1", ["other:latest"])])
+    image_index._reset({"env:latest": "id-1", "other:latest": "id-1"}, 100)
+
+    image_index._apply_event(_event("untag", "id-1", 200))
+
+    assert image_index.get_image_id("env:latest") is None
+    assert image_index.get_image_id("other:latest") == "id-1"
+    assert image_index.get_watermark() == 200
+
+
+def test_delete(monkeypatch):
+    _use_client(monkeypatch)
+    image_index._reset({"env:latest": "id-1", "other:latest": "id-1"}, 100)
+
+    image_index._apply_event(_event("delete", "id-1", 200))
+
+    assert image_index.get_image_id("env:latest") is None
+    assert image_index.get_image_id("other:latest") is None
+
+
+def test_watch(monkeypatch):
+    client = _use_client(
+        monkeypatch,
+        images=[_Image("id-1", ["env:latest"]), _Image("id-2", ["pulled:latest"])],
+    )
+    # Happening after the subscription, hence replayed once the images
+    # have been listed.
+    client.api.events_ = [
+        _event("pull", "pulled:latest", 4 * 10 ** 18),
+        _event("tag", "id-1", 4 * 10 ** 18 + 1, name="env:v2"),
+    ]
+
+    image_index.ImageIndexWatcher._watch(logging.getLogger())
+
+    assert image_index.get_image_id("env") == "id-1"
+    assert image_index.get_image_id("env:v2") == "id-1"
+    assert image_index.get_image_id("pulled") == "id-2"
+    assert image_index.get_watermark() == 4 * 10 ** 18 + 1
+
+
+def test_disconnected_falls_back_to_daemon(monkeypatch):
+    client = _use_client(monkeypatch, images=[_Image("id-daemon", ["env:latest"])])
+    monkeypatch.setattr(utils, "docker_client", client)
+    image_index._reset({"env:latest": "id-stale"}, 100)
+    assert utils.get_environment_image_docker_id("env:latest") == "id-stale"
+
+    # E.g. the events stream has been interrupted.
+    image_index._reset(None, None)
+
+    assert image_index.get_image_id("env:latest") is None
+    assert image_index.get_watermark() is None
+    assert utils.get_environment_image_docker_id("env:latest") == "id-daemon"
+
+
+def test_changed_since(monkeypatch):
+    client = _use_client(
+        monkeypatch,
+        events=[
+            _event("tag", "id-2", 100, name="other:latest"),
+            _event("tag", "id-3", 300, name="env:latest"),
+        ],
+    )
+
+    # Only events after the watermark are considered.
+    assert not image_index.changed_since(300, ["env"], ["id-1"])
+    assert image_index.changed_since(200, ["env"], ["id-1"])
+    assert image_index.changed_since(200, ["image"], ["id-3"])
+    assert not image_index.changed_since(0, ["image"], ["id-1"])
+
+    # Unknown is assumed to be changed.
+    client.api.fail = True
+    assert image_index.changed_since(300, ["env"], ["id-1"])
+
+
+@pytest.mark.parametrize("changed", [True, False], ids=["changed", "unchanged"])
+def test_reread_env_uuids_to_docker_id_mappings(monkeypatch, changed):
+    name = _config.ENVIRONMENT_IMAGE_NAME.format(
+        project_uuid="proj", environment_uuid="env"
+    )
+    events = [_event("tag", "id-2", 300, name=name)] if changed else []
+    _use_client(monkeypatch, events=events)
+
+    rereads = []
+
+    def mock_get_mappings(project_uuid, env_uuids, use_index=True):
+        rereads.append(use_index)
+        return {"env": "id-2"}
+
+    monkeypatch.setattr(utils, "get_env_uuids_to_docker_id_mappings", mock_get_mappings)
+
+    mappings = utils._reread_env_uuids_to_docker_id_mappings(
+        "proj", {"env"}, {"env": "id-1"}, 200
+    )
+
+    if changed:
+        # The daemon is queried, the index could be lagging behind.
+        assert mappings == {"env": "id-2"}
+        assert rereads == [False]
+    else:
+        assert mappings == {"env": "id-1"}
+        assert rereads == []
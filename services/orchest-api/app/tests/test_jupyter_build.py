@@ -31,8 +31,13 @@ def patch_environ_orchest_version():
     [True, False],
     ids=["abort_task", "do_not_abort_task"],
 )
-def test_jupyter_build(abort, monkeypatch):
-    def mock_cleanup_docker_artifacts(filters):
+@pytest.mark.parametrize(
+    "image_up_to_date",
+    [True, False],
+    ids=["image_up_to_date", "image_outdated"],
+)
+def test_jupyter_build(abort, image_up_to_date, monkeypatch):
+    def mock_cleanup_docker_artifacts(filters, container_filters=None):
         pass
 
     def mock_put_request(self, url, json=None, *args, **kwargs):
@@ -43,7 +48,12 @@ def test_jupyter_build(abort, monkeypatch):
         return MockRequestReponse()
 
     def mock_prepare_build_context(task_uuid):
-        return {"snapshot_path": None, "base_image": None}
+        return {
+            "context_path": None,
+            "context_files": [],
+            "base_image": None,
+            "setup_hash": "setup_hash",
+        }
 
     # To keep track if requests are properly made.
     monkeypatch.setattr(requests.sessions.Session, "put", mock_put_request)
@@ -62,6 +72,16 @@ def test_jupyter_build(abort, monkeypatch):
         "/tmp/output_jupyter_build",
     )
 
+    # Whether the build can be skipped.
+    monkeypatch.setattr(
+        app.core.jupyter_builds,
+        "is_jupyter_image_up_to_date",
+        lambda setup_hash: image_up_to_date,
+    )
+    monkeypatch.setattr(
+        app.core.jupyter_builds, "remove_previous_jupyter_images", lambda: None
+    )
+
     # To make sure the correct cleanup request is issued.
     monkeypatch.setattr(
         app.core.jupyter_builds,
@@ -108,10 +128,15 @@ def test_jupyter_build(abort, monkeypatch):
     assert socketio_data["has_connected"]
     assert socketio_data["has_disconnected"]
 
-    # Successful tests can remove their log file.
-    os.remove(
-        os.path.join(
-            app.core.jupyter_builds.__JUPYTER_BUILD_FULL_LOGS_DIRECTORY,
-            _config.JUPYTER_IMAGE_NAME,
+    if not abort and image_up_to_date:
+        assert "Nothing changed" in "".join(socketio_data["output_logs"])
+
+    # Successful tests can remove their log file, which is only written
+    # by actual builds.
+    if not image_up_to_date:
+        os.remove(
+            os.path.join(
+                app.core.jupyter_builds.__JUPYTER_BUILD_FULL_LOGS_DIRECTORY,
+                _config.JUPYTER_IMAGE_NAME,
+            )
         )
-    )
@@ -110,6 +110,9 @@ def test_pipeline_run_call_order(testio, monkeypatch):
     def mock_get_volume_mount(*args, **kwargs):
         return []
 
+    async def mock_get_environment_capabilities(*args, **kwargs):
+        return []
+
     class MockEnvUUIDDockerIDMapping:
         def __getitem__(self, item):
             return str(item)
@@ -122,6 +125,9 @@ def test_pipeline_run_call_order(testio, monkeypatch):
     monkeypatch.setattr(pipelines, "update_status", mockreturn_update_status)
     monkeypatch.setattr(pipelines, "get_orchest_mounts", mock_get_orchest_mounts)
     monkeypatch.setattr(pipelines, "get_volume_mounts", mock_get_volume_mount)
+    monkeypatch.setattr(
+        pipelines, "get_environment_capabilities", mock_get_environment_capabilities
+    )
 
     filler_for_task_id = "1"
     run_config = {
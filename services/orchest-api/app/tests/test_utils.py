@@ -31,6 +31,10 @@ def mocked_docker_client(_NOT_TO_BE_LOGGED, build_events):
         def get(self, *args, **kwargs):
             pass
 
+        # Will be used as docker_client.images.pull(...).
+        def pull(self, *args, **kwargs):
+            pass
+
         # Will be used as docker_client.api.build(...).
         def build(self, path, tag, *args, **kwargs):
 
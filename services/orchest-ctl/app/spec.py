@@ -174,6 +174,7 @@ def get_reg_container_config(port: int, env: Optional[dict] = None) -> dict:
     max_interactive_runs_parallelism = orchest_config[
         "MAX_INTERACTIVE_RUNS_PARALLELISM"
     ]
+    max_builds_parallelism = orchest_config["MAX_BUILDS_PARALLELISM"]
 
     # name -> request body
     container_config = {
@@ -221,6 +222,7 @@ def get_reg_container_config(port: int, env: Optional[dict] = None) -> dict:
                 f'ORCHEST_HOST_GID={env["ORCHEST_HOST_GID"]}',
                 f"MAX_JOB_RUNS_PARALLELISM={max_job_runs_parallelism}",
                 f"MAX_INTERACTIVE_RUNS_PARALLELISM={max_interactive_runs_parallelism}",
+                f"MAX_BUILDS_PARALLELISM={max_builds_parallelism}",
                 # Set a default log level because supervisor can't deal
                 # with non assigned env variables.
                 "ORCHEST_LOG_LEVEL=INFO",
@@ -206,6 +206,10 @@ def _add_app_properties(data: dict, app: Flask) -> None:
             "MAX_INTERACTIVE_RUNS_PARALLELISM"
         ),
         "max_job_runs_parallelism": app.config.get("MAX_JOB_RUNS_PARALLELISM"),
+        "max_builds_parallelism": app.config.get("MAX_BUILDS_PARALLELISM"),
+        "interactive_sessions_pool_size": app.config.get(
+            "INTERACTIVE_SESSIONS_POOL_SIZE"
+        ),
     }
 
 
@@ -15,6 +15,13 @@ class Config:
     USER_DIR = os.path.join("/userdir")
     PROJECTS_DIR = os.path.join(USER_DIR, "projects")
     HOST_USER_DIR = os.environ.get("HOST_USER_DIR")
+    # Content addressed store backing the job snapshots, see
+    # app.core.snapshots. Has to live on the same filesystem as the
+    # "jobs" directory so that snapshots can hardlink to it.
+    SNAPSHOT_STORE_DIR = os.path.join(USER_DIR, ".orchest", "snapshot-store")
+    # Interval in minutes at which objects of the store that are no
+    # longer used by any snapshot are removed.
+    SNAPSHOT_STORE_GC_INTERVAL = 60
     WEBSERVER_LOGS = _config.WEBSERVER_LOGS
     STATIC_DIR = os.path.join(dir_path, "..", "..", "client", "dist")
 
@@ -63,6 +70,14 @@ class Config:
 
     PROJECT_ORCHEST_GIT_IGNORE_CONTENT = "\n".join(["logs/", "data/"])
 
+    # Directories that are not shown by the file picker, on top of the
+    # ones starting with a ".", as fnmatch patterns. See
+    # app.core.file_picker.
+    FILE_PICKER_IGNORE_PATTERNS = ["__pycache__", "node_modules", "venv", "*.egg-info"]
+    # Max number of directory listings kept in memory by the file
+    # picker, per worker.
+    FILE_PICKER_LISTING_CACHE_SIZE = 4096
+
     FLASK_ENV = os.environ.get("FLASK_ENV", "production")
 
     TELEMETRY_DISABLED = False
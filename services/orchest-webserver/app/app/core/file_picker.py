@@ -0,0 +1,169 @@
+"""Lazily expanded tree of the files of a project, for the file picker.
+
+Only the files that can be used as a step are listed, directories are
+listed up to a given depth so that the client can expand them when
+navigating, instead of walking projects containing, e.g., datasets with
+a huge number of files.
+
+Listings of directories are cached by mtime, the mtime of a directory
+changes when an entry is added to, removed from or renamed in it. The
+mtimes of the listed directories also make the ETag of a tree, so that
+clients can revalidate it without the tree being built again.
+"""
+import collections
+import fnmatch
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.config import CONFIG_CLASS as StaticConfig
+
+ALLOWED_FILE_EXTENSIONS = ["ipynb", "R", "py", "sh"]
+
+# See app.core.fs_index, listings of directories changed within this
+# window are not cached.
+_RACY_MTIME_WINDOW_NS = 2 * 10 ** 9
+
+_listings_lock = threading.Lock()
+# (Directory path, mtime) -> (directory names, file names), LRU.
+_listings: Dict[Tuple[str, int], Tuple[List[str], List[str]]]
+_listings = collections.OrderedDict()
+
+
+def _list_directory(path: str, mtime: int) -> Tuple[List[str], List[str]]:
+    with _listings_lock:
+        listing = _listings.get((path, mtime))
+        if listing is not None:
+            _listings.move_to_end((path, mtime))
+            return listing
+
+    dirs, files = [], []
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir():
+                dirs.append(entry.name)
+            elif entry.name.split(".")[-1] in ALLOWED_FILE_EXTENSIONS:
+                files.append(entry.name)
+    listing = (sorted(dirs), sorted(files))
+
+    if time.time_ns() - mtime > _RACY_MTIME_WINDOW_NS:
+        with _listings_lock:
+            _listings[(path, mtime)] = listing
+            while len(_listings) > StaticConfig.FILE_PICKER_LISTING_CACHE_SIZE:
+                _listings.popitem(last=False)
+    return listing
+
+
+def _is_ignored(dirname: str, ignore_patterns: Iterable[str]) -> bool:
+    return dirname.startswith(".") or any(
+        fnmatch.fnmatch(dirname, pattern) for pattern in ignore_patterns
+    )
+
+
+def get_file_picker_tree(
+    project_dir: str,
+    path: str = "/",
+    depth: Optional[int] = None,
+    expand: Optional[str] = None,
+    ignore_patterns: Optional[List[str]] = None,
+) -> Tuple[Dict, str]:
+    """Gets the tree of the files of a project, starting at a directory.
+
+    Args:
+        project_dir: Absolute path of the project directory.
+        path: Directory, relative to the project directory, the tree
+            starts at.
+        depth: Number of levels of directories to list, None to list
+            all of them. Directories that are not listed have
+            "expanded" set to False and no children.
+        expand: Directory, relative to `path`, whose ancestors, and
+            itself, are listed regardless of `depth`, e.g. the directory
+            of the file currently selected.
+        ignore_patterns: fnmatch patterns of directories to leave out,
+            on top of directories starting with a ".". Defaults to
+            FILE_PICKER_IGNORE_PATTERNS.
+
+    Returns:
+        The tree and its ETag, made of the mtimes of the directories
+        that have been listed.
+
+    Raises:
+        ValueError: If `path` points outside of the project directory.
+        FileNotFoundError: If `path` is not a directory.
+
+    """
+    if ignore_patterns is None:
+        ignore_patterns = StaticConfig.FILE_PICKER_IGNORE_PATTERNS
+
+    project_dir = os.path.normpath(project_dir)
+    root_dir = os.path.normpath(os.path.join(project_dir, path.lstrip("/")))
+    # Resolve symlinks, `path` could name a symlink, or a directory
+    # within one, pointing outside of the project.
+    real_project_dir = os.path.realpath(project_dir)
+    real_root_dir = os.path.realpath(root_dir)
+    if real_root_dir != real_project_dir and not real_root_dir.startswith(
+        real_project_dir + "/"
+    ):
+        raise ValueError(f"Directory {path} is outside of the project.")
+    if not os.path.isdir(root_dir):
+        raise FileNotFoundError(f"Directory {path} not found.")
+
+    expand_path = []
+    if expand is not None:
+        expand_path = [c for c in os.path.normpath(expand).split("/") if c != "."]
+
+    etag = hashlib.sha256()
+    etag.update(repr((path, depth, expand, sorted(ignore_patterns))).encode())
+
+    tree = {
+        "type": "directory",
+        "root": path.strip("/") == "",
+        "name": "/" if path.strip("/") == "" else os.path.basename(root_dir),
+        "expanded": False,
+        "children": [],
+    }
+    # (Node, absolute path, level, whether the directory is on the path
+    # to `expand`, remaining components of `expand`).
+    to_visit = [(tree, root_dir, 0, expand is not None, expand_path)]
+    while to_visit:
+        node, dir_path, level, on_expand_path, expand_rest = to_visit.pop()
+        if depth is not None and level >= depth and not on_expand_path:
+            continue
+
+        try:
+            mtime = os.stat(dir_path).st_mtime_ns
+            dirs, files = _list_directory(dir_path, mtime)
+        # E.g. the directory has been removed in the meantime.
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        etag.update(f"{dir_path}\0{mtime}\0".encode())
+
+        node["expanded"] = True
+        for dirname in dirs:
+            if _is_ignored(dirname, ignore_patterns):
+                continue
+            child = {
+                "type": "directory",
+                "name": dirname,
+                "expanded": False,
+                "children": [],
+            }
+            node["children"].append(child)
+            # Same as os.walk, symlinks to directories are not walked.
+            child_path = os.path.join(dir_path, dirname)
+            if not os.path.islink(child_path):
+                on_path = bool(expand_rest) and expand_rest[0] == dirname
+                to_visit.append(
+                    (
+                        child,
+                        child_path,
+                        level + 1,
+                        on_path,
+                        expand_rest[1:] if on_path else [],
+                    )
+                )
+        node["children"].extend({"type": "file", "name": name} for name in files)
+
+    return tree, etag.hexdigest()
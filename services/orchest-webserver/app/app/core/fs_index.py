@@ -0,0 +1,122 @@
+"""Incremental discovery of the pipelines of a project.
+
+Discovering the pipelines of a project used to walk the entire project
+directory, which is slow for large projects or on slow volumes. The
+index keeps, for every directory of a project, its mtime and the
+subdirectories and pipeline files it contains. The mtime of a directory
+changes when an entry is added to, removed from or renamed in it, so
+only directories whose mtime changed need to be listed again, the
+others only need to be stat'ed.
+
+The index is stored in the db, see ProjectFSIndex, so that it's shared
+by the gunicorn workers and survives restarts.
+"""
+import os
+import time
+from typing import Any, Dict, List, Tuple
+
+from app.connections import db
+from app.models import ProjectFSIndex
+
+_IGNORE_DIRS = {".ipynb_checkpoints"}
+
+# Filesystems can have a coarse mtime granularity, e.g. 1 second, a
+# directory changed right after being listed could keep its mtime. The
+# mtime of directories listed within this window is not trusted.
+_RACY_MTIME_WINDOW_NS = 2 * 10 ** 9
+
+
+def _list_directory(path: str) -> Tuple[List[str], List[str]]:
+    dirs, pipelines = [], []
+    with os.scandir(path) as it:
+        for entry in it:
+            # Same as os.walk, symlinks to directories are not walked.
+            if entry.is_dir():
+                if not entry.is_symlink() and entry.name not in _IGNORE_DIRS:
+                    dirs.append(entry.name)
+            elif entry.name.endswith(".orchest"):
+                pipelines.append(entry.name)
+    return sorted(dirs), sorted(pipelines)
+
+
+def scan_project(
+    project_dir: str, index: Dict[str, Any]
+) -> Tuple[List[str], Dict[str, Any], bool]:
+    """Finds the pipelines of a project, making use of its index.
+
+    Args:
+        project_dir: Absolute path of the project directory.
+        index: The previous index of the project, see
+            ProjectFSIndex.directories, empty if there is none.
+
+    Returns:
+        The normalized paths of the pipeline files relative to the
+        project directory, the new index and whether the pipelines
+        might have changed since the previous index was made.
+
+    """
+    new_index = {}
+    changed = not index
+    now = time.time_ns()
+
+    to_visit = [""]
+    while to_visit:
+        rel_dir = to_visit.pop()
+        abs_dir = os.path.join(project_dir, rel_dir)
+        try:
+            mtime = os.stat(abs_dir).st_mtime_ns
+            entry = index.get(rel_dir)
+            # Untrusted mtimes are stored as None, see above.
+            if entry is None or entry["mtime"] != mtime:
+                changed = True
+                dirs, pipelines = _list_directory(abs_dir)
+                entry = {
+                    "mtime": mtime if now - mtime > _RACY_MTIME_WINDOW_NS else None,
+                    "dirs": dirs,
+                    "pipelines": pipelines,
+                }
+        # E.g. the directory has been removed in the meantime, its
+        # parent will be listed again at the next scan.
+        except (FileNotFoundError, NotADirectoryError):
+            changed = True
+            continue
+
+        new_index[rel_dir] = entry
+        to_visit.extend(os.path.join(rel_dir, d) for d in entry["dirs"])
+
+    # Directories that are gone.
+    if index.keys() - new_index.keys():
+        changed = True
+
+    pipeline_paths = [
+        # Path normalization is important for correctly detecting
+        # pipelines that were deleted through the file system in
+        # SyncProjectPipelinesDBState, i.e. to avoid false positives.
+        os.path.normpath(os.path.join(rel_dir, pipeline))
+        for rel_dir, entry in new_index.items()
+        for pipeline in entry["pipelines"]
+    ]
+    return pipeline_paths, new_index, changed
+
+
+def get_project_index(project_uuid: str) -> Dict[str, Any]:
+    """Gets the index of a project, empty if there is none.
+
+    The index is read from the db even if it has already been loaded in
+    the session, so that it reflects what other transactions committed.
+    """
+    fs_index = (
+        ProjectFSIndex.query.populate_existing()
+        .filter_by(project_uuid=project_uuid)
+        .one_or_none()
+    )
+    return fs_index.directories if fs_index is not None else {}
+
+
+def set_project_index(project_uuid: str, index: Dict[str, Any]) -> None:
+    """Stores the index of a project as part of the transaction."""
+    fs_index = ProjectFSIndex.query.filter_by(project_uuid=project_uuid).one_or_none()
+    if fs_index is None:
+        db.session.add(ProjectFSIndex(project_uuid=project_uuid, directories=index))
+    else:
+        fs_index.directories = index
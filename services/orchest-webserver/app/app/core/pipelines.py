@@ -3,6 +3,7 @@ import copy
 import json
 import os
 import uuid
+from typing import List, Optional
 
 import requests
 from flask.globals import current_app
@@ -10,7 +11,8 @@ from flask.globals import current_app
 from _orchest.internals.two_phase_executor import TwoPhaseFunction
 from app import error
 from app.connections import db
-from app.models import Pipeline
+from app.compat import migrate_pipeline
+from app.models import Pipeline, Project
 from app.utils import (
     check_pipeline_correctness,
     get_pipeline_directory,
@@ -21,11 +23,126 @@ from app.utils import (
 )
 
 
+def update_pipeline_metadata(
+    pipeline: Pipeline, pipeline_json_path: str, pipeline_json: Optional[dict] = None
+) -> bool:
+    """Updates the cached metadata of a pipeline if its file changed.
+
+    The pipeline file is only read if its mtime or size differ from the
+    ones recorded when the metadata was last read. Does not commit.
+
+    Args:
+        pipeline: The pipeline to update.
+        pipeline_json_path: Path of the pipeline file.
+        pipeline_json: Content of the pipeline file if it has just been
+            written, in which case the file is not read.
+
+    Returns:
+        True if the metadata has been changed.
+
+    """
+    try:
+        # Stat before reading, a change made in between will lead to
+        # a read at the next update.
+        stat = os.stat(pipeline_json_path)
+    except OSError:
+        stat = None
+
+    if stat is None:
+        metadata = (None, None, None, None, None)
+    elif pipeline_json is None and (stat.st_mtime_ns, stat.st_size) == (
+        pipeline.file_mtime_ns,
+        pipeline.file_size,
+    ):
+        return False
+    else:
+        if pipeline_json is None:
+            try:
+                with open(pipeline_json_path, "r") as json_file:
+                    pipeline_json = migrate_pipeline(json.load(json_file))
+            except Exception as e:
+                current_app.logger.error(
+                    f"Could not read pipeline JSON from {pipeline_json_path}: {e}"
+                )
+                pipeline_json = {}
+        steps = pipeline_json.get("steps", {})
+        metadata = (
+            pipeline_json.get("name"),
+            len(steps),
+            sorted(
+                {
+                    step["environment"]
+                    for step in steps.values()
+                    if step.get("environment") is not None
+                }
+            ),
+            stat.st_mtime_ns,
+            stat.st_size,
+        )
+
+    if metadata == (
+        pipeline.name,
+        pipeline.step_count,
+        pipeline.environments,
+        pipeline.file_mtime_ns,
+        pipeline.file_size,
+    ):
+        return False
+    (
+        pipeline.name,
+        pipeline.step_count,
+        pipeline.environments,
+        pipeline.file_mtime_ns,
+        pipeline.file_size,
+    ) = metadata
+    return True
+
+
+def refresh_pipelines_metadata(pipelines: List[Pipeline]) -> None:
+    """Refreshes the cached metadata of pipelines, see Pipeline.name.
+
+    Only pipelines whose file changed since their metadata was last
+    read are read, which includes pipelines that have been discovered
+    or changed through the filesystem. Commits if any metadata changed.
+    """
+    project_paths = dict(
+        db.session.query(Project.uuid, Project.path)
+        .filter(Project.uuid.in_({pipeline.project_uuid for pipeline in pipelines}))
+        .all()
+    )
+
+    changed = False
+    for pipeline in pipelines:
+        pipeline_json_path = os.path.join(
+            current_app.config["USER_DIR"],
+            "projects",
+            project_paths[pipeline.project_uuid],
+            pipeline.path,
+        )
+        changed = update_pipeline_metadata(pipeline, pipeline_json_path) or changed
+
+    if changed:
+        db.session.commit()
+
+
+def get_pipeline_metadata(pipeline: Pipeline) -> dict:
+    """Gets the cached metadata of a pipeline as returned to clients."""
+    return {
+        "name": (
+            pipeline.name
+            if pipeline.name is not None
+            else "Warning: pipeline file was not found."
+        ),
+        "step_count": pipeline.step_count,
+        "environments": pipeline.environments,
+    }
+
+
 class CreatePipeline(TwoPhaseFunction):
     def _transaction(self, project_uuid: str, pipeline_name: str, pipeline_path: str):
 
         # It is important to normalize the path because
-        # find_pipelines_in_dir will return normalized paths as well,
+        # fs_index.scan_project will return normalized paths as well,
         # which are used to detect pipelines that were deleted through
         # the file system in SyncProjectPipelinesDBState.
         pipeline_path = normalize_project_relative_path(pipeline_path)
@@ -196,6 +313,7 @@ class AddPipelineFromFS(TwoPhaseFunction):
                 path=pipeline_path,
                 project_uuid=project_uuid,
             )
+            update_pipeline_metadata(new_pipeline, pipeline_json_path, pipeline_json)
             db.session.add(new_pipeline)
 
     def _collateral(
@@ -276,7 +394,7 @@ class MovePipeline(TwoPhaseFunction):
             raise ValueError('Path must end with ".orchest".')
 
         # It is important to normalize the path because
-        # find_pipelines_in_dir will return normalized paths as well,
+        # fs_index.scan_project will return normalized paths as well,
         # which are used to detect pipelines that were deleted through
         # the file system in SyncProjectPipelinesDBState.
         new_project_relative_path = normalize_project_relative_path(
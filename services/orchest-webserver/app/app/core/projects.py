@@ -11,11 +11,11 @@ from flask.globals import current_app
 from _orchest.internals.two_phase_executor import TwoPhaseExecutor, TwoPhaseFunction
 from app import error
 from app.connections import db
+from app.core.fs_index import get_project_index, scan_project, set_project_index
 from app.core.pipelines import AddPipelineFromFS, DeletePipeline
 from app.kernel_manager import populate_kernels
 from app.models import BackgroundTask, Pipeline, Project
 from app.utils import (
-    find_pipelines_in_dir,
     get_environments,
     get_pipeline_path,
     has_active_sessions,
@@ -280,6 +280,10 @@ class SyncProjectPipelinesDBState(TwoPhaseFunction):
         there after, for example a project import) are registered in
         the db.
 
+        The project directory is scanned incrementally, see
+        app.core.fs_index, the db is only reconciled if the pipeline
+        files might have changed since the previous synchronization.
+
         Args:
             project_uuid:
 
@@ -292,15 +296,29 @@ class SyncProjectPipelinesDBState(TwoPhaseFunction):
             current_app.config["USER_DIR"], "projects", project_path
         )
 
-        # Lock the project to avoid race conditions in pipeline deletion
-        # or creation.
-        Project.query.with_for_update().filter_by(uuid=project_uuid).one()
-
         if not os.path.isdir(project_dir):
             raise FileNotFoundError("Project directory not found")
 
-        # Find all pipelines in the project directory.
-        pipeline_paths = find_pipelines_in_dir(project_dir, project_dir)
+        # Find all pipelines in the project directory. Scanning before
+        # taking the lock avoids serializing synchronizations that have
+        # nothing to reconcile.
+        index = get_project_index(project_uuid)
+        pipeline_paths, fs_index, changed = scan_project(project_dir, index)
+        if not changed:
+            return
+
+        # Lock the project to avoid race conditions in pipeline deletion
+        # or creation.
+        Project.query.with_for_update().filter_by(uuid=project_uuid).one()
+        # A concurrent synchronization might have reconciled and stored
+        # its index while this one was waiting for the lock, in which
+        # case the pipelines found by the scan could be outdated. Scan
+        # again on top of the new index.
+        locked_index = get_project_index(project_uuid)
+        if locked_index != index:
+            pipeline_paths, fs_index, changed = scan_project(project_dir, locked_index)
+            if not changed:
+                return
         # Cleanup pipelines that have been manually removed.
         fs_removed_pipelines = [
             pipeline
@@ -343,6 +361,10 @@ class SyncProjectPipelinesDBState(TwoPhaseFunction):
             if not is_moving:
                 AddPipelineFromFS(self.tpe).transaction(project_uuid, path)
 
+        # Committed along with the reconciliation, so that a failure
+        # leads to a new reconciliation at the next synchronization.
+        set_project_index(project_uuid, fs_index)
+
     def _collateral(self):
         pass
 
@@ -30,7 +30,7 @@ from apscheduler.schedulers.background import BackgroundScheduler
 from flask.app import Flask
 
 from _orchest.internals.two_phase_executor import TwoPhaseExecutor, TwoPhaseFunction
-from app import analytics, models
+from app import analytics, models, utils
 from app.connections import db
 
 logger = logging.getLogger("job-scheduler")
@@ -40,6 +40,7 @@ class SchedulerJobType(enum.Enum):
     TELEMETRY_HEARTBEAT = "TELEMETRY HEARTBEAT"
     ORCHEST_EXAMPLES = "ORCHEST EXAMPLES"
     ORCHEST_UPDATE_INFO = "ORCHEST UPDATE INFO"
+    SNAPSHOT_STORE_GC = "SNAPSHOT STORE GC"
 
 
 def add_recurring_jobs_to_scheduler(
@@ -73,6 +74,11 @@ def add_recurring_jobs_to_scheduler(
             "interval": app.config["ORCHEST_UPDATE_INFO_JSON_POLL_INTERVAL"],
             "job_func": jobs.handle_orchest_update_info,
         },
+        "snapshot store garbage collection": {
+            "allowed_to_run": True,
+            "interval": app.config["SNAPSHOT_STORE_GC_INTERVAL"],
+            "job_func": jobs.handle_snapshot_store_garbage_collection,
+        },
     }
 
     for name, job in recurring_jobs.items():
@@ -189,6 +195,28 @@ class Jobs:
             app,
         )
 
+    def handle_snapshot_store_garbage_collection(
+        self, app: Flask, interval: int = 0
+    ) -> None:
+        """Handles removing unused objects of the job snapshot store.
+
+        The schedule is defined by the given interval. E.g.
+        `interval=15` will cause this job to if 15 minutes have passed
+        since the previous run.
+
+        Args:
+            interval: How much time should have passed after the
+                previous execution of this job (in minutes). And thus an
+                `interval=0` will execute the job right away.
+
+        """
+        return self._handle_recurring_scheduler_job(
+            SchedulerJobType.SNAPSHOT_STORE_GC.value,
+            interval,
+            utils.collect_snapshot_store_garbage,
+            app,
+        )
+
     @staticmethod
     def _handle_recurring_scheduler_job(
         job_type: str, interval: int, handle_func: Callable, app: Flask
@@ -0,0 +1,113 @@
+import requests
+from flask.globals import current_app
+
+from app.connections import db
+from app.models import Pipeline, Project
+from app.utils import get_pipeline_json, get_project_directory
+
+
+def get_session_config(project_uuid: str, pipeline_uuid: str) -> dict:
+    """Returns the config to launch the session of a pipeline.
+
+    Locks the project and pipeline rows to avoid race conditions with
+    RenameProject and MovePipeline, which are locking for update
+    themselves, the caller is responsible for ending the transaction
+    once the session has been requested.
+
+    Raises:
+        sqlalchemy.orm.exc.NoResultFound: The pipeline does not exist.
+
+    """
+    Project.query.with_for_update().filter(
+        Project.uuid == project_uuid,
+    ).one()
+    pipeline = (
+        Pipeline.query.with_for_update()
+        .filter(
+            Pipeline.project_uuid == project_uuid,
+            Pipeline.uuid == pipeline_uuid,
+        )
+        .one()
+    )
+
+    pipeline_json = get_pipeline_json(pipeline_uuid, project_uuid) or {}
+
+    return {
+        "project_uuid": project_uuid,
+        "pipeline_uuid": pipeline_uuid,
+        "pipeline_path": pipeline.path,
+        "project_dir": get_project_directory(project_uuid, host_path=True),
+        "host_userdir": current_app.config["HOST_USER_DIR"],
+        "services": pipeline_json.get("services", {}),
+    }
+
+
+def prewarm_project_sessions(app, project_uuid: str) -> None:
+    """Tops up the pool of pre-warmed sessions of a project.
+
+    Launches sessions for pipelines of the project that do not have a
+    session yet, until the project has INTERACTIVE_SESSIONS_POOL_SIZE
+    pre-warmed sessions. Pre-warmed sessions are claimed by the
+    orchest-api when their pipeline is opened, and stopped by it when
+    they are not claimed for a while. Pipelines defining services are
+    not pre-warmed, their user containers are only started once the
+    pipeline is opened.
+
+    Meant to be run in the background after a pipeline of the project
+    has been opened, failures are only logged.
+    """
+    pool_size = app.config.get("INTERACTIVE_SESSIONS_POOL_SIZE", 0)
+    if pool_size <= 0:
+        return
+
+    url = f'http://{app.config["ORCHEST_API_ADDRESS"]}/api/sessions/'
+    with app.app_context():
+        try:
+            # Top ups of the same project are serialized so that they
+            # don't count the same pool and launch more sessions than
+            # its size. The lock is held until the sessions have been
+            # requested.
+            Project.query.with_for_update().filter(
+                Project.uuid == project_uuid,
+            ).one()
+
+            resp = requests.get(
+                url,
+                params={"project_uuid": project_uuid, "include_prewarmed": "true"},
+            )
+            resp.raise_for_status()
+            sessions = resp.json()["sessions"]
+
+            to_launch = pool_size - sum(
+                session["prewarmed_time"] is not None for session in sessions
+            )
+            with_session = {session["pipeline_uuid"] for session in sessions}
+
+            candidates = (
+                Pipeline.query.filter(
+                    Pipeline.project_uuid == project_uuid,
+                    Pipeline.status == "READY",
+                )
+                .order_by(Pipeline.path)
+                .all()
+            )
+            candidates = [p.uuid for p in candidates if p.uuid not in with_session]
+
+            for pipeline_uuid in candidates:
+                if to_launch <= 0:
+                    break
+                session_config = get_session_config(project_uuid, pipeline_uuid)
+                if session_config["services"]:
+                    continue
+                session_config["prewarm"] = True
+                resp = requests.post(url, json=session_config)
+                # E.g. the pipeline has been opened in the meantime or
+                # a JupyterLab build is ongoing.
+                if resp.status_code == 201:
+                    to_launch -= 1
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(
+                f"Failed to pre-warm sessions of project {project_uuid}: {e}"
+            )
@@ -0,0 +1,228 @@
+"""Content addressed store for job snapshots.
+
+Every job gets a snapshot of its project, i.e. the state of the project
+at the time of job creation. Since many jobs snapshot the same project
+with little to no differences, files are stored once in a content
+addressed store, identified by the hash of their content, and the
+snapshot of a job is a tree of hardlinks to the objects of the store.
+Hardlinks share their permissions, files with the same content but a
+different mode, e.g. an executable script, are thus different objects.
+
+The store is laid out as follows:
+    <store>/objects/<hash[:2]>/<hash>-<mode>  file contents, never
+        modified, mode being the octal permission bits.
+    <store>/indexes/<project_uuid>.json  per project manifest.
+
+The per project manifest maps every snapshotted file to its stat info
+and content hash, so that files that did not change since the last
+snapshot of the project do not need to be read and hashed again. It also
+stores the total size of the last snapshot, so that the size of a
+project snapshot can be retrieved without walking the project.
+
+Objects are garbage collected once no snapshot is referencing them
+anymore, i.e. when their hardlink count is back to 1. Collecting
+requires going through the entire store, it is done periodically by the
+scheduler, see app.core.scheduler.
+
+NOTE: snapshots must be considered read-only, writing to a file of a
+snapshot would modify the stored object and thus every snapshot making
+use of it. Job pipeline runs get their own copy of the snapshot.
+"""
+import errno
+import hashlib
+import json
+import os
+import shutil
+import stat
+import uuid
+from typing import Dict, Iterable, Optional, Tuple
+
+_HASH_BLOCK_SIZE = 8192 * 8
+
+
+def _hash_file(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        buf = f.read(_HASH_BLOCK_SIZE)
+        while len(buf) > 0:
+            hasher.update(buf)
+            buf = f.read(_HASH_BLOCK_SIZE)
+    return hasher.hexdigest()
+
+
+def _atomic_write_json(path: str, data: dict) -> None:
+    tmp_path = f"{path}.{uuid.uuid4()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+class SnapshotStore:
+    def __init__(self, path: str) -> None:
+        self._objects_dir = os.path.join(path, "objects")
+        self._indexes_dir = os.path.join(path, "indexes")
+
+    def _object_path(self, digest: str, mode: int) -> str:
+        return os.path.join(self._objects_dir, digest[:2], f"{digest}-{mode:o}")
+
+    def _index_path(self, project_uuid: str) -> str:
+        return os.path.join(self._indexes_dir, f"{project_uuid}.json")
+
+    def get_index(self, project_uuid: str) -> Optional[dict]:
+        """Returns the manifest of the last snapshot of a project.
+
+        Returns:
+            None if the project has never been snapshotted, otherwise
+            a dictionary:
+                {
+                    "size": <total size in bytes>,
+                    "files": {<rel_path>: [size, mtime_ns, ino, hash]}
+                }
+        """
+        try:
+            with open(self._index_path(project_uuid), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _store_file(self, path: str, digest: str, mode: int) -> str:
+        """Adds a file to the store if not already present."""
+        obj_path = self._object_path(digest, mode)
+        if not os.path.exists(obj_path):
+            os.makedirs(os.path.dirname(obj_path), exist_ok=True)
+            # Write to a temporary file first so that a concurrent
+            # snapshot will never link to a partially written object.
+            tmp_path = f"{obj_path}.{uuid.uuid4()}.tmp"
+            shutil.copy2(path, tmp_path)
+            os.replace(tmp_path, obj_path)
+        return obj_path
+
+    def snapshot(
+        self,
+        project_uuid: str,
+        project_dir: str,
+        snapshot_dir: str,
+        skip_paths: Iterable[str] = (),
+    ) -> int:
+        """Creates a snapshot of a project directory.
+
+        Only files that changed since the last snapshot of the project,
+        according to their size, mtime and inode, are read and hashed.
+        Files whose content and mode are already in the store are
+        hardlinked instead of copied.
+
+        Args:
+            project_uuid: Used to look up the manifest of the previous
+                snapshot of the project.
+            project_dir: Directory to snapshot.
+            snapshot_dir: Where to create the snapshot, must not exist.
+            skip_paths: Paths, relative to the project directory, to
+                exclude from the snapshot.
+
+        Returns:
+            The size of the snapshot in bytes.
+
+        Raises:
+            OSError if it failed to create the snapshot.
+
+        """
+        skip_paths = set(os.path.normpath(p) for p in skip_paths)
+        prev_index = self.get_index(project_uuid) or {}
+        prev_files: Dict[str, list] = prev_index.get("files", {})
+        files: Dict[str, list] = {}
+        total_size = 0
+
+        os.makedirs(snapshot_dir)
+        for root, dirs, filenames in os.walk(project_dir):
+            rel_root = os.path.relpath(root, project_dir)
+            dirs[:] = [
+                d for d in dirs if os.path.normpath(os.path.join(rel_root, d))
+                not in skip_paths
+            ]
+
+            for d in dirs:
+                src = os.path.join(root, d)
+                dst = os.path.join(snapshot_dir, rel_root, d)
+                # os.walk does not descend into symlinked dirs.
+                if os.path.islink(src):
+                    os.symlink(os.readlink(src), dst)
+                else:
+                    os.makedirs(dst, exist_ok=True)
+
+            for name in filenames:
+                rel_path = os.path.normpath(os.path.join(rel_root, name))
+                if rel_path in skip_paths:
+                    continue
+                src = os.path.join(root, name)
+                dst = os.path.join(snapshot_dir, rel_path)
+
+                st = os.lstat(src)
+                if stat.S_ISLNK(st.st_mode):
+                    os.symlink(os.readlink(src), dst)
+                    continue
+                if not stat.S_ISREG(st.st_mode):
+                    continue
+
+                entry = prev_files.get(rel_path)
+                if entry is not None and entry[:3] == [
+                    st.st_size,
+                    st.st_mtime_ns,
+                    st.st_ino,
+                ]:
+                    digest = entry[3]
+                else:
+                    digest = _hash_file(src)
+
+                mode = stat.S_IMODE(st.st_mode)
+                obj_path = self._store_file(src, digest, mode)
+                try:
+                    os.link(obj_path, dst)
+                except FileNotFoundError:
+                    # The object got garbage collected concurrently.
+                    os.link(self._store_file(src, digest, mode), dst)
+                except OSError as e:
+                    # The store lives on another device.
+                    if e.errno != errno.EXDEV:
+                        raise
+                    shutil.copy2(src, dst)
+
+                files[rel_path] = [st.st_size, st.st_mtime_ns, st.st_ino, digest]
+                total_size += st.st_size
+
+        os.makedirs(self._indexes_dir, exist_ok=True)
+        _atomic_write_json(
+            self._index_path(project_uuid), {"size": total_size, "files": files}
+        )
+        return total_size
+
+    def remove_index(self, project_uuid: str) -> None:
+        try:
+            os.remove(self._index_path(project_uuid))
+        except FileNotFoundError:
+            pass
+
+    def collect_garbage(self) -> Tuple[int, int]:
+        """Removes objects that are not used by any snapshot.
+
+        Returns:
+            A tuple (number of removed objects, freed bytes).
+
+        """
+        removed, freed = 0, 0
+        if not os.path.isdir(self._objects_dir):
+            return removed, freed
+
+        for entry in os.scandir(self._objects_dir):
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            for obj in os.scandir(entry.path):
+                try:
+                    st = obj.stat(follow_symlinks=False)
+                    # Only referenced by the store itself.
+                    if st.st_nlink == 1:
+                        os.remove(obj.path)
+                        removed += 1
+                        freed += st.st_size
+                except FileNotFoundError:
+                    pass
+        return removed, freed
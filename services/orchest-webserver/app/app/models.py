@@ -1,7 +1,7 @@
 import uuid
 
 from sqlalchemy import UniqueConstraint, func
-from sqlalchemy.dialects.postgresql import TIMESTAMP
+from sqlalchemy.dialects.postgresql import JSONB, TIMESTAMP
 from sqlalchemy.sql import expression, text
 
 from app.connections import db
@@ -61,6 +61,35 @@ class Pipeline(BaseModel):
         server_default=text("'READY'"),
     )
 
+    # Metadata of the pipeline file, cached so that listing pipelines
+    # does not need to read every pipeline file, see
+    # app.core.pipelines.refresh_pipelines_metadata. The mtime and size
+    # are the ones of the file when the metadata was read, NULL if the
+    # file has not been read yet, or could not be read.
+    name = db.Column(db.String(), nullable=True)
+    step_count = db.Column(db.Integer, nullable=True)
+    # Uuids of the environments used by the steps.
+    environments = db.Column(JSONB, nullable=True)
+    file_mtime_ns = db.Column(db.BigInteger, nullable=True)
+    file_size = db.Column(db.BigInteger, nullable=True)
+
+
+class ProjectFSIndex(BaseModel):
+    """Index of the directories of a project, to discover pipelines.
+
+    See app.core.fs_index.
+    """
+
+    __tablename__ = "project_fs_indexes"
+
+    project_uuid = db.Column(
+        db.ForeignKey("projects.uuid", ondelete="CASCADE"), primary_key=True
+    )
+    # Maps the path of every directory of the project, relative to the
+    # project, to its mtime and to the names of the subdirectories and
+    # pipeline files it contains.
+    directories = db.Column(JSONB, nullable=False, server_default="{}")
+
 
 # This class is only serialized on disk, it's never stored in the
 # database. The properties are stored in properties.json in the
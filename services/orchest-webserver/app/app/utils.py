@@ -1,4 +1,3 @@
-import collections
 import hashlib
 import json
 import os
@@ -6,7 +5,7 @@ import re
 import subprocess
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
 
 import requests
 from flask import current_app
@@ -15,6 +14,7 @@ from _orchest.internals import config as _config
 from _orchest.internals.utils import is_services_definition_valid
 from app.compat import migrate_pipeline
 from app.config import CONFIG_CLASS as StaticConfig
+from app.core.snapshots import SnapshotStore
 from app.models import Environment, Pipeline, Project
 from app.schemas import EnvironmentSchema
 
@@ -97,7 +97,13 @@ def get_project_directory(project_uuid, host_path=False):
 
 
 def get_project_snapshot_size(project_uuid, host_path=False):
-    """Returns the snapshot size for a project in MB."""
+    """Returns the snapshot size for a project in MB.
+
+    The size is taken from the manifest of the last snapshot of the
+    project, if any, to avoid walking the entire project. Thus it
+    doesn't reflect changes made to the project after its last
+    snapshot.
+    """
 
     def get_size(path, skip_dirs):
         size = 0
@@ -110,6 +116,10 @@ def get_project_snapshot_size(project_uuid, host_path=False):
 
         return size
 
+    index = get_snapshot_store().get_index(project_uuid)
+    if index is not None:
+        return index["size"] / (1024 ** 2)
+
     project_dir = get_project_directory(project_uuid, host_path=host_path)
 
     # This does not count towards size for snapshots.
@@ -360,6 +370,26 @@ def pipeline_uuid_to_path(pipeline_uuid, project_uuid, job_uuid=None):
             return None
 
 
+def count_environments(project_uuid) -> int:
+    """Counts the environments of a project without reading them.
+
+    Reading an environment means parsing its properties.json, which is
+    wasteful when only the count is needed, e.g. to list projects.
+    """
+    project_dir = get_project_directory(project_uuid)
+    environments_dir = os.path.join(project_dir, ".orchest", "environments")
+
+    try:
+        with os.scandir(environments_dir) as it:
+            return sum(
+                entry.is_dir()
+                and os.path.isfile(os.path.join(entry.path, "properties.json"))
+                for entry in it
+            )
+    except FileNotFoundError:
+        return 0
+
+
 def project_entity_counts(project_uuid, get_job_count=False, get_session_count=False):
 
     counts = {}
@@ -368,30 +398,43 @@ def project_entity_counts(project_uuid, get_job_count=False, get_session_count=F
         Pipeline.project_uuid == project_uuid
     ).count()
 
-    counts["environment_count"] = len(get_environments(project_uuid))
+    counts["environment_count"] = count_environments(project_uuid)
 
     if get_job_count:
         counts["job_count"] = get_api_entity_counts(
-            "/api/jobs/", "jobs", project_uuid
+            "/api/jobs/counts", project_uuid
         ).get(project_uuid, 0)
 
     if get_session_count:
         counts["session_count"] = get_api_entity_counts(
-            "/api/sessions/", "sessions", project_uuid
+            "/api/sessions/counts", project_uuid
         ).get(project_uuid, 0)
 
     return counts
 
 
 def get_job_counts():
-    return get_api_entity_counts("/api/jobs/", "jobs")
+    return get_api_entity_counts("/api/jobs/counts")
 
 
 def get_session_counts():
-    return get_api_entity_counts("/api/sessions/", "sessions")
+    return get_api_entity_counts("/api/sessions/counts")
 
 
-def get_api_entity_counts(endpoint, entity_key, project_uuid=None):
+def get_api_entity_counts(endpoint, project_uuid=None) -> Dict[str, int]:
+    """Gets the number of entities per project from the orchest-api.
+
+    Args:
+        endpoint: A counts endpoint of the orchest-api, returning the
+            counts aggregated by project, e.g. "/api/jobs/counts".
+        project_uuid: If passed, only the count of this project is
+            fetched.
+
+    Returns:
+        A dictionary mapping project uuids to counts, projects without
+        entities are not part of it.
+
+    """
     params = {}
     if project_uuid is not None:
         params["project_uuid"] = project_uuid
@@ -403,17 +446,34 @@ def get_api_entity_counts(endpoint, entity_key, project_uuid=None):
     if resp.status_code != 200:
         current_app.logger.error(
             "Failed to fetch entity count "
-            "from orchest-api. Endpoint [%s] Entity key[%s]. Status code: %d"
-            % (endpoint, entity_key, resp.status_code)
+            "from orchest-api. Endpoint [%s]. Status code: %d"
+            % (endpoint, resp.status_code)
         )
         return {}
 
-    data = resp.json()
-    counts = collections.defaultdict(int)
-    for entity in data[entity_key]:
-        counts[entity["project_uuid"]] += 1
+    return {count["project_uuid"]: count["count"] for count in resp.json()["counts"]}
 
-    return counts
+
+def get_projects_overview() -> Dict[str, Dict[str, int]]:
+    """Gets the job and session counts of all projects in one request.
+
+    Returns:
+        A dictionary mapping project uuids to a dictionary with the
+        "job_count" and "session_count" of the project. Empty if the
+        orchest-api could not be reached.
+
+    """
+    resp = requests.get(
+        f'http://{current_app.config["ORCHEST_API_ADDRESS"]}/api/projects/overview'
+    )
+    if resp.status_code != 200:
+        current_app.logger.error(
+            "Failed to fetch the projects overview from orchest-api. "
+            "Status code: %d" % resp.status_code
+        )
+        return {}
+
+    return {project.pop("uuid"): project for project in resp.json()["projects"]}
 
 
 def project_uuid_to_path(project_uuid: str) -> Optional[str]:
@@ -424,33 +484,6 @@ def project_uuid_to_path(project_uuid: str) -> Optional[str]:
         return None
 
 
-def find_pipelines_in_dir(path, relative_to=None):
-
-    ignore_dirs = [".ipynb_checkpoints"]
-
-    pipelines = []
-
-    if os.path.isdir(path):
-        for root, dirs, files in os.walk(path):
-
-            dirs[:] = [d for d in dirs if d not in ignore_dirs]
-
-            for fName in files:
-                if fName.endswith(".orchest"):
-                    if relative_to is not None:
-                        root = root[len(relative_to) :]
-                        if root.startswith("/"):
-                            root = root[1:]
-
-                    # Path normalization is important for correctly
-                    # detecting pipelines that were deleted through the
-                    # file system in SyncProjectPipelinesDBState, i.e.
-                    # to avoid false positives.
-                    pipelines.append(os.path.normpath(os.path.join(root, fName)))
-
-    return pipelines
-
-
 def write_config(app, key, value):
 
     try:
@@ -481,6 +514,10 @@ def write_config(app, key, value):
     os.system("chmod o+rw " + conf_json_path)
 
 
+def get_snapshot_store() -> SnapshotStore:
+    return SnapshotStore(StaticConfig.SNAPSHOT_STORE_DIR)
+
+
 def create_job_directory(job_uuid, pipeline_uuid, project_uuid):
 
     snapshot_path = os.path.join(
@@ -494,11 +531,24 @@ def create_job_directory(job_uuid, pipeline_uuid, project_uuid):
         current_app.config["USER_DIR"], "projects", project_uuid_to_path(project_uuid)
     )
 
-    copytree(project_dir, snapshot_path)
-    # Ignore the ".orchest/pipelines" directory containing the logs and
-    # data directories. Ignore errors because the directory might not be
-    # there.
-    rmtree(os.path.join(snapshot_path, ".orchest/pipelines"), ignore_errors=True)
+    # Files that are unchanged since the previous snapshot of the
+    # project are shared with it through hardlinks. Ignore the
+    # ".orchest/pipelines" directory containing the logs and data
+    # directories.
+    get_snapshot_store().snapshot(
+        project_uuid,
+        project_dir,
+        snapshot_path,
+        skip_paths=[".orchest/pipelines"],
+    )
+
+
+def collect_snapshot_store_garbage(app):
+    removed, freed = get_snapshot_store().collect_garbage()
+    if removed > 0:
+        app.logger.info(
+            f"Removed {removed} unused snapshot objects, freed {freed} bytes."
+        )
 
 
 def rmtree(path, ignore_errors=False):
@@ -541,6 +591,8 @@ def remove_job_directory(job_uuid, pipeline_uuid, project_uuid):
     job_pipeline_path = os.path.join(job_project_path, pipeline_uuid)
     job_path = os.path.join(job_pipeline_path, job_uuid)
 
+    # Snapshot objects no longer in use are removed by the scheduler,
+    # see collect_snapshot_store_garbage.
     if os.path.isdir(job_path):
         rmtree(job_path, ignore_errors=True)
 
@@ -572,6 +624,8 @@ def remove_project_jobs_directories(project_uuid):
     if os.path.isdir(project_jobs_path):
         rmtree(project_jobs_path, ignore_errors=True)
 
+    get_snapshot_store().remove_index(project_uuid)
+
 
 def get_ipynb_template(language: str):
 
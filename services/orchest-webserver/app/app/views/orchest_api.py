@@ -2,12 +2,10 @@ import requests
 from flask import current_app, jsonify, request
 
 from app import analytics, error
-from app.core import jobs
-from app.models import Pipeline, Project
+from app.core import jobs, sessions
 from app.utils import (
     get_environment,
     get_environments,
-    get_pipeline_json,
     get_project_directory,
     get_project_snapshot_size,
     pipeline_uuid_to_path,
@@ -317,42 +315,24 @@ def register_orchest_api_views(app, db):
         project_uuid = json_obj["project_uuid"]
         pipeline_uuid = json_obj["pipeline_uuid"]
 
-        # Lock the project and pipeline row to avoid race conditions
-        # with RenameProject and MovePipeline, which are locking for
-        # update themselves.
-        Project.query.with_for_update().filter(
-            Project.uuid == project_uuid,
-        ).one()
-        Pipeline.query.with_for_update().filter(
-            Pipeline.project_uuid == project_uuid,
-            Pipeline.uuid == pipeline_uuid,
-        ).one()
-
-        pipeline_path = pipeline_uuid_to_path(
-            json_obj["pipeline_uuid"],
-            json_obj["project_uuid"],
-        )
-
-        project_dir = get_project_directory(json_obj["project_uuid"], host_path=True)
-
-        services = get_pipeline_json(
-            json_obj["pipeline_uuid"], json_obj["project_uuid"]
-        ).get("services", {})
-
-        session_config = {
-            "project_uuid": project_uuid,
-            "pipeline_uuid": pipeline_uuid,
-            "pipeline_path": pipeline_path,
-            "project_dir": project_dir,
-            "host_userdir": app.config["HOST_USER_DIR"],
-            "services": services,
-        }
+        session_config = sessions.get_session_config(project_uuid, pipeline_uuid)
+        services = session_config["services"]
 
         resp = requests.post(
             "http://" + app.config["ORCHEST_API_ADDRESS"] + "/api/sessions/",
             json=session_config,
         )
 
+        # Launch sessions for other pipelines of the project, so that
+        # opening them does not have to wait for their session to start.
+        if (
+            resp.status_code in [200, 201]
+            and app.config.get("INTERACTIVE_SESSIONS_POOL_SIZE", 0) > 0
+        ):
+            app.config["SCHEDULER"].add_job(
+                sessions.prewarm_project_sessions, args=[app, project_uuid]
+            )
+
         analytics.send_event(
             app,
             analytics.Event.SESSION_START,
@@ -601,12 +581,18 @@ def register_orchest_api_views(app, db):
     @app.route("/catch/api-proxy/api/jobs/<job_uuid>", methods=["get"])
     def catch_api_proxy_jobs_get(job_uuid):
 
+        # So that polling clients get a 304 if the job did not change.
+        headers = {}
+        if "If-None-Match" in request.headers:
+            headers["If-None-Match"] = request.headers["If-None-Match"]
+
         resp = requests.get(
             "http://"
             + app.config["ORCHEST_API_ADDRESS"]
             + "/api/jobs/"
             + job_uuid
             + request_args_to_string(request.args),
+            headers=headers,
         )
 
         return resp.content, resp.status_code, resp.headers.items()
@@ -18,7 +18,15 @@ from _orchest.internals.two_phase_executor import TwoPhaseExecutor
 from _orchest.internals.utils import run_orchest_ctl
 from app import analytics, error
 from app.config import CONFIG_CLASS as StaticConfig
-from app.core.pipelines import CreatePipeline, DeletePipeline, MovePipeline
+from app.core import file_picker
+from app.core.pipelines import (
+    CreatePipeline,
+    DeletePipeline,
+    MovePipeline,
+    get_pipeline_metadata,
+    refresh_pipelines_metadata,
+    update_pipeline_metadata,
+)
 from app.core.projects import (
     CreateProject,
     DeleteProject,
@@ -33,12 +41,12 @@ from app.models import Environment, Pipeline, Project
 from app.schemas import BackgroundTaskSchema, EnvironmentSchema, ProjectSchema
 from app.utils import (
     check_pipeline_correctness,
+    count_environments,
     create_pipeline_file,
     delete_environment,
     get_environment,
     get_environment_directory,
     get_environments,
-    get_job_counts,
     get_orchest_examples_json,
     get_orchest_update_info_json,
     get_pipeline_directory,
@@ -46,8 +54,8 @@ from app.utils import (
     get_pipeline_path,
     get_project_directory,
     get_project_snapshot_size,
+    get_projects_overview,
     get_repo_tag,
-    get_session_counts,
     is_valid_project_relative_path,
     normalize_project_relative_path,
     pipeline_set_notebook_kernels,
@@ -512,11 +520,13 @@ def register_views(app, db):
         # be shown until ready.
         projects = projects_schema.dump(Project.query.filter_by(status="READY").all())
 
-        if request.args.get("session_counts") == "true":
-            session_counts = get_session_counts()
-
-        if request.args.get("job_counts") == "true":
-            job_counts = get_job_counts()
+        with_session_counts = request.args.get("session_counts") == "true"
+        with_job_counts = request.args.get("job_counts") == "true"
+        # A single request to the orchest-api for the counts of all
+        # projects, aggregated there.
+        overview = {}
+        if with_session_counts or with_job_counts:
+            overview = get_projects_overview()
 
         for project in projects:
 
@@ -537,16 +547,23 @@ def register_views(app, db):
                         )
                     )
 
-            counts = project_entity_counts(project["uuid"])
-            project.update(counts)
-
-            if request.args.get("session_counts") == "true":
-                project.update(
-                    {"session_count": session_counts.get(project["uuid"], 0)}
-                )
+        # Counted after the discovery, which can add pipelines.
+        pipeline_counts = dict(
+            db.session.query(
+                Pipeline.project_uuid, sqlalchemy.func.count(Pipeline.uuid)
+            )
+            .group_by(Pipeline.project_uuid)
+            .all()
+        )
+        for project in projects:
+            project["pipeline_count"] = pipeline_counts.get(project["uuid"], 0)
+            project["environment_count"] = count_environments(project["uuid"])
 
-            if request.args.get("job_counts") == "true":
-                project.update({"job_count": job_counts.get(project["uuid"], 0)})
+            counts = overview.get(project["uuid"], {})
+            if with_session_counts:
+                project["session_count"] = counts.get("session_count", 0)
+            if with_job_counts:
+                project["job_count"] = counts.get("job_count", 0)
 
         return jsonify(projects)
 
@@ -688,6 +705,7 @@ def register_views(app, db):
             return jsonify({"message": msg}), 500
 
         pipelines = Pipeline.query.filter(Pipeline.project_uuid == project_uuid).all()
+        refresh_pipelines_metadata(pipelines)
         pipelines_augmented = []
 
         for pipeline in pipelines:
@@ -695,14 +713,8 @@ def register_views(app, db):
             pipeline_augmented = {
                 "uuid": pipeline.uuid,
                 "path": pipeline.path,
+                **get_pipeline_metadata(pipeline),
             }
-
-            pipeline_json = get_pipeline_json(pipeline.uuid, pipeline.project_uuid)
-            if pipeline_json is not None:
-                pipeline_augmented["name"] = pipeline_json["name"]
-            else:
-                pipeline_augmented["name"] = "Warning: pipeline file was not found."
-
             pipelines_augmented.append(pipeline_augmented)
 
         json_string = json.dumps({"success": True, "result": pipelines_augmented})
@@ -713,6 +725,7 @@ def register_views(app, db):
     def pipelines_get_all():
 
         pipelines = Pipeline.query.all()
+        refresh_pipelines_metadata(pipelines)
         pipelines_augmented = []
 
         for pipeline in pipelines:
@@ -721,14 +734,8 @@ def register_views(app, db):
                 "uuid": pipeline.uuid,
                 "path": pipeline.path,
                 "project_uuid": pipeline.project_uuid,
+                **get_pipeline_metadata(pipeline),
             }
-
-            pipeline_json = get_pipeline_json(pipeline.uuid, pipeline.project_uuid)
-            if pipeline_json is not None:
-                pipeline_augmented["name"] = pipeline_json["name"]
-            else:
-                pipeline_augmented["name"] = "Warning: pipeline file was not found."
-
             pipelines_augmented.append(pipeline_augmented)
 
         json_string = json.dumps({"success": True, "result": pipelines_augmented})
@@ -866,6 +873,15 @@ def register_views(app, db):
             with open(pipeline_json_path, "w") as json_file:
                 json.dump(pipeline_json, json_file, indent=4, sort_keys=True)
 
+            if request.args.get("pipeline_run_uuid") is None:
+                pipeline = Pipeline.query.filter_by(
+                    project_uuid=project_uuid, uuid=pipeline_uuid
+                ).one_or_none()
+                if pipeline is not None and update_pipeline_metadata(
+                    pipeline, pipeline_json_path, pipeline_json
+                ):
+                    db.session.commit()
+
             if old_pipeline_json["name"] != pipeline_json["name"]:
                 resp = requests.put(
                     (
@@ -929,57 +945,49 @@ def register_views(app, db):
 
     @app.route("/async/file-picker-tree/<project_uuid>", methods=["GET"])
     def get_file_picker_tree(project_uuid):
-
-        allowed_file_extensions = ["ipynb", "R", "py", "sh"]
-
+        """Gets the tree of the files of a project usable as a step.
+
+        Query args:
+            path: Directory the tree starts at, defaults to the project
+                directory.
+            depth: Number of levels of directories to list, all levels
+                are listed if not given.
+            expand: Directory, relative to path, to list regardless of
+                depth, along with its parents.
+            ignore: Comma separated fnmatch patterns of directories to
+                leave out, on top of FILE_PICKER_IGNORE_PATTERNS.
+
+        Supports conditional requests through If-None-Match.
+        """
         project_dir = get_project_directory(project_uuid)
 
         if not os.path.isdir(project_dir):
             return jsonify({"message": "Project dir %s not found." % project_dir}), 404
 
-        tree = {"type": "directory", "root": True, "name": "/", "children": []}
-
-        dir_nodes = {}
-
-        dir_nodes[project_dir] = tree
-
-        for root, dirs, files in os.walk(project_dir):
-
-            # exclude directories that start with "." from file_picker
-            dirs[:] = [dirname for dirname in dirs if not dirname.startswith(".")]
-
-            for dirname in dirs:
-
-                dir_path = os.path.join(root, dirname)
-                dir_node = {
-                    "type": "directory",
-                    "name": dirname,
-                    "children": [],
-                }
+        depth = request.args.get("depth", type=int)
+        if depth is not None and depth < 0:
+            return jsonify({"message": "depth must be >= 0."}), 400
 
-                dir_nodes[dir_path] = dir_node
-                dir_nodes[root]["children"].append(dir_node)
+        ignore_patterns = list(current_app.config["FILE_PICKER_IGNORE_PATTERNS"])
+        if request.args.get("ignore"):
+            ignore_patterns.extend(request.args["ignore"].split(","))
 
-            for filename in files:
-
-                if filename.split(".")[-1] in allowed_file_extensions:
-                    file_node = {
-                        "type": "file",
-                        "name": filename,
-                    }
-
-                    # this key should always exist
-                    try:
-                        dir_nodes[root]["children"].append(file_node)
-                    except KeyError as e:
-                        app.logger.error(
-                            "Key %s does not exist in dir_nodes %s. Error: %s"
-                            % (root, dir_nodes, e)
-                        )
-                    except Exception as e:
-                        app.logger.error("Error: %e" % e)
-
-        return jsonify(tree)
+        try:
+            tree, etag = file_picker.get_file_picker_tree(
+                project_dir,
+                path=request.args.get("path", "/"),
+                depth=depth,
+                expand=request.args.get("expand"),
+                ignore_patterns=ignore_patterns,
+            )
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+        except FileNotFoundError as e:
+            return jsonify({"message": str(e)}), 404
+
+        response = jsonify(tree)
+        response.set_etag(etag)
+        return response.make_conditional(request)
 
     @app.route(
         "/async/project-files/create/<project_uuid>/<pipeline_uuid>/<step_uuid>",
@@ -0,0 +1,40 @@
+"""Add project_fs_indexes
+
+Revision ID: 2f6d8b1c4e7a
+Revises: 69aa6e1d358a
+Create Date: 2022-01-27 15:22:09.418236
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "2f6d8b1c4e7a"
+down_revision = "69aa6e1d358a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "project_fs_indexes",
+        sa.Column("project_uuid", sa.String(length=255), nullable=False),
+        sa.Column(
+            "directories",
+            postgresql.JSONB(astext_type=sa.Text()),
+            server_default="{}",
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["project_uuid"],
+            ["projects.uuid"],
+            name=op.f("fk_project_fs_indexes_project_uuid_projects"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("project_uuid", name=op.f("pk_project_fs_indexes")),
+    )
+
+
+def downgrade():
+    op.drop_table("project_fs_indexes")
@@ -0,0 +1,39 @@
+"""Add pipeline file metadata to pipelines
+
+Revision ID: 8e3b5c7d9f1a
+Revises: 2f6d8b1c4e7a
+Create Date: 2022-01-28 10:05:47.661832
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "8e3b5c7d9f1a"
+down_revision = "2f6d8b1c4e7a"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("pipelines", sa.Column("name", sa.String(), nullable=True))
+    op.add_column("pipelines", sa.Column("step_count", sa.Integer(), nullable=True))
+    op.add_column(
+        "pipelines",
+        sa.Column(
+            "environments", postgresql.JSONB(astext_type=sa.Text()), nullable=True
+        ),
+    )
+    op.add_column(
+        "pipelines", sa.Column("file_mtime_ns", sa.BigInteger(), nullable=True)
+    )
+    op.add_column("pipelines", sa.Column("file_size", sa.BigInteger(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("pipelines", "file_size")
+    op.drop_column("pipelines", "file_mtime_ns")
+    op.drop_column("pipelines", "environments")
+    op.drop_column("pipelines", "step_count")
+    op.drop_column("pipelines", "name")
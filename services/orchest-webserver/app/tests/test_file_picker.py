@@ -0,0 +1,136 @@
+import os
+
+import pytest
+
+from app import utils
+from app.core import file_picker
+
+
+def _touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write("")
+
+
+def _children(node):
+    return {child["name"]: child for child in node["children"]}
+
+
+@pytest.fixture()
+def project_dir(tmp_path):
+    project_dir = tmp_path / "project"
+    _touch(project_dir / "main.py")
+    _touch(project_dir / "data.csv")
+    _touch(project_dir / "a" / "b" / "step.ipynb")
+    _touch(project_dir / "c" / "step.sh")
+    _touch(project_dir / "node_modules" / "x.py")
+    _touch(project_dir / ".git" / "hook.sh")
+    _touch(project_dir / "scratch-1" / "notes.py")
+    return project_dir
+
+
+def test_get_file_picker_tree(project_dir):
+    tree, _ = file_picker.get_file_picker_tree(
+        str(project_dir), ignore_patterns=["node_modules"]
+    )
+
+    assert tree["root"] and tree["expanded"]
+    # Only files that can be used as a step are listed.
+    assert set(_children(tree)) == {"main.py", "a", "c", "scratch-1"}
+    step = _children(_children(_children(tree)["a"])["b"])["step.ipynb"]
+    assert step == {"type": "file", "name": "step.ipynb"}
+
+
+def test_get_file_picker_tree_depth(project_dir):
+    tree, _ = file_picker.get_file_picker_tree(str(project_dir), depth=1)
+
+    a = _children(tree)["a"]
+    assert tree["expanded"]
+    assert not a["expanded"]
+    assert a["children"] == []
+
+    tree, _ = file_picker.get_file_picker_tree(str(project_dir), depth=0)
+    assert not tree["expanded"]
+
+
+def test_get_file_picker_tree_expand(project_dir):
+    tree, _ = file_picker.get_file_picker_tree(str(project_dir), depth=1, expand="a/b")
+
+    a = _children(tree)["a"]
+    assert a["expanded"]
+    assert _children(a)["b"]["expanded"]
+    assert "step.ipynb" in _children(_children(a)["b"])
+    # Not on the path to the expanded directory.
+    assert not _children(tree)["c"]["expanded"]
+
+
+def test_get_file_picker_tree_path(project_dir):
+    tree, _ = file_picker.get_file_picker_tree(str(project_dir), path="/a")
+
+    assert not tree["root"]
+    assert tree["name"] == "a"
+    assert set(_children(tree)) == {"b"}
+
+
+def test_get_file_picker_tree_ignore_patterns(project_dir):
+    tree, _ = file_picker.get_file_picker_tree(
+        str(project_dir), ignore_patterns=["node_modules", "scratch-*"]
+    )
+
+    # Hidden directories are always left out.
+    assert set(_children(tree)) == {"main.py", "a", "c"}
+
+
+def test_get_file_picker_tree_outside_of_project(project_dir, tmp_path):
+    _touch(tmp_path / "outside" / "secret.py")
+    os.symlink(tmp_path / "outside", project_dir / "link")
+
+    with pytest.raises(ValueError):
+        file_picker.get_file_picker_tree(str(project_dir), path="/../outside")
+    with pytest.raises(ValueError):
+        file_picker.get_file_picker_tree(str(project_dir), path="/link")
+
+    # Symlinks to directories are listed but not walked.
+    tree, _ = file_picker.get_file_picker_tree(str(project_dir))
+    link = _children(tree)["link"]
+    assert not link["expanded"]
+    assert link["children"] == []
+
+    with pytest.raises(FileNotFoundError):
+        file_picker.get_file_picker_tree(str(project_dir), path="/missing")
+
+
+def test_get_file_picker_tree_etag(project_dir):
+    _, etag = file_picker.get_file_picker_tree(str(project_dir))
+    assert file_picker.get_file_picker_tree(str(project_dir))[1] == etag
+
+    # Listing parameters are part of the ETag.
+    assert file_picker.get_file_picker_tree(str(project_dir), depth=1)[1] != etag
+
+    os.utime(project_dir / "c", ns=(0, 0))
+    assert file_picker.get_file_picker_tree(str(project_dir))[1] != etag
+
+
+def test_file_picker_tree_view_not_modified(
+    client, project, project_dir, tmp_path, monkeypatch
+):
+    # The project fixture lives in "my-project".
+    os.makedirs(tmp_path / "projects")
+    os.rename(project_dir, tmp_path / "projects" / "my-project")
+    monkeypatch.setattr(utils.StaticConfig, "USER_DIR", str(tmp_path))
+    os.utime(tmp_path / "projects" / "my-project", ns=(0, 0))
+    url = f"/async/file-picker-tree/{project.uuid}"
+
+    resp = client.get(url)
+    assert resp.status_code == 200
+    etag = resp.headers["ETag"]
+
+    resp = client.get(url, headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+
+    _touch(tmp_path / "projects" / "my-project" / "new.py")
+    resp = client.get(url, headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert "new.py" in _children(resp.get_json())
+
+    assert client.get(url, query_string={"path": "/.."}).status_code == 400
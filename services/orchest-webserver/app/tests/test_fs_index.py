@@ -0,0 +1,155 @@
+import os
+import shutil
+import time
+
+import pytest
+
+from _orchest.internals.two_phase_executor import TwoPhaseExecutor
+from app.connections import db
+from app.core import fs_index, projects
+
+
+def _age(root):
+    # Moves the mtime of every directory out of the window in which
+    # mtimes are not trusted by the index.
+    past = time.time() - 3600
+    for dirpath, _, _ in os.walk(root):
+        os.utime(dirpath, (past, past))
+
+
+def _touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write("{}")
+
+
+def _scan(project_dir, index):
+    return fs_index.scan_project(str(project_dir), index)
+
+
+@pytest.fixture()
+def project_dir(tmp_path):
+    _touch(tmp_path / "a.orchest")
+    _touch(tmp_path / "sub" / "b.orchest")
+    _touch(tmp_path / "sub" / "notebook.ipynb")
+    _touch(tmp_path / "sub" / ".ipynb_checkpoints" / "c.orchest")
+    _age(tmp_path)
+    return tmp_path
+
+
+def test_scan_project_no_index(project_dir):
+    paths, index, changed = _scan(project_dir, {})
+
+    assert changed
+    assert sorted(paths) == ["a.orchest", "sub/b.orchest"]
+    assert set(index) == {"", "sub"}
+    assert index["sub"]["pipelines"] == ["b.orchest"]
+
+
+def test_scan_project_unchanged(project_dir):
+    _, index, _ = _scan(project_dir, {})
+
+    paths, new_index, changed = _scan(project_dir, index)
+
+    assert not changed
+    assert sorted(paths) == ["a.orchest", "sub/b.orchest"]
+    assert new_index == index
+
+
+def test_scan_project_add(project_dir):
+    _, index, _ = _scan(project_dir, {})
+
+    _touch(project_dir / "sub" / "deeper" / "c.orchest")
+    paths, _, changed = _scan(project_dir, index)
+
+    assert changed
+    assert sorted(paths) == ["a.orchest", "sub/b.orchest", "sub/deeper/c.orchest"]
+
+
+@pytest.mark.parametrize(
+    "src,dst,expected_paths,expected_dirs",
+    [
+        (
+            "sub/b.orchest",
+            "sub/c.orchest",
+            ["a.orchest", "sub/c.orchest"],
+            {"", "sub"},
+        ),
+        ("sub", "renamed", ["a.orchest", "renamed/b.orchest"], {"", "renamed"}),
+    ],
+    ids=["file", "directory"],
+)
+def test_scan_project_rename(project_dir, src, dst, expected_paths, expected_dirs):
+    _, index, _ = _scan(project_dir, {})
+
+    os.rename(project_dir / src, project_dir / dst)
+    paths, index, changed = _scan(project_dir, index)
+
+    assert changed
+    assert sorted(paths) == expected_paths
+    assert set(index) == expected_dirs
+
+
+def test_scan_project_delete(project_dir):
+    _, index, _ = _scan(project_dir, {})
+
+    os.remove(project_dir / "a.orchest")
+    paths, index, changed = _scan(project_dir, index)
+    assert changed
+    assert paths == ["sub/b.orchest"]
+
+    shutil.rmtree(project_dir / "sub")
+    paths, index, changed = _scan(project_dir, index)
+    assert changed
+    assert paths == []
+    assert set(index) == {""}
+
+
+def test_scan_project_recent_mtime(project_dir):
+    _, index, _ = _scan(project_dir, {})
+
+    _touch(project_dir / "sub" / "c.orchest")
+    _, index, changed = _scan(project_dir, index)
+    assert changed
+    # The directory was listed right after being changed, a later
+    # change could keep the same mtime.
+    assert index["sub"]["mtime"] is None
+    assert index[""]["mtime"] is not None
+
+    # Hence it is listed again until its mtime can be trusted.
+    _, index, changed = _scan(project_dir, index)
+    assert changed
+
+    _age(project_dir)
+    _, index, changed = _scan(project_dir, index)
+    assert index["sub"]["mtime"] is not None
+    _, _, changed = _scan(project_dir, index)
+    assert not changed
+
+
+class _LockForbidden:
+    @property
+    def query(self):
+        raise AssertionError("The project should not be locked.")
+
+
+def _sync(app, project_uuid):
+    with app.app_context():
+        with TwoPhaseExecutor(db.session) as tpe:
+            projects.SyncProjectPipelinesDBState(tpe).transaction(project_uuid)
+
+
+def test_sync_project_pipelines_unchanged(
+    test_app, client, project, tmp_path, monkeypatch
+):
+    monkeypatch.setitem(test_app.config, "USER_DIR", str(tmp_path))
+    os.makedirs(tmp_path / "projects" / "my-project" / "sub")
+    _age(tmp_path)
+
+    _sync(test_app, project.uuid)
+    with test_app.app_context():
+        assert set(fs_index.get_project_index(project.uuid)) == {"", "sub"}
+
+    # Nothing changed, the db is not reconciled.
+    monkeypatch.setattr(projects, "Project", _LockForbidden())
+    _sync(test_app, project.uuid)
@@ -431,3 +431,25 @@ def test_duplicate_job_spec_configuration(
 
     # Finalize checking that the selection is respected.
     assert len(already_checked) == len(posted_json["parameters"])
+
+
+def test_get_job_not_modified(client, monkeypatch):
+    def mock_get_request(url, headers=None, *args, **kwargs):
+        if headers.get("If-None-Match") == '"etag"':
+            resp = MockRequestReponse(304)
+        else:
+            resp = MockRequestReponse(200)
+            resp.content = b"{}"
+        resp.headers = {"ETag": '"etag"'}
+        return resp
+
+    monkeypatch.setattr(requests, "get", mock_get_request)
+
+    resp = client.get("/catch/api-proxy/api/jobs/job-uuid")
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] == '"etag"'
+
+    resp = client.get(
+        "/catch/api-proxy/api/jobs/job-uuid", headers={"If-None-Match": '"etag"'}
+    )
+    assert resp.status_code == 304
@@ -0,0 +1,124 @@
+import json
+import os
+
+from app.core import pipelines
+from app.models import Pipeline
+
+
+def _pipeline_json(name="my-pipeline", environments=()):
+    return {
+        "name": name,
+        "uuid": "pipeline-uuid",
+        "version": "1.0.0",
+        "settings": {},
+        "parameters": {},
+        "steps": {
+            f"step-{i}": {"uuid": f"step-{i}", "environment": env}
+            for i, env in enumerate(environments)
+        },
+    }
+
+
+def _write(path, pipeline_json):
+    with open(path, "w") as f:
+        json.dump(pipeline_json, f)
+
+
+def _new_pipeline():
+    return Pipeline(uuid="pipeline-uuid", project_uuid="project-uuid", path="p")
+
+
+def test_update_pipeline_metadata_read(tmp_path):
+    path = str(tmp_path / "p.orchest")
+    _write(path, _pipeline_json(environments=["env-b", "env-a", "env-b"]))
+    pipeline = _new_pipeline()
+
+    assert pipelines.update_pipeline_metadata(pipeline, path)
+    assert pipeline.name == "my-pipeline"
+    assert pipeline.step_count == 3
+    assert pipeline.environments == ["env-a", "env-b"]
+    assert pipeline.file_size == os.stat(path).st_size
+
+
+def test_update_pipeline_metadata_unchanged_file(tmp_path):
+    path = str(tmp_path / "p.orchest")
+    _write(path, _pipeline_json(name="name-a"))
+    pipeline = _new_pipeline()
+    pipelines.update_pipeline_metadata(pipeline, path)
+
+    # Same size and mtime, the file is not read again.
+    stat = os.stat(path)
+    _write(path, _pipeline_json(name="name-b"))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert not pipelines.update_pipeline_metadata(pipeline, path)
+    assert pipeline.name == "name-a"
+
+
+def test_update_pipeline_metadata_edited_file(tmp_path):
+    path = str(tmp_path / "p.orchest")
+    _write(path, _pipeline_json(name="name"))
+    pipeline = _new_pipeline()
+    pipelines.update_pipeline_metadata(pipeline, path)
+
+    stat = os.stat(path)
+    _write(path, _pipeline_json(name="new-name", environments=["env"]))
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    assert pipelines.update_pipeline_metadata(pipeline, path)
+    assert pipeline.name == "new-name"
+    assert pipeline.step_count == 1
+    assert pipeline.environments == ["env"]
+
+    assert not pipelines.update_pipeline_metadata(pipeline, path)
+
+
+def test_update_pipeline_metadata_missing_file(tmp_path):
+    path = str(tmp_path / "p.orchest")
+    _write(path, _pipeline_json())
+    pipeline = _new_pipeline()
+    pipelines.update_pipeline_metadata(pipeline, path)
+
+    os.remove(path)
+
+    assert pipelines.update_pipeline_metadata(pipeline, path)
+    assert pipeline.name is None
+    assert pipeline.file_mtime_ns is None
+    assert pipelines.get_pipeline_metadata(pipeline)["name"] == (
+        "Warning: pipeline file was not found."
+    )
+    assert not pipelines.update_pipeline_metadata(pipeline, path)
+
+
+def test_update_pipeline_metadata_saved_json(tmp_path):
+    path = str(tmp_path / "p.orchest")
+    _write(path, _pipeline_json(name="on-disk"))
+    pipeline = _new_pipeline()
+
+    # The content that has just been saved is used instead of reading
+    # the file.
+    saved = _pipeline_json(name="saved", environments=["env"])
+    assert pipelines.update_pipeline_metadata(pipeline, path, saved)
+    assert pipeline.name == "saved"
+    assert pipeline.step_count == 1
+    assert pipeline.file_mtime_ns == os.stat(path).st_mtime_ns
+
+    # The stat is recorded, the file is not read at the next refresh.
+    assert not pipelines.update_pipeline_metadata(pipeline, path)
+    assert pipeline.name == "saved"
+
+
+def test_refresh_pipelines_metadata(test_app, client, pipeline, tmp_path, monkeypatch):
+    monkeypatch.setitem(test_app.config, "USER_DIR", str(tmp_path))
+    project_dir = tmp_path / "projects" / "my-project"
+    os.makedirs(project_dir)
+    _write(str(project_dir / "my-pipeline"), _pipeline_json(name="refreshed"))
+
+    with test_app.app_context():
+        pipelines.refresh_pipelines_metadata(Pipeline.query.all())
+
+    with test_app.app_context():
+        db_pipeline = Pipeline.query.filter_by(uuid=pipeline.uuid).one()
+        assert db_pipeline.name == "refreshed"
+        assert db_pipeline.step_count == 0
+        assert db_pipeline.file_mtime_ns is not None
@@ -0,0 +1,36 @@
+import requests
+from tests.test_utils import MockRequestReponse, Pipeline
+
+from app.core import sessions
+
+
+def test_prewarm_project_sessions(test_app, client, project, monkeypatch):
+    # Sorted by path when topping up the pool.
+    for uuid in ["opened", "has-services", "other-1", "other-2", "other-3"]:
+        Pipeline(test_app, project, uuid, path=f"{uuid}.orchest")
+    launched = []
+
+    def mock_get_request(url, params=None, *args, **kwargs):
+        session = {"pipeline_uuid": "opened", "prewarmed_time": None}
+        return MockRequestReponse(json={"sessions": [session]})
+
+    def mock_post_request(url, json=None, *args, **kwargs):
+        assert json["prewarm"]
+        launched.append(json["pipeline_uuid"])
+        return MockRequestReponse(201)
+
+    def mock_get_pipeline_json(pipeline_uuid, project_uuid):
+        if pipeline_uuid == "has-services":
+            return {"services": {"db": {"image": "postgres"}}}
+        return {}
+
+    monkeypatch.setattr(requests, "get", mock_get_request)
+    monkeypatch.setattr(requests, "post", mock_post_request)
+    monkeypatch.setattr(sessions, "get_pipeline_json", mock_get_pipeline_json)
+    monkeypatch.setattr(sessions, "get_project_directory", lambda *args, **kwargs: "")
+    monkeypatch.setitem(test_app.config, "INTERACTIVE_SESSIONS_POOL_SIZE", 2)
+
+    sessions.prewarm_project_sessions(test_app, project.uuid)
+
+    # User services are not started for pipelines that were not opened.
+    assert launched == ["other-1", "other-2"]
@@ -0,0 +1,113 @@
+import os
+
+import pytest
+
+from app.core import snapshots
+
+
+def _write(path, content, mode=0o644):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write(content)
+    os.chmod(path, mode)
+
+
+@pytest.fixture()
+def project_dir(tmp_path):
+    project_dir = tmp_path / "project"
+    _write(project_dir / "a.py", "print('a')")
+    _write(project_dir / "sub" / "copy-of-a.py", "print('a')")
+    _write(project_dir / "b.py", "print('b')")
+    _write(project_dir / ".orchest" / "pipelines" / "logs.txt", "logs")
+    return project_dir
+
+
+@pytest.fixture()
+def store(tmp_path):
+    return snapshots.SnapshotStore(str(tmp_path / "store"))
+
+
+def _objects(tmp_path):
+    objects = []
+    for root, _, filenames in os.walk(tmp_path / "store" / "objects"):
+        objects.extend(os.path.join(root, name) for name in filenames)
+    return objects
+
+
+def test_snapshot_dedup(store, project_dir, tmp_path):
+    size = store.snapshot(
+        "proj",
+        str(project_dir),
+        str(tmp_path / "snapshot-1"),
+        skip_paths=[".orchest/pipelines"],
+    )
+    store.snapshot("proj", str(project_dir), str(tmp_path / "snapshot-2"))
+
+    assert size == 3 * len("print('a')")
+    assert store.get_index("proj")["size"] == size + len("logs")
+    assert not os.path.exists(tmp_path / "snapshot-1" / ".orchest" / "pipelines")
+    # Files with the same content share an object, in all snapshots.
+    assert len(_objects(tmp_path)) == 3
+    a = os.stat(tmp_path / "snapshot-1" / "a.py")
+    assert a.st_ino == os.stat(tmp_path / "snapshot-1" / "sub" / "copy-of-a.py").st_ino
+    assert a.st_ino == os.stat(tmp_path / "snapshot-2" / "a.py").st_ino
+    with open(tmp_path / "snapshot-2" / "b.py") as f:
+        assert f.read() == "print('b')"
+
+
+def test_snapshot_manifest_reuse(store, project_dir, tmp_path, monkeypatch):
+    store.snapshot("proj", str(project_dir), str(tmp_path / "snapshot-1"))
+
+    hashed = []
+    hash_file = snapshots._hash_file
+
+    def mock_hash_file(path):
+        hashed.append(os.path.relpath(path, project_dir))
+        return hash_file(path)
+
+    monkeypatch.setattr(snapshots, "_hash_file", mock_hash_file)
+    _write(project_dir / "b.py", "print('changed')")
+
+    store.snapshot("proj", str(project_dir), str(tmp_path / "snapshot-2"))
+
+    # Only the file that changed since the last snapshot is read.
+    assert hashed == ["b.py"]
+    with open(tmp_path / "snapshot-2" / "b.py") as f:
+        assert f.read() == "print('changed')"
+    with open(tmp_path / "snapshot-1" / "b.py") as f:
+        assert f.read() == "print('b')"
+
+
+def test_snapshot_mode(store, project_dir, tmp_path):
+    _write(project_dir / "run.sh", "print('a')", mode=0o755)
+    _write(project_dir / "empty-1", "", mode=0o600)
+    _write(project_dir / "empty-2", "", mode=0o644)
+
+    store.snapshot("proj", str(project_dir), str(tmp_path / "snapshot"))
+
+    def mode(name):
+        return os.stat(tmp_path / "snapshot" / name).st_mode & 0o777
+
+    assert mode("run.sh") == 0o755
+    assert mode("a.py") == 0o644
+    assert mode("empty-1") == 0o600
+    assert mode("empty-2") == 0o644
+
+
+def test_collect_garbage(store, project_dir, tmp_path):
+    assert store.collect_garbage() == (0, 0)
+
+    store.snapshot("proj", str(project_dir), str(tmp_path / "snapshot-1"))
+    _write(project_dir / "b.py", "print('changed')")
+    store.snapshot("proj", str(project_dir), str(tmp_path / "snapshot-2"))
+    assert store.collect_garbage() == (0, 0)
+
+    # The content of the first b.py is only used by the first snapshot.
+    os.remove(tmp_path / "snapshot-1" / "b.py")
+    assert store.collect_garbage() == (1, len("print('b')"))
+
+    os.remove(tmp_path / "snapshot-2" / "b.py")
+    os.remove(tmp_path / "snapshot-2" / "a.py")
+    # Still used by sub/copy-of-a.py.
+    assert store.collect_garbage() == (1, len("print('changed')"))
+    assert len(_objects(tmp_path)) == 2
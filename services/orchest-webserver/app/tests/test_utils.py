@@ -1,3 +1,5 @@
+import requests
+
 from app import models
 from app.connections import db
 
@@ -35,3 +37,7 @@ class MockRequestReponse:
 
     def json(self):
         return self._json
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error")
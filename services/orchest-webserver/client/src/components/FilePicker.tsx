@@ -69,6 +69,7 @@ type FilePickerProps = {
   helperText: string;
   onChangeValue?: (value: FilePickerProps["value"]) => void;
   onCreateFile?: (path: string) => void;
+  onExpandDirectory?: (path: string) => void;
   onFocus?: () => void;
   tree: FileTree;
   value: string;
@@ -128,6 +129,9 @@ const FilePicker: React.FC<FilePickerProps> = (props) => {
 
   const onSelectListItem = (node: FileTree) => {
     if (node.type == "directory") {
+      if (node.expanded === false && props.onExpandDirectory) {
+        props.onExpandDirectory(`${path}${node.name}/`);
+      }
       setPath((oldPath) => {
         return `${oldPath}${node.name}/`;
       });
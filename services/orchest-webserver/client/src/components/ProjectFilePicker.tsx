@@ -19,6 +19,7 @@ import TextField from "@mui/material/TextField";
 import {
   absoluteToRelativePath,
   ALLOWED_STEP_EXTENSIONS,
+  collapseDoubleDots,
   extensionFromFilename,
   fetcher,
   FetchError,
@@ -71,14 +72,44 @@ type DirectoryDetails = {
   cwd: string;
 };
 
+// Replaces the children of the directory at path, e.g. "/a/b/".
+const setDirectoryInTree = (
+  tree: FileTree,
+  path: string,
+  directory: FileTree
+): FileTree => {
+  const [name, ...rest] = path.split("/").filter(Boolean);
+  if (!name) {
+    return {
+      ...tree,
+      expanded: directory.expanded,
+      children: directory.children,
+    };
+  }
+  return {
+    ...tree,
+    children: tree.children.map((child) =>
+      child.type === "directory" && child.name === name
+        ? setDirectoryInTree(child, `/${rest.join("/")}`, directory)
+        : child
+    ),
+  };
+};
+
 const useFileDirectoryDetails = (
   project_uuid: string,
-  pipeline_uuid: string
+  pipeline_uuid: string,
+  value: string
 ) => {
   const { setAlert } = useAppContext();
 
   const { data: directoryDetails, run, error } = useAsync<DirectoryDetails>();
-  const { tree, cwd } = directoryDetails || {};
+  const [tree, setTree] = React.useState<FileTree>();
+  const cwd = directoryDetails?.cwd;
+
+  React.useEffect(() => {
+    setTree(directoryDetails?.tree);
+  }, [directoryDetails]);
 
   React.useEffect(() => {
     if (error) {
@@ -86,17 +117,32 @@ const useFileDirectoryDetails = (
     }
   }, [setAlert, error]);
 
+  // Not a dependency of fetchDirectoryDetails, to not fetch the tree
+  // again on every change of the value.
+  const valueRef = React.useRef(value);
+  valueRef.current = value;
+
   const fetchDirectoryDetails = React.useCallback(() => {
     if (project_uuid && pipeline_uuid) {
       run(
-        Promise.all([
-          fetcher<FileTree>(`/async/file-picker-tree/${project_uuid}`),
-          fetcher<{ cwd: string }>(
-            `/async/file-picker-tree/pipeline-cwd/${project_uuid}/${pipeline_uuid}`
-          ).then((response) => `${response["cwd"]}/`), // FilePicker cwd expects trailing / for cwd paths
-        ]).then(([tree, cwd]) => {
-          return { tree, cwd };
-        })
+        fetcher<{ cwd: string }>(
+          `/async/file-picker-tree/pipeline-cwd/${project_uuid}/${pipeline_uuid}`
+        )
+          .then((response) => `${response["cwd"]}/`) // FilePicker cwd expects trailing / for cwd paths
+          .then((cwd) => {
+            // Only the first level of the project is fetched, along
+            // with the directory of the current value, other
+            // directories are fetched when navigated to.
+            const expand = collapseDoubleDots(`${cwd}${valueRef.current}`)
+              .split("/")
+              .slice(1, -1)
+              .join("/");
+            return fetcher<FileTree>(
+              `/async/file-picker-tree/${project_uuid}?depth=1&expand=${encodeURIComponent(
+                expand || "."
+              )}`
+            ).then((tree) => ({ tree, cwd }));
+          })
       );
     }
   }, [project_uuid, pipeline_uuid, run]);
@@ -105,7 +151,26 @@ const useFileDirectoryDetails = (
     fetchDirectoryDetails();
   }, [fetchDirectoryDetails]);
 
-  return { tree, cwd, fetchDirectoryDetails };
+  const expandDirectory = React.useCallback(
+    (path: string) => {
+      fetcher<FileTree>(
+        `/async/file-picker-tree/${project_uuid}?depth=1&path=${encodeURIComponent(
+          path
+        )}`
+      )
+        .then((directory) =>
+          setTree((current) =>
+            current ? setDirectoryInTree(current, path, directory) : current
+          )
+        )
+        .catch((error) =>
+          setAlert("Error", `Failed to fetch directory ${path}: ${error}`)
+        );
+    },
+    [project_uuid, setAlert]
+  );
+
+  return { tree, cwd, fetchDirectoryDetails, expandDirectory };
 };
 
 const ProjectFilePicker: React.FC<{
@@ -127,10 +192,12 @@ const ProjectFilePicker: React.FC<{
   const { setAlert } = useAppContext();
 
   // fetching data
-  const { tree, cwd, fetchDirectoryDetails } = useFileDirectoryDetails(
-    project_uuid,
-    pipeline_uuid
-  );
+  const {
+    tree,
+    cwd,
+    fetchDirectoryDetails,
+    expandDirectory,
+  } = useFileDirectoryDetails(project_uuid, pipeline_uuid, value);
 
   const selectedFileExists = useCheckFileValidity(
     project_uuid,
@@ -342,6 +409,7 @@ const ProjectFilePicker: React.FC<{
               : "Warning: this file wasn't found in the project directory."
           }
           onCreateFile={onCreateFile}
+          onExpandDirectory={expandDirectory}
           onChangeValue={onChangeFileValue}
           menuMaxWidth={menuMaxWidth}
         />
@@ -79,7 +79,9 @@ export type OrchestConfig = {
 
 export interface OrchestUserConfig {
   AUTH_ENABLED?: boolean;
+  INTERACTIVE_SESSIONS_POOL_SIZE: number;
   INTERCOM_USER_EMAIL: string;
+  MAX_BUILDS_PARALLELISM: number;
   MAX_INTERACTIVE_RUNS_PARALLELISM: number;
   MAX_JOB_RUNS_PARALLELISM: number;
   TELEMETRY_DISABLED: boolean;
@@ -289,6 +291,8 @@ export type FileTree = {
   type: "directory" | "file";
   name: string;
   root?: boolean;
+  // false for directories whose children have not been fetched yet.
+  expanded?: boolean;
   children: FileTree[];
 };
 
@@ -2,9 +2,7 @@ import { Code } from "@/components/common/Code";
 import ImageBuildLog from "@/components/ImageBuildLog";
 import { Layout } from "@/components/Layout";
 import { useAppContext } from "@/contexts/AppContext";
-import { useSessionsContext } from "@/contexts/SessionsContext";
 import { useSendAnalyticEvent } from "@/hooks/useSendAnalyticEvent";
-import { useSessionsPoller } from "@/hooks/useSessionsPoller";
 import { siteMap } from "@/routingConfig";
 import CloseIcon from "@mui/icons-material/Close";
 import MemoryIcon from "@mui/icons-material/Memory";
@@ -27,16 +25,13 @@ const CANCELABLE_STATUSES = ["PENDING", "STARTED"];
 const ConfigureJupyterLabView: React.FC = () => {
   // global
   const appContext = useAppContext();
-  const { setAlert, setConfirm, setAsSaved } = appContext;
-  const sessionContext = useSessionsContext();
-  useSessionsPoller();
+  const { setAlert, setAsSaved } = appContext;
 
   useSendAnalyticEvent("view load", { name: siteMap.configureJupyterLab.path });
 
   // local states
   const [state, setState] = React.useState({
     building: false,
-    sessionKillStatus: undefined,
     buildRequestInProgress: false,
     cancelBuildRequestInProgress: false,
     ignoreIncomingLogs: false,
@@ -92,28 +87,6 @@ const ConfigureJupyterLabView: React.FC = () => {
               ...prevState,
               ignoreIncomingLogs: false,
             }));
-
-            try {
-              let resp = JSON.parse(e.body);
-
-              if (resp.message == "SessionInProgressException") {
-                setConfirm(
-                  "Warning",
-                  "You must stop all active sessions in order to build a new JupyerLab image. \n\n" +
-                    "Are you sure you want to stop all sessions? All running Jupyter kernels and interactive pipeline runs will be stopped.",
-                  async () => {
-                    sessionContext.dispatch({ type: "sessionsKillAll" });
-                    setState((prevState) => ({
-                      ...prevState,
-                      sessionKillStatus: "WAITING",
-                    }));
-                    return true;
-                  }
-                );
-              }
-            } catch (error) {
-              console.error(error);
-            }
           }
         })
         .finally(() => {
@@ -205,39 +178,6 @@ const ConfigureJupyterLabView: React.FC = () => {
     return () => promiseManager.cancelCancelablePromises();
   }, []);
 
-  React.useEffect(() => {
-    if (
-      sessionContext.state.sessionsKillAllInProgress &&
-      state.sessionKillStatus === "WAITING"
-    ) {
-      setState((prevState) => ({
-        ...prevState,
-        sessionKillStatus: "VALIDATING",
-      }));
-    }
-
-    if (
-      !sessionContext.state.sessionsKillAllInProgress &&
-      state.sessionKillStatus === "VALIDATING"
-    ) {
-      const hasActiveSessions = sessionContext.state?.sessions
-        .map((session) => (session.status ? true : false))
-        .find((isActive) => isActive === true);
-
-      if (!hasActiveSessions) {
-        setState((prevState) => ({
-          ...prevState,
-          sessionKillStatus: undefined,
-        }));
-        buildImage();
-      }
-    }
-  }, [
-    sessionContext.state.sessions,
-    sessionContext.state.sessionsKillAllInProgress,
-    state.sessionKillStatus,
-  ]);
-
   return (
     <Layout>
       <div className={"view-page jupyterlab-config-page"}>
@@ -311,10 +251,7 @@ const ConfigureJupyterLabView: React.FC = () => {
 
               {!state.building ? (
                 <Button
-                  disabled={
-                    state.buildRequestInProgress ||
-                    typeof state.sessionKillStatus !== "undefined"
-                  }
+                  disabled={state.buildRequestInProgress}
                   startIcon={<MemoryIcon />}
                   color="secondary"
                   variant="contained"
@@ -6,3 +6,11 @@ class Config:
     PROJECT_DIR = _config.PROJECT_DIR
     LOGS_PATH = _config.LOGS_PATH
     LISTEN_PORT = _config.SIDECAR_PORT
+
+    ORCHEST_API_ADDRESS = _config.ORCHEST_API_ADDRESS
+    # How often to check whether the kernels of the Jupyter server of an
+    # interactive session are busy, and how often to report it to the
+    # orchest-api if it does not change, in seconds. The orchest-api
+    # stops trusting reports after KERNELS_ACTIVITY_REPORT_TTL.
+    KERNELS_ACTIVITY_POLL_INTERVAL = 2
+    KERNELS_ACTIVITY_REPORT_INTERVAL = 30
@@ -1,8 +1,12 @@
 import argparse
+import json
 import logging
 import os
 import re
 import socketserver
+import threading
+import time
+import urllib.request
 import uuid
 
 from config import Config
@@ -93,6 +97,50 @@ class TCPHandler(socketserver.StreamRequestHandler):
         logging.info(f"{service_name} disconnected.")
 
 
+def report_kernels_activity(kernels_url: str, report_url: str) -> None:
+    """Pushes the busy state of the kernels to the orchest-api.
+
+    Polls the Jupyter server of the session, which is cheap since it
+    is on the same network, and reports to the orchest-api when the
+    state changes and every KERNELS_ACTIVITY_REPORT_INTERVAL, so that
+    the idleness check of the orchest-api does not need to query every
+    session. Never returns.
+    """
+    last_busy = None
+    last_report_time = None
+    while True:
+        time.sleep(Config.KERNELS_ACTIVITY_POLL_INTERVAL)
+        try:
+            with urllib.request.urlopen(kernels_url, timeout=2) as response:
+                kernels = json.load(response)
+        # E.g. the Jupyter server is still starting. Not reporting makes
+        # the orchest-api query the server itself.
+        except Exception:
+            continue
+        busy = any(kernel.get("execution_state") == "busy" for kernel in kernels)
+
+        now = time.monotonic()
+        if (
+            busy == last_busy
+            and now - last_report_time < Config.KERNELS_ACTIVITY_REPORT_INTERVAL
+        ):
+            continue
+
+        request = urllib.request.Request(
+            report_url,
+            data=json.dumps({"busy": busy}).encode(),
+            headers={"Content-Type": "application/json"},
+            method="PUT",
+        )
+        try:
+            urllib.request.urlopen(request, timeout=5).close()
+        except Exception as e:
+            logging.warning(f"Failed to report the kernels activity: {e}")
+            continue
+        last_busy = busy
+        last_report_time = now
+
+
 def get_command_line_args():
     parser = argparse.ArgumentParser(description="Start session sidecar.")
     parser.add_argument(
@@ -143,6 +191,20 @@ if __name__ == "__main__":
     logs_path = get_service_log_file_path("<service>")
     logging.info(f"Storing logs in {logs_path}")
 
+    # Only set for interactive sessions.
+    kernels_url = os.environ.get("ORCHEST_JUPYTER_SERVER_KERNELS_URL")
+    if kernels_url is not None:
+        report_url = (
+            f"http://{Config.ORCHEST_API_ADDRESS}/api/sessions/"
+            f'{os.environ["ORCHEST_PROJECT_UUID"]}/'
+            f'{os.environ["ORCHEST_PIPELINE_UUID"]}/kernels'
+        )
+        threading.Thread(
+            target=report_kernels_activity,
+            args=[kernels_url, report_url],
+            daemon=True,
+        ).start()
+
     HOST = "0.0.0.0"
     PORT = Config.LISTEN_PORT
     logging.info(f"Listening on {HOST}:{PORT}")